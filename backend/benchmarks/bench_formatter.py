@@ -0,0 +1,127 @@
+"""
+Markdown post-processor benchmark and golden check.
+
+Verifies that improve_markdown_formatting (and MarkdownFormatter fed in
+random chunks) reproduces the golden corpus and the original multi-pass
+implementation on random input, then times both on multi-MB text.
+
+Usage (from backend/):
+    python -m benchmarks.bench_formatter
+    python -m benchmarks.bench_formatter --size-mb 8 --repeat 5
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from services.pdf_parser import MarkdownFormatter, improve_markdown_formatting
+
+GOLDEN_FILE = Path(__file__).parent / "golden" / "formatter_cases.json"
+
+
+def reference_improve_markdown_formatting(text: str) -> str:
+    """The original multi-pass implementation, kept as the correctness oracle."""
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    lines = text.split('\n')
+    formatted_lines = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            formatted_lines.append('')
+            continue
+        if stripped.startswith('|'):
+            formatted_lines.append(stripped)
+            continue
+        if stripped.isupper() and len(stripped.split()) > 1 and len(stripped) < 100:
+            formatted_lines.append(f"\n### {stripped.title()}\n")
+        elif re.match(r'^\d+\.?\s+[A-Z]', stripped):
+            formatted_lines.append(f"\n### {stripped}\n")
+        elif re.match(r'^[IVX]+\.?\s+[A-Z]', stripped):
+            formatted_lines.append(f"\n### {stripped}\n")
+        else:
+            formatted_lines.append(stripped)
+    text = '\n'.join(formatted_lines)
+    return re.sub(r'\n{3,}', '\n\n', text)
+
+
+def _format_chunked(text: str, rng: random.Random) -> str:
+    formatter = MarkdownFormatter()
+    out = []
+    index = 0
+    while index < len(text):
+        end = index + rng.randint(0, 200)
+        out.append(formatter.feed(text[index:end]))
+        index = end
+    out.append(formatter.finish())
+    return ''.join(out)
+
+
+def _random_text(rng: random.Random, lines: int) -> str:
+    pieces = [
+        "", "", " ", "\t", "plain body text line", "ALL CAPS HEADER", "SINGLE",
+        "1 Introduction", "2. Method", "3.1 Sub", "IV. Results", "iv lower",
+        "| a | b |", "  | padded | row |", "Mixed Case Line", "12 apples", "\r",
+    ]
+    return "\n".join(rng.choice(pieces) for _ in range(lines))
+
+
+def check_correctness(fuzz_cases: int = 300) -> List[str]:
+    """Return a list of failure descriptions (empty when everything matches)."""
+    failures = []
+    rng = random.Random(0)
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    for case in cases:
+        if improve_markdown_formatting(case["input"]) != case["expected"]:
+            failures.append(f"golden:{case['name']}")
+        if _format_chunked(case["input"], rng) != case["expected"]:
+            failures.append(f"golden-chunked:{case['name']}")
+    for index in range(fuzz_cases):
+        text = _random_text(rng, rng.randint(0, 60))
+        expected = reference_improve_markdown_formatting(text)
+        if improve_markdown_formatting(text) != expected or _format_chunked(text, rng) != expected:
+            failures.append(f"fuzz:{index}:{text!r}")
+    return failures
+
+
+def _best_of(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the markdown post-processor")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="Size of the timed input")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = check_correctness()
+    if failures:
+        print(f"❌ {len(failures)} output mismatches, first: {failures[0]}")
+        return 1
+    print("✅ Output identical on golden corpus, chunked feeds and fuzz cases")
+
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        corpus = "\n".join(case["input"] for case in json.load(f))
+    text = corpus * max(int(args.size_mb * 1024 * 1024 / max(len(corpus), 1)), 1)
+
+    reference = _best_of(reference_improve_markdown_formatting, text, args.repeat)
+    current = _best_of(improve_markdown_formatting, text, args.repeat)
+    size_mb = len(text) / (1024 * 1024)
+    print(f"Input: {size_mb:.1f} MB")
+    print(f"reference (multi-pass): {reference * 1000:8.1f} ms  {size_mb / reference:6.1f} MB/s")
+    print(f"single-pass:            {current * 1000:8.1f} ms  {size_mb / current:6.1f} MB/s")
+    print(f"Speedup: {reference / current:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
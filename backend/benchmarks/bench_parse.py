@@ -0,0 +1,206 @@
+"""
+Parse throughput benchmark.
+
+Runs each parse mode over synthetic PDFs against a local fake OCR server and
+reports pages/sec, p50/p95 per-document latency and peak RSS. Every mode runs
+in a fresh child process so peak RSS is per mode.
+
+Usage (from backend/):
+    python -m benchmarks.bench_parse
+    python -m benchmarks.bench_parse --modes pymupdf,hybrid --docs 10 --pages 16 --latency 0.2
+    python -m benchmarks.bench_parse --json bench.json
+    python -m benchmarks.bench_parse --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.fake_ocr_server import FakeOCRServer
+
+ALL_MODES = ["pymupdf", "hybrid", "ocr", "format"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_mode(mode: str, docs: int, pages: int, ocr_url: str, format_scale: int) -> Dict:
+    """Benchmark one mode. Runs inside a child process."""
+    from benchmarks.synthetic_pdf import make_paper_pdf
+    from services import pdf_parser
+
+    pdfs = [make_paper_pdf(pages, seed=i) for i in range(docs)]
+
+    if mode == "format":
+        import fitz
+        inputs = []
+        for pdf in pdfs:
+            doc = fitz.open(stream=pdf, filetype="pdf")
+            raw = "\n".join(pdf_parser._page_text_layer(page) for page in doc)
+            doc.close()
+            inputs.append("\n\n".join([raw] * format_scale))
+
+    latencies = []
+    output_chars = 0
+    start = time.perf_counter()
+    for index, pdf in enumerate(pdfs):
+        doc_start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if mode == "pymupdf":
+                markdown = pdf_parser.parse_pdf_to_markdown(pdf)
+            elif mode == "hybrid":
+                markdown = pdf_parser.pdf_bytes_to_markdown_hybrid(pdf, ocr_url)
+            elif mode == "ocr":
+                markdown = pdf_parser.pdf_bytes_to_markdown_ocr(pdf, ocr_url)
+            elif mode == "format":
+                markdown = pdf_parser.improve_markdown_formatting(inputs[index])
+            else:
+                raise ValueError(f"Unknown mode: {mode}")
+        latencies.append(time.perf_counter() - doc_start)
+        output_chars += len(markdown)
+    elapsed = time.perf_counter() - start
+
+    total_pages = docs * pages * (format_scale if mode == "format" else 1)
+    return {
+        "mode": mode,
+        "docs": docs,
+        "pages": total_pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(total_pages / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "peak_rss_mb": peak_rss_mb(),
+        "output_chars": output_chars,
+    }
+
+
+def run_benchmarks(
+    modes: List[str],
+    docs: int = 5,
+    pages: int = 12,
+    latency: float = 0.05,
+    jitter: float = 0.0,
+    format_scale: int = 20,
+    isolate: bool = True
+) -> List[Dict]:
+    """
+    Run the selected modes and return one result dict per mode.
+
+    Args:
+        modes: Modes to run (pymupdf, hybrid, ocr, format)
+        docs: Documents per mode
+        pages: Pages per document
+        latency: Fake OCR latency per page in seconds
+        jitter: Extra random OCR latency in seconds
+        format_scale: How many times the text is repeated for the formatter-only mode
+        isolate: Run each mode in a fresh process (needed for per-mode peak RSS)
+    """
+    results = []
+    with FakeOCRServer(latency=latency, jitter=jitter) as fake:
+        ctx = multiprocessing.get_context("spawn")
+        for mode in modes:
+            requests_before = fake.requests
+            bytes_before = fake.bytes_received
+            args = (mode, docs, pages, fake.url, format_scale)
+            if isolate:
+                with ctx.Pool(1) as pool:
+                    result = pool.apply(_run_mode, args)
+            else:
+                result = _run_mode(*args)
+            result["ocr_requests"] = fake.requests - requests_before
+            result["ocr_request_kb"] = round((fake.bytes_received - bytes_before) / 1024, 1)
+            results.append(result)
+    return results
+
+
+def compare_to_baseline(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Return regression messages for modes slower than the baseline by more than tolerance."""
+    previous = {r["mode"]: r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["mode"])
+        if not before:
+            continue
+        if result["pages_per_sec"] < before["pages_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{result['mode']}: pages/sec {before['pages_per_sec']} -> {result['pages_per_sec']}"
+            )
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result['mode']}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms"
+            )
+    return regressions
+
+
+def print_table(results: List[Dict]):
+    columns = ["mode", "pages", "pages_per_sec", "p50_ms", "p95_ms", "peak_rss_mb", "ocr_requests", "ocr_request_kb"]
+    widths = {c: max(len(c), *(len(str(r.get(c))) for r in results)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for result in results:
+        print("  ".join(str(result.get(c)).ljust(widths[c]) for c in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PDF parse throughput")
+    parser.add_argument("--modes", default=",".join(ALL_MODES), help="Comma-separated modes")
+    parser.add_argument("--docs", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake OCR latency per page (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--format-scale", type=int, default=20)
+    parser.add_argument("--no-isolate", action="store_true", help="Run modes in this process")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(modes) - set(ALL_MODES)
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+    results = run_benchmarks(
+        modes, args.docs, args.pages, args.latency, args.jitter,
+        args.format_scale, isolate=not args.no_isolate
+    )
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Regressions:")
+            for message in regressions:
+                print(f"   {message}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
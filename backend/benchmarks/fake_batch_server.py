@@ -0,0 +1,244 @@
+"""
+Local stand-in for the OpenAI Files and Batch APIs.
+
+Implements what services/batch_analysis.py uses: file upload and download,
+batch create and retrieve. A batch stays "in_progress" for a configurable
+time, then completes with one schema-valid structured output per request,
+generated from the request's JSON schema.
+"""
+import json
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+
+def example_from_schema(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> Any:
+    """Build a minimal instance that validates against a (strict) JSON schema."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return example_from_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return example_from_schema(options[0], defs) if options else None
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next(k for k in kind if k != "null")
+    if kind == "object":
+        return {name: example_from_schema(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [example_from_schema(schema.get("items", {}), defs)]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    return "example"
+
+
+def default_responder(custom_id: str, body: Dict[str, Any]) -> str:
+    """Structured output text for one request, derived from its text.format schema."""
+    schema = body.get("text", {}).get("format", {}).get("schema", {})
+    return json.dumps(example_from_schema(schema))
+
+
+class FakeBatchServer:
+    """
+    Threaded fake Files + Batch API server.
+
+    Args:
+        completion_delay: Seconds a batch stays in progress before completing
+        responder: Callable (custom_id, request body) -> output text
+        port: Port to bind, 0 picks a free one
+    """
+
+    def __init__(
+        self,
+        completion_delay: float = 0.0,
+        responder: Callable[[str, Dict[str, Any]], str] = default_responder,
+        port: int = 0
+    ):
+        self.completion_delay = completion_delay
+        self.responder = responder
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload: Dict[str, Any], status: int = 200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                    batch = server._refresh(parts[2])
+                    if batch is None:
+                        return self._send_json({"error": {"message": "batch not found"}}, 404)
+                    return self._send_json(batch)
+                if parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content":
+                    stored = server.files.get(parts[2])
+                    if stored is None:
+                        return self._send_json({"error": {"message": "file not found"}}, 404)
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(stored["content"])))
+                    self.end_headers()
+                    self.wfile.write(stored["content"])
+                    return
+                self._send_json({"error": {"message": "not found"}}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                path = self.path.split("?")[0].rstrip("/")
+                if path == "/v1/files":
+                    return self._send_json(server._store_upload(self.headers.get("Content-Type", ""), raw))
+                if path == "/v1/batches":
+                    return self._send_json(server._create_batch(json.loads(raw)))
+                self._send_json({"error": {"message": "not found"}}, 404)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}/v1"
+
+    def _file_object(self, file_id: str, filename: str, purpose: str, size: int) -> Dict[str, Any]:
+        return {
+            "id": file_id, "object": "file", "bytes": size, "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed",
+        }
+
+    def _store_upload(self, content_type: str, raw: bytes) -> Dict[str, Any]:
+        message = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + raw
+        )
+        fields, content, filename = {}, b"", "upload.jsonl"
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if part.get_filename():
+                filename = part.get_filename()
+                content = part.get_payload(decode=True)
+            else:
+                fields[name] = part.get_content().strip()
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self.files[file_id] = {
+                "content": content,
+                "object": self._file_object(file_id, filename, fields.get("purpose", "batch"), len(content)),
+            }
+        return self.files[file_id]["object"]
+
+    def _create_batch(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        lines = [line for line in self.files[params["input_file_id"]]["content"].decode().splitlines() if line.strip()]
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": params["endpoint"],
+            "input_file_id": params["input_file_id"], "completion_window": params["completion_window"],
+            "status": "in_progress", "created_at": int(time.time()), "metadata": params.get("metadata"),
+            "output_file_id": None, "error_file_id": None,
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+        }
+        with self._lock:
+            self.batches[batch_id] = {"batch": batch, "ready_at": time.time() + self.completion_delay}
+        return batch
+
+    def _refresh(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Complete the batch once its delay has passed, writing the output file."""
+        with self._lock:
+            entry = self.batches.get(batch_id)
+            if entry is None:
+                return None
+            batch = entry["batch"]
+            if batch["status"] != "in_progress" or time.time() < entry["ready_at"]:
+                return batch
+
+            outputs = []
+            for line in self.files[batch["input_file_id"]]["content"].decode().splitlines():
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                body = request["body"]
+                text = self.responder(request["custom_id"], body)
+                outputs.append(json.dumps({
+                    "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "request_id": uuid.uuid4().hex,
+                        "body": {
+                            "id": f"resp_{uuid.uuid4().hex[:12]}",
+                            "object": "response",
+                            "model": body.get("model"),
+                            "status": "completed",
+                            "output": [{
+                                "type": "message", "role": "assistant", "status": "completed",
+                                "content": [{"type": "output_text", "text": text, "annotations": []}],
+                            }],
+                            "usage": {"input_tokens": len(json.dumps(body["input"])) // 4, "output_tokens": len(text) // 4},
+                        },
+                    },
+                    "error": None,
+                }))
+
+            content = ("\n".join(outputs) + "\n").encode()
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            self.files[file_id] = {
+                "content": content,
+                "object": self._file_object(file_id, f"{batch_id}_output.jsonl", "batch_output", len(content)),
+            }
+            batch.update({
+                "status": "completed",
+                "output_file_id": file_id,
+                "completed_at": int(time.time()),
+                "request_counts": {"total": len(outputs), "completed": len(outputs), "failed": 0},
+            })
+            return batch
+
+    def start(self) -> "FakeBatchServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI batch server")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--delay", type=float, default=5.0, help="Seconds before a batch completes")
+    args = parser.parse_args()
+
+    with FakeBatchServer(args.delay, port=args.port) as fake:
+        print(f"Fake batch server listening on {fake.base_url} (set OPENAI_BASE_URL to this)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
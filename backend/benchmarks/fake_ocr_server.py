@@ -0,0 +1,103 @@
+"""
+Local stand-in for the vLLM OCR server.
+
+Speaks just enough of the OpenAI chat completions API for pdf_parser:
+GET /health and POST /v1/chat/completions, answering every page with canned
+markdown after a configurable latency.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_PAGE = (
+    "### Section\n\n"
+    "Transcribed paragraph text from the page image.\n\n"
+    "$$ \\mathcal{L} = -\\sum_i \\log p(y_i \\mid x_i) $$\n\n"
+    "| Method | Score |\n| --- | --- |\n| Ours | 88.5 |\n"
+)
+
+
+class FakeOCRServer:
+    """
+    Threaded fake OCR server.
+
+    Args:
+        latency: Seconds to sleep per completion request
+        jitter: Extra uniformly random latency in seconds
+        port: Port to bind, 0 picks a free one
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                with server._lock:
+                    server.requests += 1
+                    server.bytes_received += length
+                time.sleep(server.latency + random.uniform(0, server.jitter))
+                body = json.dumps({
+                    "choices": [{"message": {"role": "assistant", "content": CANNED_PAGE}}]
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}/v1/chat/completions"
+
+    def start(self) -> "FakeOCRServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake OCR server")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with FakeOCRServer(args.latency, args.jitter, args.port) as fake:
+        print(f"Fake OCR server listening on {fake.url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
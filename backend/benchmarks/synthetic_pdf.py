@@ -0,0 +1,110 @@
+"""
+Synthetic research-paper PDFs for parser benchmarks.
+
+Generates deterministic multi-page documents mixing body text, section
+headings, booktabs-style tables, equation-dense pages and figures, so the
+PyMuPDF, hybrid and OCR parse paths all get exercised without network access.
+"""
+import random
+import fitz  # PyMuPDF
+
+WORDS = (
+    "model attention training data transformer layer token loss gradient sample "
+    "benchmark accuracy baseline method network feature representation encoder "
+    "decoder inference latency memory dataset evaluation robust scale learning"
+).split()
+
+SECTION_TITLES = [
+    "Introduction", "Related Work", "Method", "Experiments", "Ablation Studies",
+    "Discussion", "Conclusion",
+]
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int = 6) -> str:
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def _text_page(page, rng: random.Random, section_index: int):
+    y = 72
+    title = SECTION_TITLES[section_index % len(SECTION_TITLES)]
+    page.insert_text((72, y), f"{section_index + 1} {title}", fontsize=13)
+    y += 24
+    for _ in range(5):
+        rect = fitz.Rect(72, y, page.rect.width - 72, y + 120)
+        page.insert_textbox(rect, _paragraph(rng), fontsize=10)
+        y += 128
+
+
+def _table_page(page, rng: random.Random, table_index: int):
+    page.insert_textbox(fitz.Rect(72, 72, page.rect.width - 72, 200), _paragraph(rng), fontsize=10)
+    top = 230
+    page.insert_text((72, top - 12), f"Table {table_index}: Results on standard benchmarks.", fontsize=9)
+    header = ["Method", "ImageNet", "COCO", "GSM8K"]
+    rows = [header] + [
+        [f"Method-{i}", f"{rng.uniform(60, 90):.1f}", f"{rng.uniform(30, 60):.1f}", f"{rng.uniform(20, 95):.1f}"]
+        for i in range(8)
+    ]
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            page.insert_text((80 + c * 110, top + 16 + r * 18), cell, fontsize=9)
+    bottom = top + 16 + len(rows) * 18
+    for y in (top, top + 20, bottom):
+        page.draw_line((72, y), (page.rect.width - 72, y))
+    page.insert_textbox(fitz.Rect(72, bottom + 20, page.rect.width - 72, bottom + 160), _paragraph(rng), fontsize=10)
+
+
+def _equation_page(page, rng: random.Random):
+    y = 72
+    for _ in range(10):
+        page.insert_textbox(fitz.Rect(72, y, page.rect.width - 72, y + 40), _sentence(rng, 20), fontsize=10)
+        y += 40
+        # Equations set in a symbol font with small sub/superscripts
+        page.insert_text((120, y), "a b S ( q ) = l å s + e", fontname="Symbol", fontsize=11)
+        page.insert_text((230, y + 4), "i j k", fontname="Symbol", fontsize=6)
+        y += 26
+
+
+def _figure_page(page, rng: random.Random):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 320, 200), False)
+    pix.set_rect(pix.irect, (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+    page.insert_image(fitz.Rect(72, 72, page.rect.width - 72, 480), pixmap=pix)
+    page.insert_text((72, 500), "Figure 1: Overview of the proposed architecture.", fontsize=9)
+    page.insert_textbox(fitz.Rect(72, 520, page.rect.width - 72, 720), _paragraph(rng, 8), fontsize=10)
+
+
+def make_paper_pdf(pages: int = 12, seed: int = 0) -> bytes:
+    """
+    Build a synthetic paper PDF.
+
+    Args:
+        pages: Number of pages
+        seed: Random seed, the same seed always yields the same document
+
+    Returns:
+        PDF file as bytes
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    section_index = 0
+    table_index = 1
+    for index in range(pages):
+        page = doc.new_page(width=612, height=792)
+        kind = index % 6
+        if kind == 2:
+            _table_page(page, rng, table_index)
+            table_index += 1
+        elif kind == 4:
+            _equation_page(page, rng)
+        elif kind == 5:
+            _figure_page(page, rng)
+        else:
+            _text_page(page, rng, section_index)
+            section_index += 1
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
@@ -0,0 +1,28 @@
+"""
+Shared pytest fixtures for the backend checks.
+"""
+import pytest
+
+from services import cache_service, batch_analysis, usage_ledger, model_router, job_store
+
+
+@pytest.fixture
+def temp_cache(tmp_path, monkeypatch):
+    """
+    Point every file the services write under data/ at a temporary directory
+    for one test; monkeypatch restores the real paths afterwards.
+
+    Returns:
+        The temporary cache directory
+    """
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(cache_service, "CACHE_DIR", cache_dir)
+    monkeypatch.setattr(cache_service, "PAPERS_FILE", tmp_path / "papers.json")
+    monkeypatch.setattr(cache_service, "APPLICATIONS_FILE", cache_dir / "applications.json")
+    monkeypatch.setattr(cache_service, "RELEVANCE_FILE", cache_dir / "relevance.jsonl")
+    monkeypatch.setattr(batch_analysis, "BATCHES_FILE", cache_dir / "batches.json")
+    monkeypatch.setattr(batch_analysis, "BATCH_FILES_DIR", cache_dir / "batches")
+    monkeypatch.setattr(usage_ledger, "USAGE_FILE", cache_dir / "usage.jsonl")
+    monkeypatch.setattr(model_router, "ROUTING_LOG_FILE", cache_dir / "routing.jsonl")
+    monkeypatch.setattr(job_store, "JOBS_DB", cache_dir / "jobs.sqlite3")
+    return cache_dir
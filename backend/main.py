@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import papers
+from services.jobs import job_queue
 import os
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
@@ -50,8 +51,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  Phoenix initialization failed: {e}")
         print("   Continuing without observability...\n")
-    
+
+    await job_queue.start()
+
     yield  # Application runs here
+
+    await job_queue.stop()
     
     # Shutdown: Clean up Phoenix (optional, commented out to avoid Windows issues)
     # if phoenix_session:
@@ -1,13 +1,22 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional, Callable
+import asyncio
+import json
+import os
+import time
 from services.huggingface import fetch_papers, add_paper, add_paper_from_semantic_scholar
-from services.pdf_parser import download_and_parse_paper
-from services.openai_service import summarize_paper, is_paper_relevant, extract_paper_sections
-from services.semantic_scholar import get_paper_metadata
+from services.openai_service import (
+    summarize_paper, classify_papers_relevance,
+    RELEVANCE_PROMPT_VERSION
+)
 from services import cache_service
+from services.relevance_prefilter import prefilter_candidates, measure_prefilter_recall
+from services import batch_analysis, usage_ledger, model_router, paper_stages, bulk_import, scheduler
+from services.jobs import job_queue
 from services.some_extensions.research_tools import arxiv_search_tool
-from services.models import ApplicationIdea, PaperSections
+from services.models import ApplicationIdea
 
 router = APIRouter()
 
@@ -36,6 +45,9 @@ class ParseResponse(BaseModel):
     size_bytes: Optional[int]
     error: Optional[str]
     from_cache: Optional[bool] = False
+    method: Optional[str] = None
+    ocr_pages: Optional[List[int]] = None
+    ocr_stats: Optional[Dict] = None
 
 class AnalyzeResponse(BaseModel):
     success: bool
@@ -66,10 +78,28 @@ class AddApplicationRequest(BaseModel):
     current_paper: SimplePaperInfo
     related_papers: List[SimplePaperInfo]
 
+class SubmitBatchRequest(BaseModel):
+    arxiv_ids: Optional[List[str]] = None  # Defaults to the whole library
+
+class BulkImportRequest(BaseModel):
+    text: str  # BibTeX, or one arXiv URL/ID, DOI or Semantic Scholar URL/ID per line
+    enqueue_until: Optional[str] = None  # Queue new papers as background jobs up to this stage
+    mode: str = Field("hybrid", pattern="^(hybrid|ocr|pymupdf)$")
+
+class SubmitJobRequest(BaseModel):
+    arxiv_id: str
+    until: str = "analysis"  # Target stage: metadata, download, parse, sections or analysis
+    mode: str = Field("hybrid", pattern="^(hybrid|ocr|pymupdf)$")
+    force_reload: bool = False
+    arxiv_url: Optional[str] = None
+    with_metadata: bool = True  # Also fetch Semantic Scholar metadata
+    priority: str = Field("prefetch", pattern="^(interactive|prefetch|batch)$")
+
 class AddApplicationResponse(BaseModel):
     success: bool
     message: Optional[str] = None
     error: Optional[str] = None
+    timings: Optional[Dict] = None
 
 @router.get("/papers", response_model=List[PaperResponse])
 async def get_papers():
@@ -102,6 +132,21 @@ async def add_new_paper(request: AddPaperRequest):
             "error": str(e)
         }
 
+@router.post("/papers/import")
+async def import_reading_list(request: BulkImportRequest):
+    """
+    Import a reading list (BibTeX or one reference per line) into the library.
+    Metadata is fetched with Semantic Scholar batch lookups and all new papers
+    are saved in one write; with enqueue_until they are also queued as jobs.
+    """
+    try:
+        return await bulk_import.import_papers(request.text, request.enqueue_until, request.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"❌ Bulk import failed: {e}")
+        return {"success": False, "added": [], "error": str(e)}
+
 @router.post("/papers/add-related", response_model=AddPaperResponse)
 async def add_related_paper(request: AddRelatedPaperRequest):
     """
@@ -126,11 +171,82 @@ async def add_related_paper(request: AddRelatedPaperRequest):
             "error": str(e)
         }
 
+async def _parse_and_cache(
+    paper_id: str,
+    arxiv_url: Optional[str],
+    mode: str,
+    progress_callback: Optional[Callable[[Dict], None]] = None,
+    force_reload: bool = False
+) -> Dict:
+    """
+    Download and parse a paper, cache the markdown and extract sections.
+    Reports "downloaded", "page", "parsed" and "sections_ready" events through
+    progress_callback. Each stage is shared with concurrent requests and jobs
+    for the same paper.
+    """
+    notify = progress_callback or (lambda event: None)
+    
+    download = await paper_stages.download_stage(paper_id, arxiv_url, force=force_reload)
+    notify({"event": "downloaded", "size_bytes": download["size_bytes"]})
+    
+    # The caller already found no usable markdown, so always parse
+    result = await paper_stages.parse_stage(paper_id, mode, progress_callback, force=True)
+    
+    if result.get("success") and result.get("markdown"):
+        markdown_text = result["markdown"]
+        notify({
+            "event": "parsed",
+            "markdown": markdown_text,
+            "size_bytes": result.get("size_bytes"),
+            "method": result.get("method"),
+            "ocr_stats": result.get("ocr_stats"),
+        })
+        
+        # Extract structured sections from the markdown
+        try:
+            sections_dict = await paper_stages.sections_stage(paper_id, markdown_text, force=True)
+            notify({"event": "sections_ready", "sections": sections_dict})
+            
+        except Exception as section_error:
+            print(f"⚠️ Failed to extract sections for {paper_id}: {section_error}")
+            # Continue even if section extraction fails
+    
+    return {**result, "from_cache": False}
+
+DISCONNECT_POLL_SECONDS = 1.0
+
+async def _cancel_on_disconnect(request: Request, coro):
+    """
+    Await coro, cancelling it if the HTTP client disconnects first.
+    Keeps abandoned LLM calls from holding connections and quota.
+    """
+    task = asyncio.create_task(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print(f"🔌 Client disconnected, cancelling {request.url.path}")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+def _sse_event(event: str, data: Dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SSE_KEEPALIVE_SECONDS = 15
+
 @router.get("/papers/{paper_id}/parse", response_model=ParseResponse)
 async def parse_paper(
     paper_id: str, 
     arxiv_url: Optional[str] = None,
-    force_reload: bool = Query(False, description="Force reload even if cached")
+    force_reload: bool = Query(False, description="Force reload even if cached"),
+    mode: str = Query("hybrid", pattern="^(hybrid|ocr|pymupdf)$", description="Parser mode: hybrid, ocr or pymupdf")
 ):
     """
     Download and parse a paper's PDF to markdown.
@@ -140,6 +256,7 @@ async def parse_paper(
         paper_id: The paper ID (ArXiv ID)
         arxiv_url: Optional ArXiv URL. If not provided, will construct from paper_id
         force_reload: If True, bypass cache and re-download
+        mode: Parser mode ("hybrid" routes only hard pages to OCR)
     """
     try:
         # Check cache first unless force reload
@@ -155,34 +272,7 @@ async def parse_paper(
                     "from_cache": True
                 }
         
-        # If no arxiv_url provided, construct from paper_id
-        if not arxiv_url:
-            arxiv_url = f"https://arxiv.org/abs/{paper_id}"
-        
-        result = await download_and_parse_paper(arxiv_url)
-        
-        # Cache the result if successful
-        if result.get("success") and result.get("markdown"):
-            markdown_text = result["markdown"]
-            cache_service.save_markdown(paper_id, markdown_text)
-            print(f"Saved markdown to cache for {paper_id}")
-            
-            # Extract structured sections from the markdown
-            try:
-                print(f"🧹 Extracting paper sections for {paper_id}...")
-                sections: PaperSections = await extract_paper_sections(markdown_text)
-                
-                # Save sections to cache
-                sections_dict = sections.model_dump()
-                cache_service.save_sections(paper_id, sections_dict)
-                print(f"✅ Saved paper sections to cache for {paper_id}")
-                
-            except Exception as section_error:
-                print(f"⚠️ Failed to extract sections for {paper_id}: {section_error}")
-                # Continue even if section extraction fails
-        
-        result["from_cache"] = False
-        return result
+        return await _parse_and_cache(paper_id, arxiv_url, mode, force_reload=force_reload)
     
     except Exception as e:
         return {
@@ -193,8 +283,74 @@ async def parse_paper(
             "from_cache": False
         }
 
+@router.get("/papers/{paper_id}/parse/stream")
+async def parse_paper_stream(
+    paper_id: str,
+    arxiv_url: Optional[str] = None,
+    force_reload: bool = Query(False, description="Force reload even if cached"),
+    mode: str = Query("hybrid", pattern="^(hybrid|ocr|pymupdf)$", description="Parser mode: hybrid, ocr or pymupdf")
+):
+    """
+    Streaming variant of the parse endpoint using server-sent events.
+    
+    Events: "cached", "downloaded", "page" (page N/M with its markdown),
+    "restart" (OCR failed, pages are re-sent from the text layer), "parsed"
+    (full markdown), "sections_ready", "error" and finally "done".
+    If the client disconnects, parsing still finishes and is cached.
+    
+    Args:
+        paper_id: The paper ID (ArXiv ID)
+        arxiv_url: Optional ArXiv URL. If not provided, will construct from paper_id
+        force_reload: If True, bypass cache and re-download
+        mode: Parser mode ("hybrid" routes only hard pages to OCR)
+    """
+    async def event_stream():
+        if not force_reload:
+            cached_markdown = cache_service.load_markdown(paper_id)
+            if cached_markdown:
+                yield _sse_event("cached", {
+                    "markdown": cached_markdown,
+                    "size_bytes": len(cached_markdown.encode('utf-8')),
+                })
+                yield _sse_event("done", {"success": True, "from_cache": True})
+                return
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def run() -> Dict:
+            try:
+                # Progress events are delivered on the event loop (see SingleFlight.emitter)
+                return await _parse_and_cache(paper_id, arxiv_url, mode, queue.put_nowait, force_reload)
+            finally:
+                queue.put_nowait(None)
+        
+        # Not tied to this generator: a disconnect doesn't waste the work
+        task = asyncio.create_task(run())
+        
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                break
+            name = event.pop("event")
+            yield _sse_event(name, event)
+        
+        try:
+            result = await task
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        
+        if not result.get("success"):
+            yield _sse_event("error", {"error": result.get("error")})
+        yield _sse_event("done", {"success": bool(result.get("success")), "from_cache": False})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.post("/papers/analyze", response_model=AnalyzeResponse)
-async def analyze_paper(request: AnalyzeRequest):
+async def analyze_paper(request: AnalyzeRequest, http_request: Request):
     """
     Analyze a paper's markdown content using OpenAI.
     This endpoint doesn't use cache - use the GET endpoint for cached analysis.
@@ -202,13 +358,21 @@ async def analyze_paper(request: AnalyzeRequest):
     Args:
         request: AnalyzeRequest with markdown field
     """
+    if not request.markdown:
+        return {
+            "success": False,
+            "data": None,
+            "usage": None,
+            "error": "Markdown content is required"
+        }
+    
     try:
-        if not request.markdown:
-            raise HTTPException(status_code=400, detail="Markdown content is required")
-        
-        result = await summarize_paper(request.markdown)
+        result = await _cancel_on_disconnect(http_request, summarize_paper(request.markdown))
         return result
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
         return {
             "success": False,
@@ -220,6 +384,7 @@ async def analyze_paper(request: AnalyzeRequest):
 @router.get("/papers/{arxiv_id}/analyze", response_model=AnalyzeResponse)
 async def get_cached_analysis(
     arxiv_id: str,
+    http_request: Request,
     force_reload: bool = Query(False, description="Force regenerate even if cached")
 ):
     """
@@ -239,41 +404,12 @@ async def get_cached_analysis(
                 cached_analysis["from_cache"] = True
                 return cached_analysis
         
-        # Try to load structured sections first (preferred)
-        sections_dict = cache_service.load_sections(arxiv_id)
-        
-        if sections_dict:
-            # Use cleaned sections for analysis
-            print(f"📚 Using structured sections for analysis of {arxiv_id}")
-            sections = PaperSections(**sections_dict)
-            clean_markdown = sections.to_clean_markdown()
-            print(f"✅ Generated clean markdown ({len(clean_markdown)} chars)")
-        else:
-            # Fall back to raw markdown if sections not available
-            print(f"⚠️ Sections not found, falling back to raw markdown for {arxiv_id}")
-            clean_markdown = cache_service.load_markdown(arxiv_id)
-            
-            if not clean_markdown:
-                return {
-                    "success": False,
-                    "data": None,
-                    "usage": None,
-                    "error": "Paper must be parsed first before analysis. Please load the paper content first.",
-                    "from_cache": False
-                }
-        
         # Generate new analysis using cleaned content
-        print(f"🤖 Analyzing paper {arxiv_id}...")
-        result = await summarize_paper(clean_markdown)
-        
-        # Cache the result if successful
-        if result.get("success") and result.get("data"):
-            cache_service.save_analysis(arxiv_id, result)
-            print(f"✅ Saved analysis to cache for {arxiv_id}")
-        
-        result["from_cache"] = False
-        return result
+        result = await _cancel_on_disconnect(http_request, paper_stages.analysis_stage(arxiv_id, force=True))
+        return {**result, "from_cache": False}
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Analysis error for {arxiv_id}: {e}")
         return {
@@ -284,6 +420,69 @@ async def get_cached_analysis(
             "from_cache": False
         }
 
+@router.get("/papers/{arxiv_id}/analyze/stream")
+async def stream_analysis(
+    arxiv_id: str,
+    force_reload: bool = Query(False, description="Force regenerate even if cached")
+):
+    """
+    Streaming variant of the analyze endpoint using server-sent events.
+    
+    Events: "cached" (full cached analysis), "field" (a validated top-level
+    field such as novelty or summary), "benchmark" (one validated benchmark),
+    "partial" (preview of the field being generated), "escalated" (the
+    streamed output failed quality checks; fields are resent from a larger
+    model), "error" and finally "done" with the complete analysis. The
+    result is cached when it completes.
+    
+    Args:
+        arxiv_id: The ArXiv ID
+        force_reload: If True, bypass cache and regenerate
+    """
+    async def event_stream():
+        if not force_reload:
+            cached_analysis = cache_service.load_analysis(arxiv_id)
+            if cached_analysis:
+                yield _sse_event("cached", cached_analysis)
+                yield _sse_event("done", {"success": True, "from_cache": True})
+                return
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def run() -> Dict:
+            try:
+                return await paper_stages.analysis_stage(arxiv_id, queue.put_nowait, force=True)
+            finally:
+                queue.put_nowait(None)
+        
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                name = event.pop("event")
+                yield _sse_event(name, event)
+            
+            try:
+                result = await task
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+        finally:
+            # Client went away: drop our interest (the analysis stops if nobody else waits)
+            if not task.done():
+                task.cancel()
+        
+        if not (result.get("success") and result.get("data")):
+            yield _sse_event("error", {"error": result.get("error")})
+        yield _sse_event("done", {**result, "from_cache": False})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.get("/papers/{arxiv_id}/metadata", response_model=MetadataResponse)
 async def get_paper_metadata_endpoint(
     arxiv_id: str,
@@ -309,13 +508,9 @@ async def get_paper_metadata_endpoint(
                     "from_cache": True
                 }
         
-        result = await get_paper_metadata(arxiv_id)
+        result = await paper_stages.metadata_stage(arxiv_id, force=True)
         
-        # Cache the result if successful
         if result.get("success"):
-            cache_service.save_metadata(arxiv_id, result)
-            print(f"Saved metadata to cache for {arxiv_id}")
-            
             return {
                 "success": True,
                 "metadata": result,
@@ -389,23 +584,44 @@ def extract_arxiv_id_from_url(url: str) -> Optional[str]:
     except:
         return None
 
+async def _load_or_fetch_metadata(arxiv_id: str) -> Optional[Dict]:
+    """Return cached Semantic Scholar metadata, fetching it if missing."""
+    metadata = cache_service.load_metadata(arxiv_id)
+    if metadata:
+        return metadata
+    metadata_response = await paper_stages.metadata_stage(arxiv_id, force=True)
+    if not metadata_response.get("success"):
+        print(f"❌ Failed to fetch metadata for {arxiv_id}")
+        return None
+    return metadata_response
+
 async def filter_papers_by_relevance(
     application: Dict,
     related_papers: List[Dict],
-    model_id: str = "gpt-5-mini"
+    model_id: Optional[str] = None,
+    timings: Optional[Dict] = None
 ) -> List[Dict]:
     """
     Filter papers by relevance using arXiv search and OpenAI relevance check.
     
+    Metadata for all candidates is fetched concurrently (bounded by
+    paper_stages.METADATA_CONCURRENCY), a local BM25 pre-filter drops obvious mismatches,
+    and the remaining candidates are classified with batched relevance calls. Output keeps candidate order (arXiv search results
+    first, then related papers).
+    
     Args:
         application: Application idea with domain and specific_utility
         related_papers: Initial list of related papers
-        model_id: OpenAI model ID to use
+        model_id: OpenAI model ID to use (None = the relevance model cascade)
+        timings: Optional dict filled with per-stage wall-clock seconds
         
     Returns:
         List of filtered papers that passed the relevance check
     """
-    # Create ApplicationIdea object for is_paper_relevant
+    timings = timings if timings is not None else {}
+    started = time.perf_counter()
+    
+    # Create ApplicationIdea object for the relevance check
     app_idea = ApplicationIdea(
         domain=application.get("domain", ""),
         specific_utility=application.get("specific_utility", "")
@@ -413,10 +629,11 @@ async def filter_papers_by_relevance(
     
     # Search arXiv for additional papers
     print(f"🔍 Searching arXiv for: {app_idea.domain}")
-    search_results = arxiv_search_tool(app_idea.domain, max_results=10)
+    search_results = await asyncio.to_thread(arxiv_search_tool, app_idea.domain, 10)
+    timings["search_seconds"] = round(time.perf_counter() - started, 3)
     
-    # Collect all unique arXiv IDs
-    arxiv_ids = set()
+    # Collect all unique arXiv IDs, keeping first-seen order
+    arxiv_ids: Dict[str, None] = {}
     
     # Extract from arXiv search results
     for sr in search_results:
@@ -424,68 +641,90 @@ async def filter_papers_by_relevance(
             continue
         arxiv_id = extract_arxiv_id_from_url(sr['url'])
         if arxiv_id:
-            arxiv_ids.add(arxiv_id)
+            arxiv_ids.setdefault(arxiv_id)
     
     # Extract from related papers
     for paper in related_papers:
         arxiv_id = paper.get("arxiv_id")
         if arxiv_id:
-            arxiv_ids.add(arxiv_id)
+            arxiv_ids.setdefault(arxiv_id)
     
     print(f"📊 Found {len(arxiv_ids)} unique papers to check")
     
-    # Filter papers by relevance
-    filtered_papers = []
-    
-    for arxiv_id in arxiv_ids:
+    async def fetch_candidate(arxiv_id: str) -> Optional[Dict]:
         try:
-            # Get or fetch metadata
-            metadata = cache_service.load_metadata(arxiv_id)
-            if not metadata:
-                print(f"📥 Fetching metadata for {arxiv_id}")
-                metadata_response = await get_paper_metadata(arxiv_id)
-                if metadata_response.get("success"):
-                    cache_service.save_metadata(arxiv_id, metadata_response)
-                    metadata = metadata_response
-                else:
-                    print(f"❌ Failed to fetch metadata for {arxiv_id}")
-                    continue
-            
-            # Check relevance
-            title = metadata.get("title", "")
-            abstract = metadata.get("abstract", "")
-            
-            if not title or not abstract:
-                print(f"⚠️ Missing title or abstract for {arxiv_id}")
-                continue
-            
-            print(f"🤖 Checking relevance: {title[:60]}...")
-            relevance = await is_paper_relevant(app_idea, title, abstract, model_id)
-            
-            if relevance.get("decision"):
-                # Get authors from metadata
-                authors = []
-                if "authors" in metadata and metadata["authors"]:
-                    authors = [author.get("name", "Unknown") for author in metadata["authors"]]
-                
-                filtered_papers.append({
-                    "title": title,
-                    "authors": authors,
-                    "arxiv_id": arxiv_id
-                })
-                print(f"✅ Relevant: {title[:60]}...")
-            else:
-                print(f"❌ Not relevant: {title[:60]}... - {relevance.get('reason', '')}")
-        
+            metadata = await _load_or_fetch_metadata(arxiv_id)
         except Exception as e:
             print(f"❌ Error processing {arxiv_id}: {e}")
+            return None
+        if not metadata:
+            return None
+        if not metadata.get("title") or not metadata.get("abstract"):
+            print(f"⚠️ Missing title or abstract for {arxiv_id}")
+            return None
+        return metadata
+    
+    # Stage 1: metadata; gather preserves candidate order
+    stage_start = time.perf_counter()
+    fetched = await asyncio.gather(*(fetch_candidate(arxiv_id) for arxiv_id in arxiv_ids))
+    papers_metadata = {
+        arxiv_id: metadata
+        for arxiv_id, metadata in zip(arxiv_ids, fetched)
+        if metadata
+    }
+    timings["metadata_seconds"] = round(time.perf_counter() - stage_start, 3)
+    
+    # Stage 2: local lexical pre-filter
+    stage_start = time.perf_counter()
+    # Tokenizing the cached corpus is CPU work; keep it off the event loop
+    kept, dropped = await asyncio.to_thread(
+        prefilter_candidates,
+        app_idea,
+        [
+            {"paper_id": arxiv_id, "title": metadata["title"], "abstract": metadata["abstract"]}
+            for arxiv_id, metadata in papers_metadata.items()
+        ]
+    )
+    timings["prefilter_seconds"] = round(time.perf_counter() - stage_start, 3)
+    timings["prefilter_dropped"] = len(dropped)
+    
+    # Stage 3: batched relevance classification
+    stage_start = time.perf_counter()
+    with usage_ledger.usage_context(application=application):
+        decisions = await classify_papers_relevance(app_idea, kept, model_id)
+    timings["relevance_seconds"] = round(time.perf_counter() - stage_start, 3)
+    
+    filtered_papers = []
+    for arxiv_id, metadata in papers_metadata.items():
+        title = metadata["title"]
+        relevance = decisions.get(arxiv_id)
+        if relevance is None:
+            print(f"⏭️ Pre-filtered out: {title[:60]}...")
+            continue
+        if not relevance.get("decision"):
+            print(f"❌ Not relevant: {title[:60]}... - {relevance.get('reason', '')}")
             continue
+        
+        # Get authors from metadata
+        authors = []
+        if "authors" in metadata and metadata["authors"]:
+            authors = [author.get("name", "Unknown") for author in metadata["authors"]]
+        
+        filtered_papers.append({
+            "title": title,
+            "authors": authors,
+            "arxiv_id": arxiv_id
+        })
+        print(f"✅ Relevant: {title[:60]}...")
+    
+    timings["total_seconds"] = round(time.perf_counter() - started, 3)
+    timings["candidates"] = len(arxiv_ids)
     
-    print(f"✨ Filtered to {len(filtered_papers)} relevant papers")
+    print(f"✨ Filtered to {len(filtered_papers)} relevant papers in {timings['total_seconds']}s")
     return filtered_papers
 
 @router.post("/applications/add", response_model=AddApplicationResponse)
-async def add_application(request: AddApplicationRequest):
+async def add_application(request: AddApplicationRequest, http_request: Request):
     """
     Add an application idea to the applications.json file.
     Filters related papers by relevance using arXiv search and OpenAI.
@@ -499,11 +738,12 @@ async def add_application(request: AddApplicationRequest):
         print(f"{'='*60}")
         
         # Filter papers by relevance
-        filtered_papers = await filter_papers_by_relevance(
+        timings: Dict = {}
+        filtered_papers = await _cancel_on_disconnect(http_request, filter_papers_by_relevance(
             application=request.application,
             related_papers=[p.dict() for p in request.related_papers],
-            model_id="gpt-5-mini"
-        )
+            timings=timings
+        ))
         
         # Save application with filtered papers
         cache_service.save_application(
@@ -519,8 +759,11 @@ async def add_application(request: AddApplicationRequest):
         return {
             "success": True,
             "message": f"Application '{request.application.get('domain', 'Unknown')}' saved with {len(filtered_papers)} relevant papers",
-            "error": None
+            "error": None,
+            "timings": timings
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error adding application: {e}")
         return {
@@ -547,3 +790,153 @@ async def get_applications():
             "applications": [],
             "error": str(e)
         }
+
+@router.get("/relevance-prefilter/recall")
+async def get_prefilter_recall(
+    top_k: Optional[int] = Query(None, description="Candidates kept per application (0 = no cap)"),
+    min_score: Optional[float] = Query(None, description="Relative BM25 threshold between 0 and 1")
+):
+    """
+    Measure pre-filter recall against cached LLM relevance decisions.
+    Defaults to the configured RELEVANCE_PREFILTER_TOP_K / RELEVANCE_PREFILTER_MIN_SCORE.
+    """
+    try:
+        report = await asyncio.to_thread(measure_prefilter_recall, top_k, min_score)
+        return {"success": True, "report": report, "error": None}
+    except Exception as e:
+        return {"success": False, "report": None, "error": str(e)}
+
+@router.delete("/relevance-cache")
+async def clear_relevance_cache(
+    stale_only: bool = Query(True, description="Only drop decisions made with an older prompt version")
+):
+    """
+    Invalidate cached relevance decisions.
+    By default only entries from previous prompt versions are removed.
+    """
+    keep = RELEVANCE_PROMPT_VERSION if stale_only else None
+    removed = await asyncio.to_thread(cache_service.clear_relevance_cache, keep_prompt_version=keep)
+    return {
+        "success": True,
+        "removed": removed,
+        "prompt_version": RELEVANCE_PROMPT_VERSION,
+        "error": None
+    }
+
+@router.get("/usage")
+async def get_usage(
+    group_by: str = Query("day", description="day, model, paper, application or caller"),
+    since: Optional[str] = Query(None, description="ISO date/time, inclusive (e.g. 2026-01-01)"),
+    until: Optional[str] = Query(None, description="ISO date/time, exclusive")
+):
+    """
+    Aggregate the OpenAI usage ledger: calls, tokens, estimated cost and latency per group.
+    """
+    try:
+        report = await asyncio.to_thread(usage_ledger.aggregate_usage, group_by, since, until)
+        return {"success": True, **report, "error": None}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        return {"success": False, "groups": [], "error": str(e)}
+
+@router.get("/routing")
+async def get_routing_stats(
+    since: Optional[str] = Query(None, description="ISO date/time, inclusive")
+):
+    """
+    Model cascade statistics per task: escalation rate, serving models and common quality issues.
+    """
+    try:
+        stats = await asyncio.to_thread(model_router.routing_stats, since)
+        return {"success": True, "tasks": stats, "error": None}
+    except Exception as e:
+        return {"success": False, "tasks": {}, "error": str(e)}
+
+@router.post("/batches")
+async def submit_batch_analysis(request: SubmitBatchRequest):
+    """
+    Queue missing sections/analysis for the library as OpenAI batch jobs.
+    Results arrive asynchronously; call POST /batches/poll to ingest them.
+    """
+    try:
+        result = await batch_analysis.submit_batches(request.arxiv_ids)
+        result["batches"] = [record["id"] for record in result["batches"]]
+        result["error"] = None
+        return result
+    except Exception as e:
+        print(f"❌ Batch submission failed: {e}")
+        return {"success": False, "batches": [], "error": str(e)}
+
+@router.post("/batches/poll")
+async def poll_batch_analysis():
+    """
+    Refresh pending batches and ingest finished results into the cache.
+    """
+    try:
+        await batch_analysis.poll_batches()
+        return {"success": True, "batches": batch_analysis.batch_status(), "error": None}
+    except Exception as e:
+        return {"success": False, "batches": batch_analysis.batch_status(), "error": str(e)}
+
+@router.get("/batches")
+async def get_batch_analysis_status():
+    """
+    List submitted analysis batches and their last known status.
+    """
+    return {"success": True, "batches": batch_analysis.batch_status(), "error": None}
+
+@router.post("/jobs")
+async def submit_job(request: SubmitJobRequest):
+    """
+    Queue a paper for background processing and return its job ID immediately.
+    Poll GET /jobs/{job_id} for the status, current stage and per-stage timings.
+    """
+    try:
+        job = job_queue.submit(
+            request.arxiv_id,
+            until=request.until,
+            mode=request.mode,
+            force=request.force_reload,
+            arxiv_url=request.arxiv_url,
+            with_metadata=request.with_metadata,
+            priority=request.priority
+        )
+        return {"success": True, "job": job, "error": None}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        return {"success": False, "job": None, "error": str(e)}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of a background job: queued, running, completed or failed, with per-stage timings.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"success": True, "job": job, "error": None}
+
+@router.get("/jobs")
+async def list_jobs(
+    status: Optional[str] = Query(None, description="queued, running, completed or failed"),
+    arxiv_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Recent background jobs (newest first) plus workers, running and waiting runs per pipeline stage.
+    """
+    return {
+        "success": True,
+        "jobs": job_queue.list(status, arxiv_id, limit),
+        "stats": job_queue.stats(),
+        "error": None
+    }
+
+@router.get("/scheduler")
+async def get_scheduler_stats():
+    """
+    Slots in use, waiting work and queue latency per priority class for OCR, OpenAI and pipeline stages.
+    """
+    return {"success": True, "limiters": scheduler.stats(), "error": None}
@@ -0,0 +1,71 @@
+"""
+Background appends for the JSONL logs written on every model call
+(data/cache/routing.jsonl, data/cache/usage.jsonl).
+
+append() only queues the line, so callers on the event loop never wait on
+the disk. One daemon thread per log writes whatever has queued up in a
+single open per file, in the order it was appended. Readers call flush()
+first so they see their own writes; pending lines are also flushed at exit.
+"""
+import atexit
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Longest flush() at interpreter exit
+EXIT_FLUSH_SECONDS = 5.0
+
+
+class AppendLog:
+    """
+    Queue of lines to append to files, written by a background thread.
+
+    Args:
+        name: Shown in error messages and the writer thread's name
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._condition = threading.Condition()
+        self._pending: List[Tuple[Path, str]] = []
+        self._queued = 0
+        self._written = 0
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.flush, EXIT_FLUSH_SECONDS)
+
+    def append(self, path: Path, line: str):
+        """Queue one line (without the newline) for path; never blocks on I/O."""
+        with self._condition:
+            self._pending.append((Path(path), line))
+            self._queued += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                batch, self._pending = self._pending, []
+
+            by_file: Dict[Path, List[str]] = {}
+            for path, line in batch:
+                by_file.setdefault(path, []).append(line)
+            for path, lines in by_file.items():
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(path, 'a', encoding='utf-8') as f:
+                        f.write("".join(line + "\n" for line in lines))
+                except Exception as e:
+                    print(f"Error writing {self.name}: {e}")
+
+            with self._condition:
+                self._written += len(batch)
+                self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every line queued so far is written; False on timeout."""
+        with self._condition:
+            target = self._queued
+            return self._condition.wait_for(lambda: self._written >= target, timeout)
@@ -0,0 +1,363 @@
+"""
+Offline batch mode for analyzing the whole library.
+
+Collects papers whose sections or analysis are missing from the cache, writes
+them as JSONL requests for the OpenAI Batch API (/v1/responses endpoint),
+polls for completion and ingests the results into the regular cache files.
+Batches are cheaper than interactive calls but can take up to 24h.
+
+Usage (from backend/):
+    python -m services.batch_analysis submit [--ids 2401.00001 ...]
+    python -m services.batch_analysis poll
+    python -m services.batch_analysis wait --interval 60
+    python -m services.batch_analysis status
+
+Set OPENAI_BASE_URL to point at benchmarks/fake_batch_server.py for local runs.
+"""
+import os
+import io
+import json
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable
+
+from openai import AsyncOpenAI
+from openai.lib._parsing._responses import type_to_text_format_param
+
+from .models import PaperAnalysis, PaperSections, PaperSectionSpans
+from .openai_service import get_openai_client, analysis_input, section_spans_input
+from .section_segmenter import segment_markdown, sections_from_spans, MIN_LOCAL_CONFIDENCE
+from . import cache_service, usage_ledger
+
+BATCH_ANALYSIS_MODEL = os.getenv("BATCH_ANALYSIS_MODEL", "gpt-5.2")
+BATCH_SECTIONS_MODEL = os.getenv("BATCH_SECTIONS_MODEL", "gpt-5-nano")
+# Requests per uploaded JSONL file; larger backlogs are split into several batches
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "500"))
+
+BATCHES_FILE = cache_service.CACHE_DIR / "batches.json"
+BATCH_FILES_DIR = cache_service.CACHE_DIR / "batches"
+
+# Provider statuses after which a batch will not change any more
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _load_batches() -> List[Dict[str, Any]]:
+    if BATCHES_FILE.exists():
+        with open(BATCHES_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return []
+
+
+def _save_batches(batches: List[Dict[str, Any]]):
+    BATCHES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(BATCHES_FILE, 'w', encoding='utf-8') as f:
+        json.dump(batches, f, indent=2, ensure_ascii=False)
+
+
+def _in_flight_jobs() -> set:
+    """custom_ids of requests in batches that have not been ingested yet."""
+    return {
+        custom_id
+        for batch in _load_batches()
+        if not batch.get("ingested")
+        for custom_id in batch.get("requests", {})
+    }
+
+
+def _library_arxiv_ids() -> List[str]:
+    if not cache_service.PAPERS_FILE.exists():
+        return []
+    with open(cache_service.PAPERS_FILE, 'r', encoding='utf-8') as f:
+        papers = json.load(f)
+    return list(dict.fromkeys(p["arxiv_id"] for p in papers if p.get("arxiv_id")))
+
+
+def collect_pending_jobs(arxiv_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Find papers that still need sections or analysis.
+
+    Papers without cached markdown are skipped (parse them first). Sections
+    the local segmenter handles confidently are saved right away without an
+    LLM request. Analysis waits until a paper's sections exist, so a paper
+    needing both is analyzed in a later batch.
+
+    Args:
+        arxiv_ids: Papers to consider (defaults to every paper in papers.json)
+
+    Returns:
+        dict with "jobs" (kind, arxiv_id, custom_id, text) and skip counts
+    """
+    in_flight = _in_flight_jobs()
+    jobs: List[Dict[str, Any]] = []
+    counts = {"unparsed": 0, "in_flight": 0, "sectioned_locally": 0, "deferred_analysis": 0}
+
+    for arxiv_id in (arxiv_ids or _library_arxiv_ids()):
+        status = cache_service.get_cache_status(arxiv_id)
+        if status["sections"] and status["analysis"]:
+            continue
+        markdown = cache_service.load_markdown(arxiv_id)
+        if not markdown:
+            counts["unparsed"] += 1
+            continue
+
+        sections_dict = cache_service.load_sections(arxiv_id)
+        if not sections_dict:
+            sections, confidence = segment_markdown(markdown)
+            if confidence >= MIN_LOCAL_CONFIDENCE:
+                sections_dict = sections.model_dump()
+                cache_service.save_sections(arxiv_id, sections_dict)
+                counts["sectioned_locally"] += 1
+            else:
+                custom_id = f"sections:{arxiv_id}"
+                if custom_id in in_flight:
+                    counts["in_flight"] += 1
+                else:
+                    jobs.append({"kind": "sections", "arxiv_id": arxiv_id, "custom_id": custom_id, "text": markdown})
+
+        if status["analysis"]:
+            continue
+        if not sections_dict:
+            counts["deferred_analysis"] += 1
+            continue
+        custom_id = f"analysis:{arxiv_id}"
+        if custom_id in in_flight:
+            counts["in_flight"] += 1
+            continue
+        clean_markdown = PaperSections(**sections_dict).to_clean_markdown()
+        jobs.append({"kind": "analysis", "arxiv_id": arxiv_id, "custom_id": custom_id, "text": clean_markdown})
+
+    return {"jobs": jobs, **counts}
+
+
+def build_batch_request(job: Dict[str, Any]) -> Dict[str, Any]:
+    """One JSONL line for the /v1/responses batch endpoint."""
+    if job["kind"] == "analysis":
+        model, input_messages, text_format = BATCH_ANALYSIS_MODEL, analysis_input(job["text"]), PaperAnalysis
+    else:
+        model, input_messages, text_format = BATCH_SECTIONS_MODEL, section_spans_input(job["text"]), PaperSectionSpans
+    return {
+        "custom_id": job["custom_id"],
+        "method": "POST",
+        "url": "/v1/responses",
+        "body": {
+            "model": model,
+            "input": input_messages,
+            "text": {"format": type_to_text_format_param(text_format)},
+        },
+    }
+
+
+async def submit_batches(
+    arxiv_ids: Optional[Iterable[str]] = None,
+    client: Optional[AsyncOpenAI] = None
+) -> Dict[str, Any]:
+    """
+    Collect pending jobs, upload them as JSONL and create provider batches.
+
+    Returns:
+        dict with the new batch records and the collection counts
+    """
+    client = client or get_openai_client()
+    # Reads the library's markdown and runs the local segmenter; keep it off the event loop
+    pending = await asyncio.to_thread(collect_pending_jobs, arxiv_ids)
+    jobs = pending.pop("jobs")
+    if not jobs:
+        print("📭 No pending jobs for batch analysis")
+        return {"success": True, "batches": [], **pending}
+
+    BATCH_FILES_DIR.mkdir(parents=True, exist_ok=True)
+    batches = _load_batches()
+    created = []
+
+    for start in range(0, len(jobs), BATCH_MAX_REQUESTS):
+        chunk = jobs[start:start + BATCH_MAX_REQUESTS]
+        local_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        payload = "".join(json.dumps(build_batch_request(job), ensure_ascii=False) + "\n" for job in chunk)
+
+        # Keep a copy of what was sent next to the state file
+        input_path = BATCH_FILES_DIR / f"{local_id}.jsonl"
+        input_path.write_text(payload, encoding='utf-8')
+
+        uploaded = await client.files.create(
+            file=(input_path.name, io.BytesIO(payload.encode('utf-8'))),
+            purpose="batch",
+        )
+        batch = await client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/responses",
+            completion_window="24h",
+            metadata={"source": "research-organizer", "local_id": local_id},
+        )
+
+        record = {
+            "id": batch.id,
+            "local_id": local_id,
+            "input_file_id": uploaded.id,
+            "input_path": str(input_path.relative_to(cache_service.CACHE_DIR.parent)),
+            "status": batch.status,
+            "created_at": datetime.utcnow().isoformat(),
+            "requests": {job["custom_id"]: {"kind": job["kind"], "arxiv_id": job["arxiv_id"]} for job in chunk},
+            "ingested": False,
+        }
+        batches.append(record)
+        _save_batches(batches)
+        created.append(record)
+        print(f"📦 Submitted batch {batch.id} with {len(chunk)} requests")
+
+    return {"success": True, "batches": created, **pending}
+
+
+def _response_output_text(body: Dict[str, Any]) -> Optional[str]:
+    """Concatenate the output_text parts of a Responses API body."""
+    parts = [
+        content.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for content in item.get("content", [])
+        if content.get("type") == "output_text"
+    ]
+    return "".join(parts) if parts else None
+
+
+def ingest_batch_output(record: Dict[str, Any], output_jsonl: str) -> Dict[str, int]:
+    """
+    Validate batch results and store them in the sections/analysis cache.
+
+    Args:
+        record: Batch record from batches.json
+        output_jsonl: Contents of the provider's output file
+
+    Returns:
+        Counts of saved and failed results
+    """
+    counts = {"analysis": 0, "sections": 0, "failed": 0}
+    for line in output_jsonl.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        job = record["requests"].get(result.get("custom_id"))
+        if not job:
+            continue
+        arxiv_id = job["arxiv_id"]
+        try:
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                raise ValueError(result.get("error") or f"status {response.get('status_code')}")
+            body = response["body"]
+            usage_ledger.record_call(
+                f"batch:{job['kind']}", body.get("model"), body.get("usage"),
+                batch=True, paper_id=arxiv_id
+            )
+            output_text = _response_output_text(body)
+            if output_text is None:
+                raise ValueError("response has no output text")
+
+            if job["kind"] == "analysis":
+                analysis = PaperAnalysis.model_validate_json(output_text)
+                usage = body.get("usage") or {}
+                cache_service.save_analysis(arxiv_id, {
+                    "success": True,
+                    "data": analysis.model_dump(exclude={"analysis_thought_process"}),
+                    "usage": {
+                        "model": body.get("model"),
+                        "input_tokens": usage.get("input_tokens"),
+                        "cached_input_tokens": (usage.get("input_tokens_details") or {}).get("cached_tokens", 0),
+                        "output_tokens": usage.get("output_tokens"),
+                        "batch_id": record["id"],
+                    },
+                })
+            else:
+                markdown = cache_service.load_markdown(arxiv_id)
+                if not markdown:
+                    raise ValueError("markdown disappeared from cache")
+                spans = PaperSectionSpans.model_validate_json(output_text)
+                cache_service.save_sections(arxiv_id, sections_from_spans(markdown, spans).model_dump())
+            counts[job["kind"]] += 1
+        except Exception as e:
+            print(f"❌ Batch result for {result.get('custom_id')} failed: {e}")
+            counts["failed"] += 1
+    return counts
+
+
+async def poll_batches(client: Optional[AsyncOpenAI] = None) -> List[Dict[str, Any]]:
+    """
+    Refresh every batch that is not finished and ingest completed ones.
+
+    Returns:
+        The updated batch records
+    """
+    client = client or get_openai_client()
+    batches = _load_batches()
+
+    for record in batches:
+        if record.get("ingested"):
+            continue
+        batch = await client.batches.retrieve(record["id"])
+        record["status"] = batch.status
+        if batch.request_counts:
+            record["request_counts"] = batch.request_counts.model_dump()
+        if batch.status not in FINAL_STATUSES:
+            continue
+
+        counts = {"analysis": 0, "sections": 0, "failed": 0}
+        if batch.output_file_id:
+            output = await client.files.content(batch.output_file_id)
+            counts = await asyncio.to_thread(ingest_batch_output, record, output.text)
+        if batch.error_file_id:
+            errors = await client.files.content(batch.error_file_id)
+            counts["failed"] += sum(1 for line in errors.text.splitlines() if line.strip())
+
+        record["ingested"] = True
+        record["ingested_at"] = datetime.utcnow().isoformat()
+        record["results"] = counts
+        print(f"✅ Batch {record['id']} {batch.status}: {counts}")
+
+    _save_batches(batches)
+    return batches
+
+
+async def wait_for_batches(interval: float = 60.0, client: Optional[AsyncOpenAI] = None) -> List[Dict[str, Any]]:
+    """Poll until every submitted batch has been ingested."""
+    while True:
+        batches = await poll_batches(client)
+        if all(record.get("ingested") for record in batches):
+            return batches
+        await asyncio.sleep(interval)
+
+
+def batch_status() -> List[Dict[str, Any]]:
+    """Batch records without the per-request maps, for display."""
+    return [
+        {**{k: v for k, v in record.items() if k != "requests"}, "request_total": len(record.get("requests", {}))}
+        for record in _load_batches()
+    ]
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Batch analysis for the paper library")
+    parser.add_argument("command", choices=["submit", "poll", "wait", "status"])
+    parser.add_argument("--ids", nargs="*", help="arXiv IDs to include (default: whole library)")
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between polls for 'wait'")
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        result = asyncio.run(submit_batches(args.ids))
+        result["batches"] = [record["id"] for record in result["batches"]]
+    elif args.command == "poll":
+        asyncio.run(poll_batches())
+        result = batch_status()
+    elif args.command == "wait":
+        asyncio.run(wait_for_batches(args.interval))
+        result = batch_status()
+    else:
+        result = batch_status()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
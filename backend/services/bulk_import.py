@@ -0,0 +1,286 @@
+"""
+Bulk import of reading lists into the paper library.
+
+Accepts BibTeX, or plain text with one paper per line (arXiv URLs or IDs,
+DOIs, Semantic Scholar paper URLs or IDs). IDs are normalized and deduplicated
+against the library in one pass, metadata is fetched with Semantic Scholar
+batch lookups, and all new papers are written to papers.json at once.
+Optionally the new papers are queued as background jobs (see jobs.py) in
+the batch priority class, so they never hold up interactive requests.
+
+Usage (from backend/):
+    python -m services.bulk_import reading_list.bib
+    python -m services.bulk_import urls.txt --process-until parse
+"""
+import re
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+from .huggingface import load_papers, save_papers
+from .semantic_scholar import get_papers_batch
+from .pipeline import PIPELINE
+from .jobs import job_queue
+
+ARXIV_ID = r'\d{4}\.\d{4,5}'
+# arXiv ID in a URL, with an "arXiv:" prefix or in an arXiv DOI; version suffixes are dropped
+ARXIV_REF_PATTERN = re.compile(
+    rf'(?:arxiv\.org/(?:abs|pdf|html)/|arxiv[:\s]\s*|10\.48550/arxiv\.)({ARXIV_ID})(?:v\d+)?',
+    re.IGNORECASE
+)
+BARE_ARXIV_PATTERN = re.compile(rf'^({ARXIV_ID})(?:v\d+)?$')
+DOI_PATTERN = re.compile(r'\b(10\.\d{4,9}/[^\s"{}<>]+)', re.IGNORECASE)
+S2_ID_PATTERN = re.compile(r'(?:semanticscholar\.org/paper/(?:[^/\s]+/)?)?\b([0-9a-f]{40})\b')
+BIBTEX_ENTRY_PATTERN = re.compile(r'@\w+\s*\{')
+BIBTEX_FIELD_PATTERN = re.compile(r'(\w+)\s*=\s*(\{(?:[^{}]|\{[^{}]*\})*\}|"[^"]*"|\d+)', re.DOTALL)
+
+
+def normalize_reference(text: str) -> Optional[Tuple[str, str]]:
+    """
+    Identify the paper a line or BibTeX field points to.
+
+    Returns:
+        Tuple of (kind, id) with kind "arxiv", "doi" or "s2", or None if
+        nothing recognizable was found
+    """
+    text = text.strip()
+    match = ARXIV_REF_PATTERN.search(text) or BARE_ARXIV_PATTERN.match(text)
+    if match:
+        return "arxiv", match.group(1)
+    match = S2_ID_PATTERN.search(text)
+    if match:
+        return "s2", match.group(1)
+    match = DOI_PATTERN.search(text)
+    if match:
+        return "doi", match.group(1).rstrip(".,;").lower()
+    return None
+
+
+def _bibtex_entries(text: str) -> List[Dict[str, str]]:
+    """Fields of each BibTeX entry, lower-cased names, braces stripped from values."""
+    entries = []
+    starts = [match.start() for match in BIBTEX_ENTRY_PATTERN.finditer(text)]
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        fields = {}
+        for name, value in BIBTEX_FIELD_PATTERN.findall(text[start:end]):
+            fields[name.lower()] = re.sub(r'\s+', ' ', value.strip('{}"').replace('{', '').replace('}', '')).strip()
+        entries.append(fields)
+    return entries
+
+
+def parse_reading_list(text: str) -> Dict[str, Any]:
+    """
+    Extract paper references from BibTeX or line-based text.
+
+    Returns:
+        dict with references (list of {kind, id, title}) and invalid (entries
+        or lines without a recognizable ID)
+    """
+    references: List[Dict[str, Any]] = []
+    invalid: List[str] = []
+
+    if BIBTEX_ENTRY_PATTERN.search(text):
+        for fields in _bibtex_entries(text):
+            # eprint/journal/url carry arXiv IDs ("arXiv preprint arXiv:2106.09685")
+            reference = None
+            if fields.get("eprint") and BARE_ARXIV_PATTERN.match(fields["eprint"]):
+                reference = ("arxiv", BARE_ARXIV_PATTERN.match(fields["eprint"]).group(1))
+            for name in ("doi", "url", "journal", "note", "howpublished"):
+                if reference is None and fields.get(name):
+                    reference = normalize_reference(fields[name])
+            if reference is None:
+                invalid.append(fields.get("title") or str(fields)[:100])
+                continue
+            references.append({"kind": reference[0], "id": reference[1], "title": fields.get("title")})
+        return {"references": references, "invalid": invalid}
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        reference = normalize_reference(line)
+        if reference is None:
+            invalid.append(line)
+            continue
+        references.append({"kind": reference[0], "id": reference[1], "title": None})
+    return {"references": references, "invalid": invalid}
+
+
+def _s2_lookup_id(reference: Dict[str, Any]) -> str:
+    if reference["kind"] == "arxiv":
+        return f"ARXIV:{reference['id']}"
+    if reference["kind"] == "doi":
+        return f"DOI:{reference['id']}"
+    return reference["id"]
+
+
+def _match_keys(paper: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(kind, id) pairs a Semantic Scholar result can be matched back to a reference by."""
+    external_ids = paper.get("externalIds") or {}
+    keys = [("s2", paper["paperId"])]
+    if paper.get("arxivId"):
+        keys.append(("arxiv", paper["arxivId"]))
+    if external_ids.get("DOI"):
+        keys.append(("doi", external_ids["DOI"].lower()))
+    return keys
+
+
+def _library_index(papers: List[Dict[str, Any]]) -> set:
+    """Every ID a library entry is known by."""
+    index = set()
+    for paper in papers:
+        for field in ("id", "arxiv_id", "semantic_scholar_id"):
+            if paper.get(field):
+                index.add(paper[field])
+    return index
+
+
+async def import_papers(
+    text: str,
+    enqueue_until: Optional[str] = None,
+    mode: str = "hybrid"
+) -> Dict[str, Any]:
+    """
+    Import a reading list into the library.
+
+    Args:
+        text: BibTeX or one paper reference per line
+        enqueue_until: If set, queue a background job for each new arXiv paper
+                       up to this pipeline stage (metadata, download, parse,
+                       sections or analysis)
+        mode: Parser mode for queued jobs
+
+    Returns:
+        dict with success, added (new library entries), duplicates (IDs
+        already in the library or repeated in the list), not_found, invalid,
+        jobs (queued job IDs), timings and error
+    """
+    if enqueue_until and enqueue_until not in PIPELINE:
+        raise ValueError(f"enqueue_until must be one of {', '.join(PIPELINE)}")
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    result: Dict[str, Any] = {
+        "success": False, "added": [], "duplicates": [], "not_found": [],
+        "invalid": [], "jobs": [], "timings": timings, "error": None
+    }
+
+    parsed = parse_reading_list(text)
+    result["invalid"] = parsed["invalid"]
+
+    # One pass over the list against the library's ID index
+    index = _library_index(load_papers())
+    pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for reference in parsed["references"]:
+        key = (reference["kind"], reference["id"])
+        if reference["id"] in index or key in pending:
+            result["duplicates"].append(reference["id"])
+            continue
+        pending[key] = reference
+    timings["parse"] = round(time.perf_counter() - started, 3)
+
+    if pending:
+        step = time.perf_counter()
+        lookup = await get_papers_batch([_s2_lookup_id(reference) for reference in pending.values()])
+        timings["metadata"] = round(time.perf_counter() - step, 3)
+        if not lookup["success"]:
+            result["error"] = f"Semantic Scholar lookup failed: {lookup['error']}"
+            return result
+
+        resolved: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for s2_paper in lookup["papers"]:
+            for key in _match_keys(s2_paper):
+                if key in pending:
+                    resolved[key] = s2_paper
+
+        new_papers: List[Dict[str, Any]] = []
+        for key, reference in pending.items():
+            s2_paper = resolved.get(key)
+            if s2_paper is None:
+                result["not_found"].append(reference["id"])
+                continue
+            arxiv_id = s2_paper.get("arxivId")
+            primary_id = arxiv_id or s2_paper["paperId"]
+            # Different references (DOI and arXiv ID) can resolve to the same paper
+            if primary_id in index or s2_paper["paperId"] in index:
+                result["duplicates"].append(reference["id"])
+                continue
+            index.update({primary_id, s2_paper["paperId"]})
+            new_papers.append({
+                "id": primary_id,
+                "title": s2_paper.get("title") or reference.get("title") or "Unknown Title",
+                "authors": [author["name"] for author in s2_paper.get("authors", []) if author.get("name")] or ["Unknown"],
+                "arxiv_url": f"https://arxiv.org/abs/{arxiv_id}" if arxiv_id else None,
+                "arxiv_id": arxiv_id,
+                "semantic_scholar_id": s2_paper["paperId"],
+                "added_date": datetime.now().isoformat(),
+                "cache_status": {}
+            })
+
+        if new_papers:
+            step = time.perf_counter()
+            # Reload right before writing so papers added while the lookup ran are kept
+            papers = load_papers()
+            known = _library_index(papers)
+            new_papers = [paper for paper in new_papers if paper["id"] not in known]
+            if not save_papers(new_papers + papers):
+                result["error"] = "Failed to save papers list"
+                return result
+            timings["save"] = round(time.perf_counter() - step, 3)
+        result["added"] = new_papers
+        print(f"📚 Imported {len(new_papers)} papers ({len(result['duplicates'])} duplicates, {len(result['not_found'])} not found)")
+
+    if enqueue_until and result["added"] and not job_queue.running:
+        result["error"] = "Job workers are not running; papers were added but not queued"
+    elif enqueue_until:
+        for paper in result["added"]:
+            if paper["arxiv_id"]:
+                job = job_queue.submit(
+                    paper["arxiv_id"], until=enqueue_until, mode=mode,
+                    arxiv_url=paper["arxiv_url"], priority="batch"
+                )
+                result["jobs"].append(job["id"])
+
+    timings["total"] = round(time.perf_counter() - started, 3)
+    result["success"] = True
+    return result
+
+
+async def _import_and_process(text: str, until: Optional[str], mode: str) -> Dict[str, Any]:
+    if until:
+        await job_queue.start()
+    try:
+        result = await import_papers(text, enqueue_until=until, mode=mode)
+        if result["jobs"]:
+            print(f"⏳ Processing {len(result['jobs'])} papers up to {until}...")
+            await job_queue.join()
+            result["job_status"] = {job_id: job_queue.get(job_id)["status"] for job_id in result["jobs"]}
+        return result
+    finally:
+        if until:
+            await job_queue.stop()
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Import a reading list into the paper library")
+    parser.add_argument("file", help="BibTeX file or text file with one arXiv/DOI/Semantic Scholar reference per line")
+    parser.add_argument("--process-until", choices=list(PIPELINE),
+                        help="Also process the new papers up to this stage and wait for them")
+    parser.add_argument("--mode", default="hybrid", choices=["hybrid", "ocr", "pymupdf"], help="Parser mode")
+    args = parser.parse_args()
+
+    with open(args.file, 'r', encoding='utf-8') as f:
+        text = f.read()
+    result = asyncio.run(_import_and_process(text, args.process_until, args.mode))
+    result["added"] = [paper["id"] for paper in result["added"]]
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,41 @@
 import json
 import os
+import hashlib
+import re
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 from datetime import datetime
 
 # Cache directory structure
 CACHE_DIR = Path(__file__).parent.parent / "data" / "cache"
 PAPERS_FILE = Path(__file__).parent.parent / "data" / "papers.json"
 APPLICATIONS_FILE = CACHE_DIR / "applications.json"
+# Append-only, one decision per line (a later line for the same key wins)
+RELEVANCE_FILE = CACHE_DIR / "relevance.jsonl"
+
+# Per-paper cache files by cache type
+CACHE_FILES = {
+    "metadata": "metadata.json",
+    "pdf": "paper.pdf",
+    "markdown": "markdown.md",
+    "sections": "sections.json",
+    "analysis": "analysis.json"
+}
+
+# Guards relevance.jsonl and the parsed copy of it
+_relevance_lock = threading.Lock()
+_relevance_index: Dict[str, Any] = {"signature": None, "entries": {}}
+
+# Bumped whenever a metadata.json is written or removed, so derived indexes know to rebuild
+_metadata_generation = 0
+
+def metadata_generation() -> int:
+    return _metadata_generation
+
+def _metadata_changed():
+    global _metadata_generation
+    _metadata_generation += 1
 
 def ensure_cache_dir(arxiv_id: str) -> Path:
     """Ensure cache directory exists for a paper."""
@@ -23,6 +51,7 @@ def save_metadata(arxiv_id: str, metadata: Dict[str, Any]) -> bool:
         
         with open(metadata_file, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
+        _metadata_changed()
         
         update_paper_cache_ref(arxiv_id, "metadata", str(metadata_file.relative_to(CACHE_DIR.parent)))
         return True
@@ -73,6 +102,34 @@ def load_markdown(arxiv_id: str) -> Optional[str]:
         print(f"Error loading markdown cache: {e}")
         return None
 
+def save_pdf(arxiv_id: str, pdf_bytes: bytes) -> bool:
+    """Save the downloaded PDF to cache."""
+    try:
+        cache_dir = ensure_cache_dir(arxiv_id)
+        pdf_file = cache_dir / "paper.pdf"
+        
+        with open(pdf_file, 'wb') as f:
+            f.write(pdf_bytes)
+        
+        update_paper_cache_ref(arxiv_id, "pdf", str(pdf_file.relative_to(CACHE_DIR.parent)))
+        return True
+    except Exception as e:
+        print(f"Error saving PDF cache: {e}")
+        return False
+
+def load_pdf(arxiv_id: str) -> Optional[bytes]:
+    """Load the downloaded PDF from cache."""
+    try:
+        pdf_file = CACHE_DIR / arxiv_id / "paper.pdf"
+        
+        if pdf_file.exists():
+            with open(pdf_file, 'rb') as f:
+                return f.read()
+        return None
+    except Exception as e:
+        print(f"Error loading PDF cache: {e}")
+        return None
+
 def save_analysis(arxiv_id: str, analysis: Dict[str, Any]) -> bool:
     """Save analysis to cache."""
     try:
@@ -102,6 +159,19 @@ def load_analysis(arxiv_id: str) -> Optional[Dict[str, Any]]:
         print(f"Error loading analysis cache: {e}")
         return None
 
+def load_all_metadata() -> Dict[str, Dict[str, Any]]:
+    """Load every cached metadata.json, keyed by arXiv ID."""
+    papers = {}
+    if not CACHE_DIR.exists():
+        return papers
+    for metadata_file in CACHE_DIR.glob("*/metadata.json"):
+        try:
+            with open(metadata_file, 'r', encoding='utf-8') as f:
+                papers[metadata_file.parent.name] = json.load(f)
+        except Exception as e:
+            print(f"Error loading metadata cache {metadata_file}: {e}")
+    return papers
+
 def update_paper_cache_ref(arxiv_id: str, cache_type: str, file_path: str):
     """Update papers.json with cache reference."""
     try:
@@ -162,12 +232,14 @@ def get_cache_status(arxiv_id: str) -> Dict[str, bool]:
     """Check which cache files exist for a paper."""
     cache_dir = CACHE_DIR / arxiv_id
     
-    return {
-        "metadata": (cache_dir / "metadata.json").exists(),
-        "markdown": (cache_dir / "markdown.md").exists(),
-        "sections": (cache_dir / "sections.json").exists(),
-        "analysis": (cache_dir / "analysis.json").exists()
-    }
+    return {cache_type: (cache_dir / file_name).exists() for cache_type, file_name in CACHE_FILES.items()}
+
+def cache_mtime(arxiv_id: str, cache_type: str) -> Optional[float]:
+    """Modification time of a paper's cache file, or None if it doesn't exist."""
+    try:
+        return (CACHE_DIR / arxiv_id / CACHE_FILES[cache_type]).stat().st_mtime
+    except FileNotFoundError:
+        return None
 
 def clear_cache(arxiv_id: str, cache_type: Optional[str] = None) -> bool:
     """Clear cache for a paper. If cache_type is None, clear all."""
@@ -179,19 +251,15 @@ def clear_cache(arxiv_id: str, cache_type: Optional[str] = None) -> bool:
         
         if cache_type:
             # Clear specific cache
-            file_map = {
-                "metadata": "metadata.json",
-                "markdown": "markdown.md",
-                "sections": "sections.json",
-                "analysis": "analysis.json"
-            }
-            cache_file = cache_dir / file_map.get(cache_type, "")
+            cache_file = cache_dir / CACHE_FILES.get(cache_type, "")
             if cache_file.exists():
                 cache_file.unlink()
         else:
             # Clear all cache for this paper
             import shutil
             shutil.rmtree(cache_dir)
+        if cache_type in (None, "metadata"):
+            _metadata_changed()
         
         return True
     except Exception as e:
@@ -257,3 +325,158 @@ def load_applications() -> list:
     except Exception as e:
         print(f"Error loading applications: {e}")
         return []
+
+def application_hash(application: Dict[str, Any]) -> str:
+    """
+    Hash an application idea so trivially different spellings share cache entries.
+    Keys are sorted and string values lowercased with whitespace collapsed.
+    """
+    normalized = {
+        key: re.sub(r'\s+', ' ', value).strip().lower() if isinstance(value, str) else value
+        for key, value in application.items()
+    }
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def relevance_key(application: Dict[str, Any], arxiv_id: str, model_id: str, prompt_version: str) -> str:
+    """Build the relevance cache key for one (application, paper, model, prompt) combination."""
+    return f"{application_hash(application)}:{arxiv_id}:{model_id}:{prompt_version}"
+
+def _relevance_signature() -> Optional[tuple]:
+    try:
+        stat = RELEVANCE_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return (str(RELEVANCE_FILE), stat.st_size, stat.st_mtime_ns)
+
+def _read_relevance_file() -> Dict[str, Dict[str, Any]]:
+    """
+    Every decision in relevance.jsonl, later lines winning (lock held).
+    Parsed once and reused until the file changes. Lines that don't parse
+    (a write cut short by a crash) are skipped instead of failing every lookup.
+    """
+    signature = _relevance_signature()
+    if signature == _relevance_index["signature"]:
+        return _relevance_index["entries"]
+    
+    entries = {}
+    skipped = 0
+    if signature is not None:
+        with open(RELEVANCE_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    entries[record.pop("key")] = record
+                except (ValueError, KeyError, AttributeError):
+                    skipped += 1
+    if skipped:
+        print(f"⚠️ Skipped {skipped} unreadable line(s) in {RELEVANCE_FILE.name}")
+    _relevance_index.update(signature=signature, entries=entries)
+    return entries
+
+def _relevance_line(key: str, entry: Dict[str, Any]) -> str:
+    return json.dumps({"key": key, **entry}, ensure_ascii=False) + "\n"
+
+def _ends_with_newline(path: Path) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+    except OSError:
+        # Missing or empty file
+        return True
+
+def load_all_relevance_decisions() -> Dict[str, Dict[str, Any]]:
+    """Load every cached relevance decision, keyed by relevance_key."""
+    try:
+        with _relevance_lock:
+            return dict(_read_relevance_file())
+    except Exception as e:
+        print(f"Error loading relevance cache: {e}")
+        return {}
+
+def load_relevance_decisions(keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up cached relevance decisions.
+    
+    Args:
+        keys: Keys built with relevance_key
+    
+    Returns:
+        Dict of the keys that were found, mapped to their cached entries
+    """
+    try:
+        with _relevance_lock:
+            entries = _read_relevance_file()
+            return {key: entries[key] for key in keys if key in entries}
+    except Exception as e:
+        print(f"Error loading relevance cache: {e}")
+        return {}
+
+def save_relevance_decisions(decisions: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Append relevance decisions to relevance.jsonl (a save never rewrites the file).
+    
+    Args:
+        decisions: Mapping of relevance_key to entry dicts (decision, reason, arxiv_id, ...)
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    if not decisions:
+        return True
+    try:
+        cached_at = datetime.utcnow().isoformat()
+        stamped = {key: {**entry, "cached_at": cached_at} for key, entry in decisions.items()}
+        lines = "".join(_relevance_line(key, entry) for key, entry in stamped.items())
+        
+        with _relevance_lock:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            entries = _read_relevance_file()
+            # Don't glue the first new line onto a line a crash left unfinished
+            if not _ends_with_newline(RELEVANCE_FILE):
+                lines = "\n" + lines
+            with open(RELEVANCE_FILE, 'a', encoding='utf-8') as f:
+                f.write(lines)
+            entries.update(stamped)
+            _relevance_index["signature"] = _relevance_signature()
+        return True
+    except Exception as e:
+        print(f"Error saving relevance cache: {e}")
+        return False
+
+def clear_relevance_cache(keep_prompt_version: Optional[str] = None) -> int:
+    """
+    Invalidate cached relevance decisions.
+    
+    Args:
+        keep_prompt_version: If given, only drop entries made with a different
+            prompt version; otherwise clear everything.
+    
+    Returns:
+        Number of entries removed
+    """
+    try:
+        with _relevance_lock:
+            entries = _read_relevance_file()
+            if keep_prompt_version is None:
+                kept = {}
+            else:
+                kept = {
+                    key: entry for key, entry in entries.items()
+                    if entry.get("prompt_version") == keep_prompt_version
+                }
+            
+            if len(kept) != len(entries):
+                # Write a new file and swap it in, so a crash leaves the old one intact
+                temp_file = RELEVANCE_FILE.with_name(RELEVANCE_FILE.name + ".tmp")
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write("".join(_relevance_line(key, entry) for key, entry in kept.items()))
+                os.replace(temp_file, RELEVANCE_FILE)
+                _relevance_index.update(signature=_relevance_signature(), entries=kept)
+            return len(entries) - len(kept)
+    except Exception as e:
+        print(f"Error clearing relevance cache: {e}")
+        return 0
@@ -1,14 +1,29 @@
-from typing import Optional, Dict, Any, List
+"""
+Deep analysis of a paper's applications: for every application idea in the
+paper's cached analysis, search arXiv and the paper's recommendations for
+related work, classify relevance and write the decisions to a CSV report.
+
+Runs as a background job (see jobs.py) so progress survives restarts: each
+finished application is saved with the job and skipped when it resumes.
+
+Usage (from backend/):
+    python -m services.deep_analysis 2601.21558
+"""
+from typing import Optional, Dict, Any, List, Callable
 import csv
+import json
+import argparse
 from pathlib import Path
 from datetime import datetime
 
-from cache_service import load_analysis, load_metadata, load_markdown, save_markdown, save_metadata
-from some_extensions.research_tools import arxiv_search_tool
-from semantic_scholar import get_paper_metadata
-from openai_service import is_paper_relevant, summarize_paper
-from models import ApplicationIdea, PaperAnalysis
-from pdf_parser import download_and_parse_paper
+from .cache_service import load_analysis, load_metadata, load_markdown, save_markdown
+from .some_extensions.research_tools import arxiv_search_tool
+from .openai_service import classify_papers_relevance
+from .model_router import cascade_for, cascade_label
+from .relevance_prefilter import prefilter_candidates
+from .models import PaperAnalysis
+from .paper_stages import metadata_stage
+from .pdf_parser import download_and_parse_paper
 import asyncio
 
 
@@ -44,56 +59,102 @@ async def extract_markdown(paper_id):
             return None
     return cached_markdown
 
-async def analyze_deeply(root_paper_arxiv_id: str) -> Optional[Dict[str, Any]]:
-    base_article_analysis = load_analysis(root_paper_arxiv_id)    
+async def analyze_deeply(
+    root_paper_arxiv_id: str,
+    progress: Optional[Dict[str, Any]] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Classify related papers for every application of a paper and write a CSV report.
+
+    Args:
+        root_paper_arxiv_id: Paper whose cached analysis lists the applications
+        progress: Progress from an earlier, interrupted run; applications
+                  finished there are not processed again
+        on_progress: Called with the updated progress after each application
+
+    Returns:
+        dict with success, csv_file, relevant (papers judged relevant),
+        applications and error
+    """
+    progress = dict(progress or {})
+    base_article_analysis = load_analysis(root_paper_arxiv_id)
+    if not base_article_analysis or not load_metadata(root_paper_arxiv_id):
+        return {
+            "success": False, "csv_file": None, "relevant": 0, "applications": 0,
+            "error": f"Analysis and metadata of {root_paper_arxiv_id} must be cached first"
+        }
     analysis_object: PaperAnalysis = PaperAnalysis.model_validate(base_article_analysis["data"])
     application_ideas = analysis_object.summary.applications
-    model_id = "gpt-5-mini"
+    # The relevance cascade picks the model; the CSV records which cascade ran
+    model_label = cascade_label(cascade_for("relevance"))
     csv_rows = []
+    relevant = 0
     
-    for application_idea in application_ideas:
+    for index, application_idea in enumerate(application_ideas):
+        # Keys are strings so progress round-trips through JSON
+        done = progress.get(str(index))
+        if done:
+            print(f"Skipping finished application: {application_idea.domain}")
+            csv_rows.extend(done["rows"])
+            relevant += done["relevant"]
+            continue
+
         print(f"Started analysis for: {application_idea}")
-        search_results = arxiv_search_tool(application_idea.domain, 10)
+        search_results = await asyncio.to_thread(arxiv_search_tool, application_idea.domain, 10)
         metadata = load_metadata(root_paper_arxiv_id)
         arxiv_ids = extract_arxiv_ids(search_results, metadata)
         arxiv_ids.append(root_paper_arxiv_id)
-        async def process_paper(paper_id: str):        
-            related_paper_metadata = load_metadata(paper_id)            
-            if not related_paper_metadata:
-                related_paper_metadata = await get_paper_metadata(paper_id)
-                if not related_paper_metadata["success"]:
-                    related_paper_metadata = None                
-
-            if related_paper_metadata:
-                relevancy = await is_paper_relevant(application_idea, related_paper_metadata["title"], related_paper_metadata["abstract"], model_id)
-                
-                # Record to CSV data
-                csv_rows.append({
-                    'application_context': application_idea.specific_utility,
-                    'related_paper_title': related_paper_metadata["title"],
-                    'related_paper_summary': related_paper_metadata["abstract"],
-                    'relevancy_decision': relevancy["decision"],
-                    'relevancy_reasoning': relevancy.get("reason", ""),
-                    'model_id': model_id
-                })
-                
-                if relevancy["decision"]:
-                    cached_analysis = load_analysis(paper_id)
-                    return cached_analysis
-                    # if not cached_analysis:
-                    #     try:
-                    #         markdown = extract_markdown(paper_id)
-                    #         analysis = summarize_paper(markdown)
-
-
-                    #     except Exception as e:
-                    #         return f"Failed {paper_id}: {e}"
-        
-        tasks = [process_paper(pid) for pid in arxiv_ids]
-        results = await asyncio.gather(*tasks)
-        print(f"Processing comleted, found {len(results)} cached analysis.")
+
+        async def fetch_metadata(paper_id: str):
+            related_paper_metadata = await metadata_stage(paper_id)
+            if not related_paper_metadata.get("success", True):
+                related_paper_metadata = None
+            return related_paper_metadata
+
+        arxiv_ids = list(dict.fromkeys(arxiv_ids))
+        fetched = await asyncio.gather(*(fetch_metadata(pid) for pid in arxiv_ids))
+        candidates_metadata = {pid: m for pid, m in zip(arxiv_ids, fetched) if m}
+
+        kept, _ = await asyncio.to_thread(
+            prefilter_candidates,
+            application_idea,
+            [
+                {"paper_id": pid, "title": m["title"], "abstract": m["abstract"] or ""}
+                for pid, m in candidates_metadata.items()
+            ]
+        )
+
+        # One batched relevance call per token budget instead of one call per paper
+        decisions = await classify_papers_relevance(application_idea, kept, None)
+
+        results = []
+        rows = []
+        for paper_id, related_paper_metadata in candidates_metadata.items():
+            relevancy = decisions.get(paper_id, {"decision": False, "reason": "Dropped by lexical pre-filter"})
+
+            # Record to CSV data
+            rows.append({
+                'application_context': application_idea.specific_utility,
+                'related_paper_title': related_paper_metadata["title"],
+                'related_paper_summary': related_paper_metadata["abstract"],
+                'relevancy_decision': relevancy["decision"],
+                'relevancy_reasoning': relevancy.get("reason", ""),
+                'model_id': model_label
+            })
+
+            if relevancy["decision"]:
+                results.append(load_analysis(paper_id))
+
+        print(f"Processing completed, found {len(results)} cached analysis.")
+        csv_rows.extend(rows)
+        relevant += len(results)
+        progress[str(index)] = {"domain": application_idea.domain, "rows": rows, "relevant": len(results)}
+        if on_progress:
+            on_progress(progress)
     
     # Write CSV file
+    csv_file = None
     if csv_rows:
         results_dir = Path(__file__).parent.parent / "data" / "results"
         results_dir.mkdir(parents=True, exist_ok=True)
@@ -108,8 +169,37 @@ async def analyze_deeply(root_paper_arxiv_id: str) -> Optional[Dict[str, Any]]:
             writer.writerows(csv_rows)
         
         print(f"CSV results saved to: {csv_file}")
-        
+
+    return {
+        "success": True,
+        "csv_file": str(csv_file) if csv_file else None,
+        "relevant": relevant,
+        "applications": len(application_ideas),
+        "error": None
+    }
+
+
+async def _run_as_job(arxiv_id: str) -> Optional[Dict[str, Any]]:
+    # Imported here: jobs runs deep analyses and imports this module
+    from .jobs import job_queue
+    await job_queue.start()
+    try:
+        job = job_queue.submit_deep_analysis(arxiv_id, priority="batch")
+        await job_queue.join()
+        return job_queue.get(job["id"])
+    finally:
+        await job_queue.stop()
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Classify related work for every application of a paper")
+    parser.add_argument("arxiv_id", help="Paper with cached analysis and metadata")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(_run_as_job(args.arxiv_id)), indent=2))
+
 
 if __name__ == "__main__":
-    
-    asyncio.run(analyze_deeply("2601.21558"))
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+SQLite store for background jobs.
+
+Every job is written to data/cache/jobs.sqlite3 when it is submitted and
+whenever one of its stages changes status, so the server can resume
+unfinished jobs after a restart and job history outlives the process.
+The job itself is stored as JSON; id, paper, status and timestamps are
+columns for filtering. One connection is kept open and shared under a lock;
+callers on the event loop write through asyncio.to_thread (see jobs.py).
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+
+from . import cache_service
+
+JOBS_DB = cache_service.CACHE_DIR / "jobs.sqlite3"
+
+_lock = threading.Lock()
+_connection: Optional[sqlite3.Connection] = None
+_connection_path = None
+
+
+def _connect() -> sqlite3.Connection:
+    """The shared connection, opened on first use (call with _lock held)."""
+    global _connection, _connection_path
+    if _connection is not None and _connection_path == JOBS_DB:
+        return _connection
+    if _connection is not None:
+        _connection.close()
+    JOBS_DB.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(JOBS_DB, timeout=10, check_same_thread=False)
+    # WAL with synchronous=NORMAL syncs at checkpoints instead of on every commit
+    conn.executescript("""
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            arxiv_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            job TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+        CREATE INDEX IF NOT EXISTS jobs_arxiv_id ON jobs (arxiv_id);
+    """)
+    _connection, _connection_path = conn, JOBS_DB
+    return conn
+
+
+def save_job(job: Dict[str, Any]) -> bool:
+    """Insert or update a job."""
+    try:
+        with _lock:
+            conn = _connect()
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO jobs (id, arxiv_id, status, created_at, updated_at, job)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        status = excluded.status, updated_at = excluded.updated_at, job = excluded.job
+                    """,
+                    (
+                        job["id"], job["arxiv_id"], job["status"], job["created_at"],
+                        datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                        json.dumps(job, ensure_ascii=False)
+                    )
+                )
+        return True
+    except Exception as e:
+        print(f"Error saving job {job.get('id')}: {e}")
+        return False
+
+
+def _query(sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+    if not JOBS_DB.exists():
+        return []
+    try:
+        with _lock:
+            return [json.loads(row[0]) for row in _connect().execute(sql, params)]
+    except Exception as e:
+        print(f"Error reading job store: {e}")
+        return []
+
+
+def load_job(job_id: str) -> Optional[Dict[str, Any]]:
+    jobs = _query("SELECT job FROM jobs WHERE id = ?", (job_id,))
+    return jobs[0] if jobs else None
+
+
+def list_jobs(status: Optional[str] = None, arxiv_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """Jobs, newest first, optionally filtered by status or paper."""
+    conditions, params = [], []
+    if status:
+        conditions.append("status = ?")
+        params.append(status)
+    if arxiv_id:
+        conditions.append("arxiv_id = ?")
+        params.append(arxiv_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return _query(f"SELECT job FROM jobs {where} ORDER BY created_at DESC, rowid DESC LIMIT ?", (*params, limit))
+
+
+def unfinished_jobs() -> List[Dict[str, Any]]:
+    """Jobs that were queued or running when the server stopped, oldest first."""
+    return _query("SELECT job FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at, rowid")
+
+
+def count_by_status() -> Dict[str, int]:
+    if not JOBS_DB.exists():
+        return {}
+    try:
+        with _lock:
+            return dict(_connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+    except Exception as e:
+        print(f"Error reading job store: {e}")
+        return {}
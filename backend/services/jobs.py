@@ -0,0 +1,329 @@
+"""
+Background jobs for processing papers outside the HTTP request.
+
+A job brings one paper up to a target stage (download, parse, sections or
+analysis, plus the Semantic Scholar metadata by default) through the
+pipeline runner, which skips stages whose output is fresh, runs independent
+stages concurrently and bounds each stage with its own worker limit (see
+pipeline.py). Jobs share in-flight work with the API endpoints (see
+paper_stages).
+
+Jobs are persisted in SQLite (see job_store). Jobs that were queued or
+running when the server stopped are resumed at startup; stages finished
+before the restart are fresh in the cache and skipped. A job that keeps
+getting interrupted is given up after JOB_MAX_ATTEMPTS runs. Writes run in
+a worker thread, and updates that arrive while a job is being written are
+coalesced into its next write.
+
+Every job runs in a priority class (see scheduler.py): "prefetch" by
+default, "batch" for bulk imports, so a user waiting on the API is served
+ahead of both when OCR, OpenAI or stage slots are contended.
+
+Deep analyses (see deep_analysis.py) run as jobs of kind "deep_analysis";
+their progress is saved after every application, so a resumed run only
+processes the applications it had not finished. Transient failures (rate
+limits, timeouts) are retried with the pipeline's backoff from that progress.
+"""
+import os
+import copy
+import uuid
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+
+from . import pipeline, job_store, scheduler, deep_analysis
+
+# Runs per job, counting resumes after a restart
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+ACTIVE_STATUSES = {"queued", "running"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class JobQueue:
+    """
+    In-process job runner. Each job is one pipeline run; the pipeline's
+    per-stage worker limits decide how many jobs make progress at a time.
+    Active jobs are kept in memory, every job is persisted in the job store.
+    """
+
+    def __init__(self):
+        # Queued and running jobs; finished ones are read back from the store
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # One writer task per job with unsaved changes
+        self._writers: Dict[str, asyncio.Task] = {}
+        self._dirty: set = set()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def start(self):
+        """Accept jobs on the running event loop and resume unfinished ones from the store."""
+        self._running = True
+        workers = ", ".join(f"{stage}={count}" for stage, count in pipeline.STAGE_WORKERS.items())
+        print(f"🧵 Job runner started (stage workers: {workers})")
+        for job in job_store.unfinished_jobs():
+            if job["id"] in self.jobs:
+                continue
+            if job.get("attempts", 0) >= JOB_MAX_ATTEMPTS:
+                job.update({
+                    "status": "failed",
+                    "error": f"Interrupted {job['attempts']} times, giving up",
+                    "finished_at": _now()
+                })
+                job_store.save_job(job)
+                continue
+            print(f"♻️ Resuming job {job['id']} ({job['arxiv_id']}, {job.get('until') or job.get('kind')})")
+            self._launch(job)
+
+    async def stop(self):
+        """Cancel unfinished jobs and stop accepting new ones; they resume on the next start."""
+        self._running = False
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = {}
+        await asyncio.gather(*list(self._writers.values()), return_exceptions=True)
+
+    async def join(self):
+        """Wait until every submitted job has finished."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def submit(
+        self,
+        arxiv_id: str,
+        until: str = "analysis",
+        mode: str = "hybrid",
+        force: bool = False,
+        arxiv_url: Optional[str] = None,
+        with_metadata: bool = True,
+        priority: str = "prefetch"
+    ) -> Dict[str, Any]:
+        """
+        Queue a paper for processing up to and including the `until` stage,
+        in the given priority class (interactive, prefetch or batch).
+        An active job for the same paper, target stage and mode is returned instead of a new one.
+
+        Returns:
+            The job (a copy)
+        """
+        if until not in pipeline.PIPELINE:
+            raise ValueError(f"until must be one of {', '.join(pipeline.PIPELINE)}")
+        if priority not in scheduler.PRIORITY_CLASSES:
+            raise ValueError(f"priority must be one of {', '.join(scheduler.PRIORITY_CLASSES)}")
+        if not self._running:
+            raise RuntimeError("Job runner is not running")
+
+        for job in self.jobs.values():
+            if (
+                job["status"] in ACTIVE_STATUSES and job["arxiv_id"] == arxiv_id
+                and job.get("until") == until and job.get("mode") == mode
+            ):
+                return self.get(job["id"])
+
+        targets = [until] + (["metadata"] if with_metadata and until != "metadata" else [])
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "arxiv_id": arxiv_id,
+            "arxiv_url": arxiv_url,
+            "until": until,
+            "targets": targets,
+            "mode": mode,
+            "force": force,
+            "priority": priority,
+            "status": "queued",
+            "stage": None,
+            "stages": {},
+            "attempts": 0,
+            "error": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._launch(job)
+        print(f"📋 Job {job['id']} queued: {arxiv_id} up to {until} ({priority})")
+        return self.get(job["id"])
+
+    def submit_deep_analysis(self, arxiv_id: str, priority: str = "prefetch") -> Dict[str, Any]:
+        """
+        Queue a deep analysis of a paper's applications (see deep_analysis.py).
+        An active deep analysis of the same paper is returned instead of a new one.
+
+        Returns:
+            The job (a copy)
+        """
+        if priority not in scheduler.PRIORITY_CLASSES:
+            raise ValueError(f"priority must be one of {', '.join(scheduler.PRIORITY_CLASSES)}")
+        if not self._running:
+            raise RuntimeError("Job runner is not running")
+
+        for job in self.jobs.values():
+            if job.get("kind") == "deep_analysis" and job["arxiv_id"] == arxiv_id:
+                return self.get(job["id"])
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": "deep_analysis",
+            "arxiv_id": arxiv_id,
+            "priority": priority,
+            "status": "queued",
+            "stage": None,
+            "stages": {},
+            "progress": {},
+            "result": None,
+            "attempts": 0,
+            "error": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._launch(job)
+        print(f"📋 Job {job['id']} queued: deep analysis of {arxiv_id} ({priority})")
+        return self.get(job["id"])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return job_store.load_job(job_id)
+        return {**job, "stages": {stage: dict(info) for stage, info in job["stages"].items()}}
+
+    def list(self, status: Optional[str] = None, arxiv_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Jobs, newest first, optionally filtered by status or paper."""
+        # Active jobs may have changes that are still being written
+        return [
+            self.get(job["id"]) if job["id"] in self.jobs else job
+            for job in job_store.list_jobs(status, arxiv_id, limit)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Workers, running and waiting runs per pipeline stage, job counts per status."""
+        return {"stages": pipeline.stage_stats(), "jobs": job_store.count_by_status()}
+
+    def _launch(self, job: Dict[str, Any]):
+        job.update({"status": "queued", "stage": None})
+        self.jobs[job["id"]] = job
+        self._persist(job)
+        task = asyncio.create_task(self._run(job), name=f"job-{job['id']}")
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda done, job_id=job["id"]: self._tasks.pop(job_id, None))
+
+    async def _run(self, job: Dict[str, Any]):
+        if job.get("kind") == "deep_analysis":
+            await self._run_deep_analysis(job)
+            return
+
+        def on_event(event: Dict[str, Any]):
+            if event["event"] == "plan":
+                job["stages"] = event["stages"]
+            else:
+                info = {key: value for key, value in event.items() if key not in ("event", "arxiv_id", "stage")}
+                job["stages"][event["stage"]] = info
+                if info["status"] == "running":
+                    job["status"] = "running"
+                    job["stage"] = event["stage"]
+                    job["started_at"] = job["started_at"] or _now()
+            self._persist(job)
+
+        force = job["force"]
+        if force and job.get("attempts") and job["stages"]:
+            # Resumed forced job: stages finished before the restart are already fresh
+            force = [stage for stage, info in job["stages"].items() if info.get("status") != "done"]
+        job["attempts"] = job.get("attempts", 0) + 1
+
+        try:
+            # Jobs stored before priorities existed run as prefetch
+            with scheduler.priority(job.get("priority", "prefetch")):
+                result = await pipeline.run_paper(
+                    job["arxiv_id"],
+                    job["targets"],
+                    force=force,
+                    mode=job["mode"],
+                    arxiv_url=job["arxiv_url"],
+                    on_event=on_event
+                )
+        except Exception as e:
+            await self._finish(job, "failed", str(e))
+            print(f"❌ Job {job['id']} failed: {e}")
+            return
+
+        if result["success"]:
+            await self._finish(job, "completed")
+            print(f"✅ Job {job['id']} completed ({job['arxiv_id']}) in {result['seconds']}s")
+            return
+        failed = next(
+            stage for stage, info in result["stages"].items()
+            if info["status"] == "failed" or (stage in job["targets"] and info["status"] not in pipeline.OK_STATUSES)
+        )
+        error = result["stages"][failed].get("error", "did not complete")
+        await self._finish(job, "failed", f"{failed}: {error}")
+        print(f"❌ Job {job['id']} failed at {failed}: {error}")
+
+    async def _run_deep_analysis(self, job: Dict[str, Any]):
+        def on_progress(progress: Dict[str, Any]):
+            job["progress"] = progress
+            self._persist(job)
+
+        job["attempts"] = job.get("attempts", 0) + 1
+        job.update({"status": "running", "stage": "deep_analysis", "started_at": job["started_at"] or _now()})
+        self._persist(job)
+        # Transient failures are retried like pipeline stages; each retry
+        # resumes from the saved progress
+        for attempt in range(1, max(pipeline.RETRY_ATTEMPTS, 1) + 1):
+            try:
+                with scheduler.priority(job.get("priority", "prefetch")):
+                    result = await deep_analysis.analyze_deeply(job["arxiv_id"], job["progress"], on_progress)
+                error = None if result["success"] else RuntimeError(result["error"])
+            except Exception as e:
+                error = e
+            if error is None:
+                break
+            if attempt < pipeline.RETRY_ATTEMPTS and pipeline.is_transient(error):
+                delay = pipeline.retry_delay(attempt)
+                print(f"🔁 Job {job['id']}: deep analysis failed ({error}), retrying in {delay:.1f}s")
+                job.update({"error": str(error), "retry_in_seconds": round(delay, 1)})
+                self._persist(job)
+                await asyncio.sleep(delay)
+                continue
+            job.pop("retry_in_seconds", None)
+            await self._finish(job, "failed", str(error))
+            print(f"❌ Job {job['id']} failed: {error}")
+            return
+
+        job.pop("retry_in_seconds", None)
+        job["result"] = {key: result[key] for key in ("csv_file", "relevant", "applications")}
+        await self._finish(job, "completed")
+        print(f"✅ Job {job['id']} completed (deep analysis of {job['arxiv_id']})")
+
+    def _persist(self, job: Dict[str, Any]):
+        """Save the job without blocking the event loop."""
+        self._dirty.add(job["id"])
+        if job["id"] not in self._writers:
+            self._writers[job["id"]] = asyncio.create_task(self._write(job))
+
+    async def _write(self, job: Dict[str, Any]):
+        # Snapshots are taken on the loop and written one at a time, so the
+        # store never goes back to an older state of the job
+        try:
+            while job["id"] in self._dirty:
+                self._dirty.discard(job["id"])
+                await asyncio.to_thread(job_store.save_job, copy.deepcopy(job))
+        finally:
+            self._writers.pop(job["id"], None)
+
+    async def _finish(self, job: Dict[str, Any], status: str, error: Optional[str] = None):
+        job.update({"status": status, "error": error, "finished_at": _now()})
+        self._persist(job)
+        # Finished jobs are read back from the store
+        await asyncio.shield(self._writers[job["id"]])
+        self.jobs.pop(job["id"], None)
+
+
+job_queue = JobQueue()
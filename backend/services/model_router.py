@@ -0,0 +1,243 @@
+"""
+Cascading model routing for structured-output calls.
+
+Each task has a cascade of models, cheapest first. A call goes to the first
+model; it escalates to the next one only when the structured output is
+missing or invalid, or a quality check flags the result (e.g. benchmarks
+without a source quote, no application ideas). Rate limits, timeouts and
+other API errors are raised to the caller, whose retry and backoff handle
+them; a bigger model wouldn't help. Every routing decision is appended to
+data/cache/routing.jsonl in the background.
+
+Cascades are comma-separated model IDs, configurable per task:
+    ANALYSIS_MODEL_CASCADE=gpt-5-mini,gpt-5.2
+"""
+import os
+import json
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple, Iterable
+
+import openai
+
+from .models import PaperAnalysis, PaperSections, PaperSectionSpans, SectionNotes, RelevanceDecision, RelevanceBatch
+from . import cache_service, usage_ledger
+from .append_log import AppendLog
+
+
+def _cascade(env_name: str, default: str) -> List[str]:
+    return [model.strip() for model in os.getenv(env_name, default).split(",") if model.strip()]
+
+
+CASCADES: Dict[str, List[str]] = {
+    "analysis": _cascade("ANALYSIS_MODEL_CASCADE", "gpt-5-mini,gpt-5.2"),
+    "sections": _cascade("SECTIONS_MODEL_CASCADE", "gpt-5-nano,gpt-5-mini"),
+    "relevance": _cascade("RELEVANCE_MODEL_CASCADE", "gpt-5-nano,gpt-5-mini"),
+}
+
+ROUTING_LOG_FILE = cache_service.CACHE_DIR / "routing.jsonl"
+
+# Errors that mean the output itself was unusable; a larger model may do better.
+# Anything else (rate limits, timeouts, connection and server errors) is raised.
+ESCALATE_ON = (
+    ValueError,  # no structured output, pydantic ValidationError, bad JSON
+    openai.LengthFinishReasonError,
+    openai.ContentFilterFinishReasonError,
+)
+
+_routing_log = AppendLog("routing log")
+
+
+def cascade_for(task: str, model_id: Optional[str] = None) -> List[str]:
+    """Models to try for a task; an explicit model_id pins the call to that model."""
+    return [model_id] if model_id else list(CASCADES[task])
+
+
+def cascade_label(models: List[str]) -> str:
+    """Stable name for a cascade, used where a single model ID used to be (cache keys, CSVs)."""
+    return ">".join(models)
+
+
+# Quality checks: return a list of issues, empty when the output is acceptable.
+# Issues are short fixed strings so they can be counted across the routing log.
+
+def analysis_issues(analysis: PaperAnalysis, check_benchmarks: bool = True) -> List[str]:
+    issues = []
+    if not analysis.summary.applications:
+        issues.append("no applications")
+    if not analysis.novelty.proposed_delta.strip() or not analysis.novelty.novelty_summary.strip():
+        issues.append("empty novelty")
+    if not analysis.summary.main_contribution.strip() or not analysis.summary.methodology.strip():
+        issues.append("empty summary")
+    if check_benchmarks and any(not benchmark.source_quote.strip() for benchmark in analysis.benchmarks):
+        issues.append("benchmark without source_quote")
+    return issues
+
+
+def section_notes_issues(notes: SectionNotes) -> List[str]:
+    if any(not benchmark.source_quote.strip() for benchmark in notes.benchmarks):
+        return ["benchmark without source_quote"]
+    return []
+
+
+def section_spans_issues(spans: PaperSectionSpans, line_count: int) -> List[str]:
+    issues = []
+    if not spans.spans:
+        return ["no spans"]
+    found = {span.section for span in spans.spans}
+    if not found & {"methodology", "experiments"}:
+        issues.append("no methodology or experiments span")
+    if any(
+        span.start_line < 1 or span.end_line > line_count or span.start_line > span.end_line
+        for span in spans.spans
+    ):
+        issues.append("span out of range")
+    return issues
+
+
+def sections_issues(sections: PaperSections) -> List[str]:
+    if not sections.methodology_text.strip() and not sections.experiments_text.strip():
+        return ["empty methodology and experiments"]
+    return []
+
+
+def relevance_issues(decision: RelevanceDecision) -> List[str]:
+    return [] if decision.reasoning.strip() else ["empty reasoning"]
+
+
+def relevance_batch_issues(batch: RelevanceBatch, requested: Iterable[str]) -> List[str]:
+    missing = set(requested) - {decision.paper_id for decision in batch.decisions}
+    issues = ["candidate without a decision"] if missing else []
+    if any(not decision.reasoning.strip() for decision in batch.decisions):
+        issues.append("empty reasoning")
+    return issues
+
+
+def _log_decision(entry: Dict[str, Any]):
+    try:
+        _routing_log.append(ROUTING_LOG_FILE, json.dumps(entry, ensure_ascii=False))
+    except Exception as e:
+        print(f"Error writing routing log: {e}")
+
+
+async def run_cascade(
+    task: str,
+    models: List[str],
+    call: Callable[[str], Awaitable[Any]],
+    check: Optional[Callable[[Any], List[str]]] = None
+) -> Tuple[Any, List[Any], Dict[str, Any]]:
+    """
+    Run a structured-output call down a model cascade.
+
+    Args:
+        task: Task name for the routing log ("analysis", "sections", ...)
+        models: Models to try in order
+        call: Coroutine function taking a model ID and returning a parsed response
+        check: Quality check on response.output_parsed, returning a list of issues
+
+    Returns:
+        Tuple of (accepted response, every successful response for usage
+        accounting, routing summary). When no model passes the checks, the
+        response with the fewest issues is returned.
+
+    Raises:
+        The last error if every model failed outright, or an API error
+        (rate limit, timeout, ...) as soon as it happens unless an earlier
+        model already returned a usable response
+    """
+    attempts: List[Dict[str, Any]] = []
+    responses: List[Any] = []
+    best = None
+    best_issues: Optional[List[str]] = None
+    last_error: Optional[Exception] = None
+
+    for index, model in enumerate(models):
+        started = time.perf_counter()
+        try:
+            response = await call(model)
+            if response.output_parsed is None:
+                raise ValueError("no structured output (refusal or truncated response)")
+            issues = check(response.output_parsed) if check else []
+        except Exception as e:
+            attempts.append({"model": model, "error": str(e), "latency_seconds": round(time.perf_counter() - started, 3)})
+            last_error = e
+            if not isinstance(e, ESCALATE_ON):
+                # Not the model's fault: stop here and let the caller retry
+                break
+            if index + 1 < len(models):
+                print(f"⤴️ {task}: {model} failed ({e}), escalating to {models[index + 1]}")
+            continue
+
+        responses.append(response)
+        attempts.append({"model": model, "issues": issues, "latency_seconds": round(time.perf_counter() - started, 3)})
+        # Ties go to the later (larger) model
+        if best_issues is None or len(issues) <= len(best_issues):
+            best, best_issues = response, issues
+        if not issues:
+            break
+        if index + 1 < len(models):
+            print(f"⤴️ {task}: {model} output flagged ({'; '.join(issues)}), escalating to {models[index + 1]}")
+
+    routing = {
+        "task": task,
+        "cascade": models,
+        "chosen": best.model if best is not None else None,
+        "escalations": len(attempts) - 1,
+        "accepted": best_issues == [] if best is not None else False,
+        "attempts": attempts,
+    }
+    _log_decision({
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **usage_ledger.current_context(),
+        **routing,
+    })
+
+    if best is None:
+        raise last_error
+    if best_issues:
+        print(f"⚠️ {task}: no model passed quality checks, keeping {best.model} ({'; '.join(best_issues)})")
+    return best, responses, routing
+
+
+def routing_stats(since: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Summarize the routing log per task: how often calls escalated, which
+    models ended up serving them and the most common quality issues.
+    """
+    tasks: Dict[str, Dict[str, Any]] = {}
+    _routing_log.flush()
+    if ROUTING_LOG_FILE.exists():
+        with open(ROUTING_LOG_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since and entry.get("timestamp", "") < since:
+                    continue
+                stats = tasks.setdefault(entry["task"], {
+                    "calls": 0, "escalated": 0, "unaccepted": 0, "chosen": Counter(), "issues": Counter()
+                })
+                stats["calls"] += 1
+                stats["escalated"] += entry.get("escalations", 0) > 0
+                stats["unaccepted"] += not entry.get("accepted")
+                stats["chosen"][entry.get("chosen")] += 1
+                for attempt in entry.get("attempts", []):
+                    for issue in attempt.get("issues", []):
+                        stats["issues"][issue] += 1
+                    if attempt.get("error"):
+                        stats["issues"]["error"] += 1
+
+    return {
+        task: {
+            "calls": stats["calls"],
+            "escalated": stats["escalated"],
+            "escalation_rate": round(stats["escalated"] / stats["calls"], 4),
+            "unaccepted": stats["unaccepted"],
+            "chosen": dict(stats["chosen"]),
+            "top_issues": dict(stats["issues"].most_common(5)),
+            "cascade": CASCADES.get(task.split(":")[0]),
+        }
+        for task, stats in tasks.items()
+    }
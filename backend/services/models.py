@@ -1,4 +1,4 @@
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Literal
 from pydantic import BaseModel, Field, model_validator
 
 
@@ -86,6 +86,20 @@ class PaperSections(BaseModel):
 GitHub: {self.github_url or 'Not found'}
 """
 
+class SectionSpan(BaseModel):
+    section: Literal["abstract", "introduction", "contributions", "methodology", "experiments", "conclusion"] = Field(..., description="Which logical section this line range belongs to.")
+    start_line: int = Field(..., description="Line number (the N in 'LN:') where this part starts.")
+    end_line: int = Field(..., description="Line number (the N in 'LN:') where this part ends, inclusive.")
+
+class PaperSectionSpans(BaseModel):
+    """
+    Section boundaries only. The backend slices the text out of the original
+    markdown, so the model never has to copy the paper back verbatim.
+    """
+    title: str = Field(..., description="The exact title of the paper.")
+    github_url: Optional[str] = Field(None, description="The HTTP URL to the code repository (GitHub/GitLab) if mentioned.")
+    spans: List[SectionSpan] = Field(..., description="Line ranges for each section. A section may have several ranges (e.g. Introduction and Related Work).")
+
 class PaperAnalysis(BaseModel):
     paper_title: str = Field(..., description="The exact title of the research paper.")
     
@@ -98,6 +112,16 @@ class PaperAnalysis(BaseModel):
     github_repo: str = Field(..., description="Attached repository address containing the code created alongside this paper.")
     benchmarks: List[BenchmarkResult] = Field(..., description="List of all quantitative benchmarks found in tables or text.")
 
+class SectionNotes(BaseModel):
+    """
+    Map-step output for one part of a long paper; merged into a PaperAnalysis later.
+    """
+    key_points: List[str] = Field(..., description="The most important technical statements in this part, one sentence each.")
+    novelty_notes: str = Field(..., description="What this part says about the problem with prior work and what the authors change. Empty if nothing.")
+    limitations: str = Field(..., description="Limitations or future work mentioned in this part. Empty if nothing.")
+    code_urls: List[str] = Field(..., description="Code repository or project page URLs mentioned in this part.")
+    benchmarks: List[BenchmarkResult] = Field(..., description="All quantitative benchmark results stated in this part.")
+
 class RelevanceDecision(BaseModel):
     is_relevant: bool = Field(
         ..., 
@@ -108,6 +132,12 @@ class RelevanceDecision(BaseModel):
         description="A single sentence explaining why it is relevant or why it was rejected."
     )
 
+class KeyedRelevanceDecision(RelevanceDecision):
+    paper_id: str = Field(..., description="The ID of the candidate paper this decision refers to, copied exactly from the input.")
+
+class RelevanceBatch(BaseModel):
+    decisions: List[KeyedRelevanceDecision] = Field(..., description="Exactly one decision per candidate paper.")
+
 class ImplementationStep(BaseModel):
     phase: str = Field(..., description="Phase name (e.g., 'Prototype', 'Scaling').")
     action_items: List[str] = Field(..., description="Specific technical tasks.")
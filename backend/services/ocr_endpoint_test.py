@@ -1,12 +1,7 @@
-import requests
-from pdf2image import convert_from_path
-import os
-
-
 import requests
 import os
 import time
-from pdf2image import convert_from_path
+import fitz  # PyMuPDF
 
 def pdf_to_markdown(pdf_path: str, server_url: str = "http://localhost:8080/v1/chat/completions") -> str:
     """
@@ -20,16 +15,16 @@ def pdf_to_markdown(pdf_path: str, server_url: str = "http://localhost:8080/v1/c
     print(f"📖 Loading PDF: {pdf_path}...")
     
     try:
-        pages = convert_from_path(pdf_path, dpi=180)
+        doc = fitz.open(pdf_path)
     except Exception as e:
-        raise RuntimeError(f"Failed to convert PDF. Is Poppler installed and in PATH? Error: {e}")
+        raise RuntimeError(f"Failed to open PDF. Error: {e}")
 
     full_markdown = []
-    total_pages = len(pages)
+    total_pages = len(doc)
     print(f"📄 Found {total_pages} pages. Starting OCR processing...\n")
 
     # 3. Iterate through pages
-    for i, page_image in enumerate(pages):
+    for i, page in enumerate(doc):
         page_num = i + 1
         
         # Create a temp filename for this page
@@ -38,7 +33,7 @@ def pdf_to_markdown(pdf_path: str, server_url: str = "http://localhost:8080/v1/c
         abs_temp_path = os.path.abspath(temp_filename)
         
         # Save image locally
-        page_image.save(abs_temp_path, "JPEG")
+        page.get_pixmap(dpi=180).save(abs_temp_path)
 
         # --- PATH TRANSLATION (Windows -> WSL) ---
         # The server (WSL) cannot read "C:\Users...", it needs "/mnt/c/Users..."
@@ -1,37 +1,156 @@
 import os
-from openai import OpenAI
-from typing import Optional, Dict, Any
-from .models import PaperAnalysis, RelevanceDecision, ApplicationIdea, PaperSections
+import asyncio
+import hashlib
+import json
+import time
+import httpx
+import jiter
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from .models import (
+    PaperAnalysis, RelevanceDecision, RelevanceBatch, ApplicationIdea,
+    PaperSections, PaperSectionSpans, SectionNotes, BenchmarkResult
+)
+from .section_segmenter import segment_markdown, number_lines, sections_from_spans, MIN_LOCAL_CONFIDENCE
+from . import cache_service, usage_ledger, model_router, scheduler
+
+# Client settings (seconds / connection counts)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "180"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# Papers above this estimated size are summarized with map-reduce instead of one call
+SUMMARY_MAP_REDUCE_THRESHOLD = int(os.getenv("SUMMARY_MAP_REDUCE_THRESHOLD", "60000"))
+# Estimated input tokens per map call
+SUMMARY_MAP_CHUNK_TOKENS = int(os.getenv("SUMMARY_MAP_CHUNK_TOKENS", "20000"))
+
+# Input token budget for one batched relevance call (estimated as chars / 4)
+RELEVANCE_BATCH_MAX_TOKENS = int(os.getenv("RELEVANCE_BATCH_MAX_TOKENS", "8000"))
+# Relevance calls (batched and single-paper fallbacks) in flight at once
+RELEVANCE_CONCURRENCY = int(os.getenv("RELEVANCE_CONCURRENCY", "8"))
+_relevance_semaphore = asyncio.Semaphore(RELEVANCE_CONCURRENCY)
+
+RELEVANCE_SYSTEM_PROMPT = """
+        You are a strict Research Curator. 
+        Your task is to filter academic papers for a specific engineering application.
+        
+        Criteria for Relevance:
+        1. Does this paper propose a method, model, or dataset useful for the target application?
+        2. Is it technically aligned (e.g., if the app is Computer Vision, reject pure NLP papers unless multimodal)?
+        
+        Output a boolean decision and a one-sentence justification.
+        """
+
+RELEVANCE_BATCH_INSTRUCTIONS = """
+        You will receive several candidate papers, each with a paper_id.
+        Judge every candidate independently and return exactly one decision per candidate,
+        with paper_id copied exactly from the input.
+        """
+
+# Message order is static instructions, then the application, then the
+# paper(s): every check for one application shares the longest possible prefix
+RELEVANCE_APPLICATION_TEMPLATE = """
+        Target Application (JSON): 
+        {application}
+        """
+
+RELEVANCE_CANDIDATE_TEMPLATE = """
+        Candidate Paper:
+        - Title: {title}
+        - Abstract: {abstract}
+        """
+
+RELEVANCE_CANDIDATES_TEMPLATE = """
+        Candidate Papers (JSON):
+        {candidates}
+        """
+
+# Cached relevance decisions are keyed on this, so editing the prompts or the
+# decision schemas (single and batched) invalidates old entries automatically
+RELEVANCE_PROMPT_VERSION = hashlib.sha256(
+    (
+        RELEVANCE_SYSTEM_PROMPT
+        + RELEVANCE_BATCH_INSTRUCTIONS
+        + RELEVANCE_APPLICATION_TEMPLATE
+        + RELEVANCE_CANDIDATE_TEMPLATE
+        + RELEVANCE_CANDIDATES_TEMPLATE
+        + json.dumps(RelevanceDecision.model_json_schema(), sort_keys=True)
+        # Includes KeyedRelevanceDecision through its $defs
+        + json.dumps(RelevanceBatch.model_json_schema(), sort_keys=True)
+    ).encode('utf-8')
+).hexdigest()[:12]
 
 # Global client variable
-_client: Optional[OpenAI] = None
+_client: Optional[AsyncOpenAI] = None
 
-def get_openai_client() -> OpenAI:
-    """Get or create OpenAI client instance."""
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Get or create the shared AsyncOpenAI client instance.
+    All calls share one connection pool, so concurrent analyses overlap
+    instead of blocking the event loop.
+    """
     global _client
     if _client is None:
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
-        _client = OpenAI(api_key=api_key)
+        _client = AsyncOpenAI(
+            api_key=api_key,
+            timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+                )
+            ),
+        )
     return _client
 
-async def summarize_paper(markdown_text: str, model_id: str = "gpt-5.2") -> Dict[str, Any]:
+def _usage_record(*responses) -> Dict[str, Any]:
     """
-    Summarize a research paper using Structured Outputs.
-    
-    Args:
-        markdown_text: The full paper text in markdown format.
-        
-    Returns:
-        dict: A dictionary representation of the PaperAnalysis model.
+    Token usage summed over one or more responses, including prompt-cache hits
+    (input tokens the provider served from its prefix cache).
+    """
+    def cached_tokens(usage) -> int:
+        details = getattr(usage, "input_tokens_details", None)
+        return getattr(details, "cached_tokens", 0) or 0
+
+    record = {
+        "model": responses[-1].model,
+        "input_tokens": sum(r.usage.input_tokens for r in responses),
+        "cached_input_tokens": sum(cached_tokens(r.usage) for r in responses),
+        "output_tokens": sum(r.usage.output_tokens for r in responses),
+    }
+    if record["cached_input_tokens"]:
+        print(f"💾 Prompt cache: {record['cached_input_tokens']}/{record['input_tokens']} input tokens cached")
+    return record
+
+async def _tracked_parse(client: AsyncOpenAI, caller: str, **kwargs):
+    """
+    client.responses.parse in an OpenAI slot of the current priority class,
+    recording tokens, latency and failures in the usage ledger.
     """
+    started = time.perf_counter()
     try:
-        print("🤖 Starting LLM analysis...")
-        client = get_openai_client()
-        
-        # We use a multi-step prompt strategy within the system message
-        system_prompt = """
+        async with scheduler.openai_limiter.slot():
+            response = await client.responses.parse(**kwargs)
+    except Exception as e:
+        usage_ledger.record_call(caller, kwargs.get("model"), None, time.perf_counter() - started, error=str(e))
+        raise
+    usage_ledger.record_call(caller, response.model, response.usage, time.perf_counter() - started)
+    return response
+
+# Prompts are shared with services/batch_analysis.py so batched and
+# interactive requests are identical. Each prompt is a static prefix
+# (instructions, then the schema via text_format) followed by the variable
+# content, and requests of one kind share a prompt_cache_key so the provider
+# routes them to the same prefix cache.
+
+# We use a multi-step prompt strategy within the system message
+ANALYSIS_SYSTEM_PROMPT = """
         You are an expert AI Research Scientist. Your goal is to extract structured knowledge from academic papers.
         
         Follow this reasoning process:
@@ -41,14 +160,243 @@ async def summarize_paper(markdown_text: str, model_id: str = "gpt-5.2") -> Dict
         4. **Verify**: For every number you extract, find the exact quote/location in the text.
         """
 
-        # Using OpenAI's native Structured Outputs (beta.chat.completions.parse)
-        response = client.responses.parse(
-            model=model_id, 
+# The prompt is simple and instructional, focusing on "Segmentation" not "Reasoning"
+SECTIONS_VERBATIM_SYSTEM_PROMPT = """
+    You are a Research Assistant. Your job is to organize raw OCR markdown into logical sections.
+    
+    Rules:
+    1. **Extract Verbatim**: Do not summarize. Copy the text exactly as it appears in the sections.
+    2. **Isolate Contributions**: Look specifically for the "Our contributions are..." or "In summary..." list at the end of the Introduction. Extract this text into `contributions_text`.
+    3. **Group Smartly**: 
+       - Put "Related Work" into `introduction_text`.
+       - Put "Ablation Studies" into `experiments_text`.
+    4. **Find the Code**: Aggressively search for a GitHub or project page URL.
+    5. **Ignore Noise**: Do not extract References, Citations lists, or Appendix unless it contains critical results.
+    """
+
+SECTION_SPANS_SYSTEM_PROMPT = """
+    You are a Research Assistant. Your job is to find the logical sections of raw OCR markdown.
+    Every input line is prefixed with its line number as "LN:".
+    
+    Rules:
+    1. **Return Line Ranges Only**: For each section give start_line and end_line. Never copy text.
+    2. **Isolate Contributions**: The "Our contributions are..." or "In summary..." list at the end of the Introduction is its own `contributions` range.
+    3. **Group Smartly**: 
+       - Put "Related Work" into `introduction`.
+       - Put "Ablation Studies" into `experiments`.
+    4. **Find the Code**: Aggressively search for a GitHub or project page URL.
+    5. **Ignore Noise**: Do not include References, Citations lists, or Appendix unless it contains critical results.
+    """
+
+
+def analysis_input(markdown_text: str) -> List[Dict[str, str]]:
+    """Responses API input for a PaperAnalysis request."""
+    return [
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Analyze this paper:\n\n{markdown_text}"}
+    ]
+
+
+def section_spans_input(raw_markdown: str) -> List[Dict[str, str]]:
+    """Responses API input for a PaperSectionSpans request (line-numbered markdown)."""
+    return [
+        {"role": "system", "content": SECTION_SPANS_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Find the sections of this raw paper text:\n\n{number_lines(raw_markdown)}"}
+    ]
+
+
+MAP_SYSTEM_PROMPT = """
+        You are an expert AI Research Scientist reading one part of a long academic paper.
+        Take notes that will later be merged with notes from the other parts.
+        
+        Rules:
+        1. Only report what this part actually says; leave fields empty otherwise.
+        2. For benchmarks, ONLY mark results that clearly belong to THIS paper's method as `is_this_paper_result=True`; baselines are False.
+        3. Every benchmark needs the exact quote or table row it came from in `source_quote`.
+        """
+
+REDUCE_SYSTEM_PROMPT = ANALYSIS_SYSTEM_PROMPT + """
+        The paper was too long to read at once. You get its abstract, the authors'
+        stated contributions, and notes taken from each part. Build the analysis from them.
+        Leave `benchmarks` empty; they are collected separately from the notes.
+        """
+
+
+def _split_text_by_tokens(text: str, max_tokens: int) -> List[str]:
+    """Split text on paragraph boundaries into chunks of at most max_tokens (estimated)."""
+    max_chars = max_tokens * 4
+    chunks: List[str] = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        # Paragraphs larger than a chunk are cut hard
+        pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)] or [""]
+        for piece in pieces:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def _map_parts(markdown_text: str, sections: Optional[PaperSections]) -> List[Tuple[str, str]]:
+    """
+    (label, text) parts for the map step, using sections when available.
+    Falls back to plain chunks of the markdown when the sections are empty.
+    """
+    if sections is None:
+        return [
+            (f"Part {i}", chunk)
+            for i, chunk in enumerate(_split_text_by_tokens(markdown_text, SUMMARY_MAP_CHUNK_TOKENS), start=1)
+            if chunk.strip()
+        ]
+    parts = []
+    for label, text in (
+        ("Introduction & Context", sections.introduction_text),
+        ("Methodology", sections.methodology_text),
+        ("Experiments & Results", sections.experiments_text),
+        ("Conclusion & Limitations", sections.conclusion_text),
+    ):
+        chunks = _split_text_by_tokens(text, SUMMARY_MAP_CHUNK_TOKENS) if text.strip() else []
+        for i, chunk in enumerate(chunks, start=1):
+            parts.append((label if len(chunks) == 1 else f"{label} ({i}/{len(chunks)})", chunk))
+    return parts or _map_parts(markdown_text, None)
+
+
+async def _summarize_map_reduce(
+    client: AsyncOpenAI,
+    markdown_text: str,
+    sections: Optional[PaperSections],
+    models: List[str]
+) -> Dict[str, Any]:
+    """
+    Analyze parts of a long paper in parallel, then merge the notes into one PaperAnalysis.
+    Benchmarks come straight from the map notes so the reduce call stays small.
+    Every map and reduce call runs down the model cascade independently.
+    """
+    parts = _map_parts(markdown_text, sections)
+    if not parts:
+        # No reduce call over empty notes
+        return {"success": False, "data": None, "usage": None, "error": "Paper has no text to analyze"}
+    print(f"🗺️ Map-reduce analysis over {len(parts)} parts")
+
+    async def map_part(label: str, text: str):
+        return await model_router.run_cascade(
+            "analysis:map", models,
+            lambda model: _tracked_parse(
+                client, "summarize_paper:map",
+                model=model,
+                input=[
+                    {"role": "system", "content": MAP_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Paper part: {label}\n\n{text}"}
+                ],
+                text_format=SectionNotes,
+                prompt_cache_key="paper-map",
+            ),
+            check=model_router.section_notes_issues
+        )
+
+    map_results = await asyncio.gather(*(map_part(label, text) for label, text in parts))
+    notes = [(label, response.output_parsed) for (label, _), (response, _, _) in zip(parts, map_results)]
+    map_responses = [response for _, responses, _ in map_results for response in responses]
+
+    if sections is not None:
+        header = (
+            f"# {sections.title}\n\n## Abstract\n{sections.abstract_text}\n\n"
+            f"## Authors' Stated Contributions\n{sections.contributions_text}\n\n"
+            f"GitHub: {sections.github_url or 'Not found'}\n"
+        )
+    else:
+        header = _split_text_by_tokens(markdown_text, 2000)[0]
+    notes_json = json.dumps(
+        [{"part": label, **note.model_dump(exclude={"benchmarks"})} for label, note in notes],
+        indent=2, ensure_ascii=False
+    )
+
+    reduce_response, reduce_responses, routing = await model_router.run_cascade(
+        "analysis:reduce", models,
+        lambda model: _tracked_parse(
+            client, "summarize_paper:reduce",
+            model=model,
             input=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Analyze this paper:\n\n{markdown_text}"}
+                {"role": "system", "content": REDUCE_SYSTEM_PROMPT},
+                {"role": "user", "content": f"{header}\n\n## Notes per part (JSON)\n{notes_json}"}
             ],
             text_format=PaperAnalysis,
+            prompt_cache_key="paper-reduce",
+        ),
+        # Benchmarks are replaced by the ones from the map notes below
+        check=lambda analysis: model_router.analysis_issues(analysis, check_benchmarks=False)
+    )
+    analysis: PaperAnalysis = reduce_response.output_parsed
+
+    # Merge benchmarks from every part, dropping repeats of the same result
+    seen = set()
+    benchmarks = []
+    for _, note in notes:
+        for benchmark in note.benchmarks:
+            key = (benchmark.name.lower(), benchmark.metric.lower(), benchmark.score, benchmark.is_this_paper_result)
+            if key not in seen:
+                seen.add(key)
+                benchmarks.append(benchmark)
+    analysis.benchmarks = benchmarks
+
+    return {
+        "success": True,
+        "data": analysis.model_dump(exclude={"analysis_thought_process"}),
+        "usage": {
+            **_usage_record(*map_responses, *reduce_responses),
+            "model": reduce_response.model,
+            "calls": len(map_responses) + len(reduce_responses),
+            "strategy": "map_reduce",
+            "routing": routing
+        }
+    }
+
+
+async def summarize_paper(
+    markdown_text: str,
+    model_id: Optional[str] = None,
+    sections: Optional[PaperSections] = None
+) -> Dict[str, Any]:
+    """
+    Summarize a research paper using Structured Outputs.
+    
+    Papers estimated above SUMMARY_MAP_REDUCE_THRESHOLD tokens are analyzed
+    part by part in parallel and merged, keeping every call bounded.
+    
+    Args:
+        markdown_text: The full paper text in markdown format.
+        model_id: OpenAI model ID to use; None runs the "analysis" model cascade,
+                  escalating when the output fails quality checks
+        sections: Cleaned sections, used to split long papers along section boundaries
+        
+    Returns:
+        dict: A dictionary representation of the PaperAnalysis model.
+    """
+    models = model_router.cascade_for("analysis", model_id)
+    try:
+        client = get_openai_client()
+        
+        estimated_tokens = _estimate_tokens(markdown_text)
+        if estimated_tokens > SUMMARY_MAP_REDUCE_THRESHOLD:
+            print(f"🤖 Starting map-reduce LLM analysis (~{estimated_tokens} tokens)...")
+            return await _summarize_map_reduce(client, markdown_text, sections, models)
+        
+        print("🤖 Starting LLM analysis...")
+        
+        # Using OpenAI's native Structured Outputs (beta.chat.completions.parse)
+        response, responses, routing = await model_router.run_cascade(
+            "analysis", models,
+            lambda model: _tracked_parse(
+                client, "summarize_paper",
+                model=model,
+                input=analysis_input(markdown_text),
+                text_format=PaperAnalysis,
+                prompt_cache_key="paper-analysis",
+            ),
+            check=model_router.analysis_issues
         )
         
         # The SDK automatically validates and parses the JSON into your Pydantic model
@@ -59,11 +407,7 @@ async def summarize_paper(markdown_text: str, model_id: str = "gpt-5.2") -> Dict
         return {
             "success": True,
             "data": analysis.model_dump(exclude={"analysis_thought_process"}), 
-            "usage": {
-                "model": response.model,
-                "input_tokens": response.usage.input_tokens,
-                "output_tokens": response.usage.output_tokens
-            }
+            "usage": {**_usage_record(*responses), "model": response.model, "routing": routing}
         }
     
     except Exception as e:
@@ -74,46 +418,267 @@ async def summarize_paper(markdown_text: str, model_id: str = "gpt-5.2") -> Dict
             "error": str(e)
         }
 
-async def extract_paper_sections(raw_markdown: str, model_id: str = "gpt-5-nano") -> PaperSections:
+
+# Seconds between "partial" events for the field currently being generated
+ANALYSIS_PARTIAL_INTERVAL = float(os.getenv("ANALYSIS_PARTIAL_INTERVAL", "0.5"))
+
+# Validators for each top-level PaperAnalysis field, used while streaming
+_ANALYSIS_FIELD_ADAPTERS = {
+    name: TypeAdapter(field.annotation)
+    for name, field in PaperAnalysis.model_fields.items()
+}
+_STREAM_HIDDEN_FIELDS = {"analysis_thought_process"}
+
+
+def _completed_stream_events(partial: Dict[str, Any], emitted: set, benchmarks_sent: int, final: bool):
     """
-    Uses a fast, cheap model to segment the paper and discard noise (References, Appendix).
+    Work out which parts of a partially parsed PaperAnalysis are finished.
+
+    Strict structured outputs emit keys in schema order, so a top-level field
+    is complete once the next key has started; a benchmark is complete once the
+    next item has started. Everything is complete when the stream has ended.
+
+    Returns:
+        (events, benchmarks_sent) with events ready to yield
     """
-    print(f"🧹 Pre-processing with {model_id}...")
-    client = get_openai_client()
+    events = []
+    keys = list(partial.keys())
+    for position, name in enumerate(keys):
+        if name in emitted or name not in _ANALYSIS_FIELD_ADAPTERS:
+            continue
+        if name == "benchmarks":
+            items = partial[name] if isinstance(partial[name], list) else []
+            done = len(items) if final else max(len(items) - 1, 0)
+            for index in range(benchmarks_sent, done):
+                try:
+                    benchmark = BenchmarkResult.model_validate(items[index])
+                except ValidationError:
+                    # Should not happen with strict outputs; the final parse will tell
+                    break
+                events.append({"event": "benchmark", "index": index, "data": benchmark.model_dump()})
+                benchmarks_sent = index + 1
+            if final:
+                emitted.add(name)
+            continue
+        if not final and position == len(keys) - 1:
+            continue
+        try:
+            value = _ANALYSIS_FIELD_ADAPTERS[name].validate_python(partial[name])
+        except ValidationError:
+            if final:
+                raise
+            continue
+        emitted.add(name)
+        if name not in _STREAM_HIDDEN_FIELDS:
+            events.append({
+                "event": "field",
+                "field": name,
+                "data": value.model_dump() if isinstance(value, BaseModel) else value
+            })
+    return events, benchmarks_sent
 
-    # The prompt is simple and instructional, focusing on "Segmentation" not "Reasoning"
-    system_prompt = """
-    You are a Research Assistant. Your job is to organize raw OCR markdown into logical sections.
+
+async def stream_paper_analysis(
+    markdown_text: str,
+    model_id: Optional[str] = None,
+    sections: Optional[PaperSections] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of summarize_paper.
+
+    Yields events as the structured output is generated:
+    "field" (a validated top-level field such as novelty or summary),
+    "benchmark" (one validated BenchmarkResult), "partial" (unvalidated
+    preview of the field in progress, throttled) and finally "complete"
+    with the same dict summarize_paper returns. Papers above the map-reduce
+    threshold are not streamed; their fields are sent once the merge is done.
+
+    The first model of the cascade is streamed. If its output fails the
+    quality checks, "escalated" is sent, the next models run without
+    streaming, and all fields are sent again from the accepted result.
+
+    Args:
+        markdown_text: The full paper text in markdown format.
+        model_id: OpenAI model ID to use; None runs the "analysis" model cascade
+        sections: Cleaned sections, used by the map-reduce path
+    """
+    if _estimate_tokens(markdown_text) > SUMMARY_MAP_REDUCE_THRESHOLD:
+        result = await summarize_paper(markdown_text, model_id, sections)
+        if result.get("success"):
+            events, _ = _completed_stream_events(result["data"], set(), 0, final=True)
+            for event in events:
+                yield event
+        yield {"event": "complete", "result": result}
+        return
+
+    models = model_router.cascade_for("analysis", model_id)
+    emitted: set = set()
+    benchmarks_sent = 0
+    streamed = None
+    stream_error: Optional[Exception] = None
+
+    started = time.perf_counter()
+    try:
+        client = get_openai_client()
+        print(f"🤖 Starting streaming LLM analysis with {models[0]}...")
+        buffer = ""
+        last_partial = 0.0
+
+        # One OpenAI slot covers the whole stream
+        async with scheduler.openai_limiter.slot():
+            async with client.responses.stream(
+                model=models[0],
+                input=analysis_input(markdown_text),
+                text_format=PaperAnalysis,
+                prompt_cache_key="paper-analysis",
+            ) as stream:
+                async for event in stream:
+                    if event.type != "response.output_text.delta":
+                        continue
+                    buffer += event.delta
+                    try:
+                        partial = jiter.from_json(buffer.encode("utf-8"), partial_mode="trailing-strings")
+                    except ValueError:
+                        continue
+                    if not isinstance(partial, dict):
+                        continue
+
+                    events, benchmarks_sent = _completed_stream_events(partial, emitted, benchmarks_sent, final=False)
+                    for completed in events:
+                        yield completed
+
+                    now = time.monotonic()
+                    if partial and now - last_partial >= ANALYSIS_PARTIAL_INTERVAL:
+                        field = list(partial.keys())[-1]
+                        if field not in emitted and field not in _STREAM_HIDDEN_FIELDS:
+                            last_partial = now
+                            yield {"event": "partial", "field": field, "data": partial[field]}
+
+                streamed = await stream.get_final_response()
+        usage_ledger.record_call("summarize_paper:stream", streamed.model, streamed.usage, time.perf_counter() - started)
+
+    except Exception as e:
+        print(f"❌ Streaming analysis failed: {e}")
+        usage_ledger.record_call("summarize_paper:stream", models[0], None, time.perf_counter() - started, error=str(e))
+        stream_error = e
+
+    stream_pending = True
+
+    async def call(model: str):
+        nonlocal stream_pending
+        # The first cascade step is the stream that already ran
+        if stream_pending:
+            stream_pending = False
+            if stream_error is not None:
+                raise stream_error
+            return streamed
+        print(f"🤖 Escalating streamed analysis to {model}...")
+        return await _tracked_parse(
+            get_openai_client(), "summarize_paper",
+            model=model,
+            input=analysis_input(markdown_text),
+            text_format=PaperAnalysis,
+            prompt_cache_key="paper-analysis",
+        )
+
+    try:
+        response, responses, routing = await model_router.run_cascade(
+            "analysis", models, call, check=model_router.analysis_issues
+        )
+    except Exception as e:
+        yield {
+            "event": "complete",
+            "result": {"success": False, "data": None, "usage": None, "error": str(e)}
+        }
+        return
+
+    if response is not streamed:
+        # Fields sent so far came from a rejected output; resend everything
+        yield {"event": "escalated", "model": response.model}
+        emitted, benchmarks_sent = set(), 0
+
+    analysis: PaperAnalysis = response.output_parsed
+    data = analysis.model_dump(exclude={"analysis_thought_process"})
+    events, _ = _completed_stream_events(analysis.model_dump(), emitted, benchmarks_sent, final=True)
+    for completed in events:
+        yield completed
+
+    yield {
+        "event": "complete",
+        "result": {
+            "success": True,
+            "data": data,
+            "usage": {**_usage_record(*responses), "model": response.model, "routing": routing}
+        }
+    }
+
+async def extract_paper_sections(
+    raw_markdown: str,
+    model_id: Optional[str] = None,
+    min_local_confidence: Optional[float] = None,
+    output_mode: str = "spans"
+) -> PaperSections:
+    """
+    Segment the paper and discard noise (References, Appendix).
     
-    Rules:
-    1. **Extract Verbatim**: Do not summarize. Copy the text exactly as it appears in the sections.
-    2. **Isolate Contributions**: Look specifically for the "Our contributions are..." or "In summary..." list at the end of the Introduction. Extract this text into `contributions_text`.
-    3. **Group Smartly**: 
-       - Put "Related Work" into `introduction_text`.
-       - Put "Ablation Studies" into `experiments_text`.
-    4. **Find the Code**: Aggressively search for a GitHub or project page URL.
-    5. **Ignore Noise**: Do not extract References, Citations lists, or Appendix unless it contains critical results.
+    Tries the local heading-based segmenter first and only calls a fast,
+    cheap model when the local result is not confident enough.
+    
+    Args:
+        raw_markdown: Raw paper markdown
+        model_id: Model used when falling back to the LLM; None runs the
+                  "sections" model cascade
+        min_local_confidence: Minimum local confidence to skip the LLM
+                              (defaults to MIN_LOCAL_CONFIDENCE, > 1.0 forces the LLM)
+        output_mode: "spans" (model returns line ranges, text is sliced locally)
+                     or "verbatim" (model copies every section's text)
     """
+    if min_local_confidence is None:
+        min_local_confidence = MIN_LOCAL_CONFIDENCE
+    
+    local_sections, confidence = segment_markdown(raw_markdown)
+    if confidence >= min_local_confidence:
+        print(f"🧹 Segmented locally (confidence {confidence:.2f}), skipping LLM")
+        return local_sections
+    
+    models = model_router.cascade_for("sections", model_id)
+    print(f"🧹 Local segmentation confidence {confidence:.2f}, pre-processing with {models[0]}...")
+    if output_mode == "spans":
+        try:
+            return await _extract_section_spans(get_openai_client(), raw_markdown, models)
+        except Exception as e:
+            print(f"⚠️ Span extraction failed, retrying verbatim: {e}")
 
     try:
-        response = client.responses.parse(
-            model=model_id,
-            input=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Organize this raw paper text:\n\n{raw_markdown}"}
-            ],
-            text_format=PaperSections,
+        client = get_openai_client()
+        response, _, _ = await model_router.run_cascade(
+            "sections:verbatim", models,
+            lambda model: _tracked_parse(
+                client, "extract_paper_sections:verbatim",
+                model=model,
+                input=[
+                    {"role": "system", "content": SECTIONS_VERBATIM_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Organize this raw paper text:\n\n{raw_markdown}"}
+                ],
+                text_format=PaperSections,
+                prompt_cache_key="paper-sections-verbatim",
+            ),
+            check=model_router.sections_issues
         )
         return response.output_parsed
 
     except Exception as e:
         print(f"⚠️ Pre-processing failed: {e}")
+        if confidence > 0:
+            # A partial local segmentation beats dumping the raw text
+            return local_sections
         # Fallback: If pre-processing fails, return a dummy object containing the raw text
         # so the pipeline doesn't break.
         return PaperSections(
             title="Unknown Title",
             abstract_text=raw_markdown[:2000], 
             introduction_text="",
+            contributions_text="",
             methodology_text="",
             experiments_text=raw_markdown, # dump everything here
             conclusion_text="",
@@ -121,53 +686,79 @@ async def extract_paper_sections(raw_markdown: str, model_id: str = "gpt-5-nano"
         )
 
 
+async def _extract_section_spans(client: AsyncOpenAI, raw_markdown: str, models: List[str]) -> PaperSections:
+    """
+    Ask the model for section line ranges only and slice the text locally.
+    Output size stays roughly constant regardless of paper length.
+    """
+    line_count = len(raw_markdown.split('\n'))
+    response, _, _ = await model_router.run_cascade(
+        "sections", models,
+        lambda model: _tracked_parse(
+            client, "extract_paper_sections:spans",
+            model=model,
+            input=section_spans_input(raw_markdown),
+            text_format=PaperSectionSpans,
+            prompt_cache_key="paper-sections",
+        ),
+        check=lambda spans: model_router.section_spans_issues(spans, line_count)
+    )
+    spans: PaperSectionSpans = response.output_parsed
+    print(f"✅ Received {len(spans.spans)} section ranges")
+    return sections_from_spans(raw_markdown, spans)
+
+
 async def is_paper_relevant(
     application_idea: ApplicationIdea,
     paper_title: str,
     paper_abstract: str,
-    model_id: str = "gpt-5-nano" 
+    model_id: Optional[str] = None,
+    arxiv_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Quickly filters a paper based on its Title and Abstract against a target Application.
+    When arxiv_id is given, the decision is read from and stored in the relevance cache.
+    Without model_id the "relevance" model cascade is used.
     """
+    models = model_router.cascade_for("relevance", model_id)
+    model_label = model_router.cascade_label(models)
+    cache_key = None
+    if arxiv_id:
+        cache_key = _relevance_cache_key(application_idea, arxiv_id, model_label)
+        cached = (await asyncio.to_thread(cache_service.load_relevance_decisions, [cache_key])).get(cache_key)
+        if cached:
+            return _cached_relevance_result(cached)
+
     try:
         client = get_openai_client()
         
-        system_prompt = """
-        You are a strict Research Curator. 
-        Your task is to filter academic papers for a specific engineering application.
-        
-        Criteria for Relevance:
-        1. Does this paper propose a method, model, or dataset useful for the target application?
-        2. Is it technically aligned (e.g., if the app is Computer Vision, reject pure NLP papers unless multimodal)?
-        
-        Output a boolean decision and a one-sentence justification.
-        """
-        
-        user_prompt = f"""
-        Target Application (JSON): 
-        {application_idea.model_dump_json(indent=2)}
-        
-        Candidate Paper:
-        - Title: {paper_title}
-        - Abstract: {paper_abstract}
-        """
-
-        response = client.responses.parse(
-            model=model_id,
-            input=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            text_format=RelevanceDecision,
+        response, responses, _ = await model_router.run_cascade(
+            "relevance", models,
+            lambda model: _tracked_parse(
+                client, "relevance",
+                model=model,
+                input=relevance_input(
+                    application_idea,
+                    RELEVANCE_CANDIDATE_TEMPLATE.format(title=paper_title, abstract=paper_abstract)
+                ),
+                text_format=RelevanceDecision,
+                prompt_cache_key=_relevance_prompt_cache_key(application_idea),
+            ),
+            check=model_router.relevance_issues
         )
         
         result: RelevanceDecision = response.output_parsed
         
+        if cache_key:
+            await asyncio.to_thread(cache_service.save_relevance_decisions, {
+                cache_key: _relevance_cache_entry(application_idea, arxiv_id, model_label, result.is_relevant, result.reasoning)
+            })
+        
         return {
             "success": True,
             "decision": result.is_relevant,
-            "reason": result.reasoning
+            "reason": result.reasoning,
+            "usage": {**_usage_record(*responses), "model": response.model}
         }
 
     except Exception as e:
@@ -178,4 +769,207 @@ async def is_paper_relevant(
             "success": False, 
             "decision": False, 
             "reason": f"Error: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+
+def relevance_input(application_idea: ApplicationIdea, candidates_text: str, batched: bool = False) -> List[Dict[str, str]]:
+    """Responses API input for a relevance check: instructions, application, then candidates."""
+    return [
+        {"role": "system", "content": RELEVANCE_SYSTEM_PROMPT + (RELEVANCE_BATCH_INSTRUCTIONS if batched else "")},
+        {"role": "user", "content": RELEVANCE_APPLICATION_TEMPLATE.format(
+            application=application_idea.model_dump_json(indent=2)
+        )},
+        {"role": "user", "content": candidates_text}
+    ]
+
+
+def _relevance_prompt_cache_key(application_idea: ApplicationIdea) -> str:
+    # All checks for one application share a prefix, so route them together
+    return f"relevance-{cache_service.application_hash(application_idea.model_dump())}"
+
+
+def _relevance_cache_key(application_idea: ApplicationIdea, arxiv_id: str, model_id: str) -> str:
+    return cache_service.relevance_key(
+        application_idea.model_dump(), arxiv_id, model_id, RELEVANCE_PROMPT_VERSION
+    )
+
+
+def _relevance_cache_entry(
+    application_idea: ApplicationIdea, arxiv_id: str, model_id: str, decision: bool, reason: str
+) -> Dict[str, Any]:
+    # The application text is kept so the pre-filter's recall can be measured later
+    return {
+        "application": application_idea.model_dump(),
+        "arxiv_id": arxiv_id,
+        "model_id": model_id,
+        "prompt_version": RELEVANCE_PROMPT_VERSION,
+        "decision": decision,
+        "reason": reason
+    }
+
+
+def _cached_relevance_result(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "decision": entry["decision"],
+        "reason": entry["reason"],
+        "from_cache": True
+    }
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _split_by_token_budget(candidates: List[Dict[str, str]], max_tokens: int) -> List[List[Dict[str, str]]]:
+    """Greedily pack candidates into batches whose estimated size stays within max_tokens."""
+    batches: List[List[Dict[str, str]]] = []
+    current: List[Dict[str, str]] = []
+    used = 0
+    for candidate in candidates:
+        cost = _estimate_tokens(json.dumps(candidate))
+        if current and used + cost > max_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append(candidate)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _classify_relevance_batch(
+    client: AsyncOpenAI,
+    application_idea: ApplicationIdea,
+    batch: List[Dict[str, str]],
+    models: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Classify one batch of candidates in a single structured-output call,
+    escalating down the cascade when decisions are missing.
+    """
+    requested = {candidate["paper_id"] for candidate in batch}
+    response, responses, _ = await model_router.run_cascade(
+        "relevance:batch", models,
+        lambda model: _tracked_parse(
+            client, "relevance:batch",
+            model=model,
+            input=relevance_input(
+                application_idea,
+                RELEVANCE_CANDIDATES_TEMPLATE.format(candidates=json.dumps(batch, indent=2, ensure_ascii=False)),
+                batched=True
+            ),
+            text_format=RelevanceBatch,
+            prompt_cache_key=_relevance_prompt_cache_key(application_idea),
+        ),
+        check=lambda result: model_router.relevance_batch_issues(result, requested)
+    )
+
+    result: RelevanceBatch = response.output_parsed
+    usage = _usage_record(*responses)
+    print(f"🤖 Relevance batch of {len(batch)}: {usage['input_tokens']} input tokens ({usage['cached_input_tokens']} cached)")
+    return {
+        decision.paper_id: {
+            "success": True,
+            "decision": decision.is_relevant,
+            "reason": decision.reasoning
+        }
+        for decision in result.decisions
+        if decision.paper_id in requested
+    }
+
+
+async def classify_papers_relevance(
+    application_idea: ApplicationIdea,
+    candidates: List[Dict[str, str]],
+    model_id: Optional[str] = None,
+    max_batch_tokens: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Classify many candidate papers against one application with batched calls.
+
+    The application and instructions are sent once per batch instead of once
+    per paper. Candidates are split so each call stays within the token budget;
+    batches run concurrently, at most RELEVANCE_CONCURRENCY calls at a time.
+    Any candidate the model skipped (or whose batch failed) is retried on its
+    own with is_paper_relevant, under the same limit.
+    
+    Decisions are cached per (application, paper_id, model or cascade,
+    prompt version); only uncached candidates reach the model.
+
+    Args:
+        application_idea: The target application
+        candidates: Dicts with paper_id, title and abstract
+        model_id: OpenAI model ID to use; None runs the "relevance" model cascade
+        max_batch_tokens: Estimated input tokens per call (defaults to RELEVANCE_BATCH_MAX_TOKENS)
+
+    Returns:
+        dict mapping paper_id to {"success", "decision", "reason"}
+    """
+    if not candidates:
+        return {}
+
+    models = model_router.cascade_for("relevance", model_id)
+    model_label = model_router.cascade_label(models)
+    cache_keys = {
+        candidate["paper_id"]: _relevance_cache_key(application_idea, candidate["paper_id"], model_label)
+        for candidate in candidates
+    }
+    cached = await asyncio.to_thread(cache_service.load_relevance_decisions, list(cache_keys.values()))
+    decisions: Dict[str, Dict[str, Any]] = {
+        paper_id: _cached_relevance_result(cached[key])
+        for paper_id, key in cache_keys.items()
+        if key in cached
+    }
+    pending = [
+        {"paper_id": candidate["paper_id"], "title": candidate["title"], "abstract": candidate["abstract"]}
+        for candidate in candidates
+        if candidate["paper_id"] not in decisions
+    ]
+    if decisions:
+        print(f"💾 {len(decisions)} relevance decision(s) served from cache")
+    if not pending:
+        return {candidate["paper_id"]: decisions[candidate["paper_id"]] for candidate in candidates}
+
+    budget = max_batch_tokens or RELEVANCE_BATCH_MAX_TOKENS
+    # Leave room for the application and instructions in every batch
+    budget = max(budget - _estimate_tokens(application_idea.model_dump_json(indent=2) + RELEVANCE_SYSTEM_PROMPT), 1)
+    batches = _split_by_token_budget(pending, budget)
+    print(f"🤖 Classifying {len(pending)} papers in {len(batches)} batch call(s)")
+
+    async def run_batch(batch: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+        try:
+            async with _relevance_semaphore:
+                return await _classify_relevance_batch(get_openai_client(), application_idea, batch, models)
+        except Exception as e:
+            print(f"⚠️ Batch relevance call failed ({len(batch)} papers): {e}")
+            return {}
+
+    fresh: Dict[str, Dict[str, Any]] = {}
+    for batch_result in await asyncio.gather(*(run_batch(batch) for batch in batches)):
+        fresh.update(batch_result)
+
+    missing = [candidate for candidate in pending if candidate["paper_id"] not in fresh]
+    if missing:
+        print(f"🔁 Falling back to single calls for {len(missing)} paper(s)")
+
+        async def run_single(candidate: Dict[str, str]) -> Dict[str, Any]:
+            async with _relevance_semaphore:
+                return await is_paper_relevant(application_idea, candidate["title"], candidate["abstract"], model_id)
+
+        fallback = await asyncio.gather(*(run_single(candidate) for candidate in missing))
+        for candidate, result in zip(missing, fallback):
+            fresh[candidate["paper_id"]] = result
+
+    # Errors are not cached so they get retried next time
+    await asyncio.to_thread(cache_service.save_relevance_decisions, {
+        cache_keys[paper_id]: _relevance_cache_entry(
+            application_idea, paper_id, model_label, result["decision"], result["reason"]
+        )
+        for paper_id, result in fresh.items()
+        if result.get("success")
+    })
+    decisions.update(fresh)
+
+    return {candidate["paper_id"]: decisions[candidate["paper_id"]] for candidate in candidates}
@@ -0,0 +1,242 @@
+"""
+Units of work for processing one paper: download -> parse -> sections -> analysis,
+plus the Semantic Scholar metadata fetch.
+
+Each stage reads its input from and writes its output to the cache, skips
+work whose output is already cached (unless forced), and is coalesced with
+concurrent calls for the same paper through single_flight. The API
+endpoints and the background job workers both go through these functions.
+"""
+import os
+import asyncio
+import weakref
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from .pdf_parser import download_pdf, parse_pdf_bytes
+from .openai_service import extract_paper_sections, stream_paper_analysis
+from .models import PaperSections
+from .semantic_scholar import get_paper_metadata
+from .single_flight import flights
+from . import cache_service, usage_ledger
+
+STAGES = ("download", "parse", "sections", "analysis")
+
+ANALYSIS_NEEDS_PARSE_ERROR = "Paper must be parsed first before analysis. Please load the paper content first."
+
+# Concurrent Semantic Scholar metadata fetches
+METADATA_CONCURRENCY = int(os.getenv("METADATA_CONCURRENCY", "4"))
+_metadata_semaphore = asyncio.Semaphore(METADATA_CONCURRENCY)
+
+# One lock per paper for parses: parses in different modes are different
+# flights but write the same markdown.md, so they take turns
+_parse_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _parse_lock(arxiv_id: str) -> asyncio.Lock:
+    lock = _parse_locks.get(arxiv_id)
+    if lock is None:
+        lock = _parse_locks[arxiv_id] = asyncio.Lock()
+    return lock
+
+
+def _cached_parse_result(markdown: str) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "markdown": markdown,
+        "size_bytes": len(markdown.encode('utf-8')),
+        "error": None,
+        "method": "cache",
+        "from_cache": True
+    }
+
+
+async def metadata_stage(arxiv_id: str, force: bool = False) -> Dict[str, Any]:
+    """
+    Fetch Semantic Scholar metadata under the S2 limit and cache it on success.
+
+    Returns:
+        The metadata (success, ... | error), cached or freshly fetched
+    """
+    if not force:
+        cached_metadata = cache_service.load_metadata(arxiv_id)
+        if cached_metadata:
+            return cached_metadata
+
+    async def fetch() -> Dict[str, Any]:
+        async with _metadata_semaphore:
+            print(f"📥 Fetching metadata for {arxiv_id}")
+            result = await get_paper_metadata(arxiv_id)
+        if result.get("success"):
+            cache_service.save_metadata(arxiv_id, result)
+            print(f"Saved metadata to cache for {arxiv_id}")
+        return result
+
+    return await flights.do(("metadata", arxiv_id), fetch)
+
+
+async def download_stage(arxiv_id: str, arxiv_url: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+    """
+    Download the paper's PDF into the cache.
+
+    Returns:
+        dict with size_bytes and from_cache
+    """
+    if not force:
+        cached = cache_service.load_pdf(arxiv_id)
+        if cached is not None:
+            return {"size_bytes": len(cached), "from_cache": True}
+
+    async def download() -> Dict[str, Any]:
+        url = arxiv_url or f"https://arxiv.org/abs/{arxiv_id}"
+        print(f"📥 Downloading PDF from {url}")
+        pdf_bytes = await download_pdf(url)
+        print(f"✅ Downloaded {len(pdf_bytes)} bytes")
+        cache_service.save_pdf(arxiv_id, pdf_bytes)
+        return {"size_bytes": len(pdf_bytes), "from_cache": False}
+
+    return await flights.do(("download", arxiv_id), download)
+
+
+async def parse_stage(
+    arxiv_id: str,
+    mode: str = "hybrid",
+    progress_callback: Optional[Callable[[Dict], None]] = None,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    Parse the cached PDF to markdown and cache it, downloading the PDF first if needed.
+
+    Args:
+        arxiv_id: The ArXiv ID
+        mode: Parser mode ("hybrid", "ocr" or "pymupdf")
+        progress_callback: Receives "page" / "restart" events (possibly from a worker thread)
+        force: Re-parse even if markdown is cached
+
+    Returns:
+        The parser result (success, markdown, size_bytes, method, ...) plus from_cache
+    """
+    if not force:
+        cached_markdown = cache_service.load_markdown(arxiv_id)
+        if cached_markdown:
+            return _cached_parse_result(cached_markdown)
+
+    key = ("parse", arxiv_id, mode)
+
+    async def parse() -> Dict[str, Any]:
+        async with _parse_lock(arxiv_id):
+            # A parse in another mode may have finished while this one waited
+            cached_markdown = None if force else cache_service.load_markdown(arxiv_id)
+            if cached_markdown:
+                return _cached_parse_result(cached_markdown)
+
+            pdf_bytes = cache_service.load_pdf(arxiv_id)
+            if pdf_bytes is None:
+                await download_stage(arxiv_id)
+                pdf_bytes = cache_service.load_pdf(arxiv_id)
+            if pdf_bytes is None:
+                raise ValueError(f"PDF for {arxiv_id} could not be cached")
+
+            # Parsing is blocking (PyMuPDF / OCR requests), keep it off the event loop
+            result = await asyncio.to_thread(parse_pdf_bytes, pdf_bytes, mode=mode, progress_callback=flights.emitter(key))
+            if result.get("success") and result.get("markdown"):
+                cache_service.save_markdown(arxiv_id, result["markdown"])
+                print(f"Saved markdown to cache for {arxiv_id}")
+            return {**result, "from_cache": False}
+
+    return await flights.do(key, parse, on_event=progress_callback)
+
+
+async def sections_stage(arxiv_id: str, markdown: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+    """
+    Extract structured sections from the cached markdown and cache them.
+
+    Returns:
+        The sections dict
+    """
+    if not force:
+        cached_sections = cache_service.load_sections(arxiv_id)
+        if cached_sections:
+            return cached_sections
+
+    async def extract() -> Dict[str, Any]:
+        markdown_text = markdown or cache_service.load_markdown(arxiv_id)
+        if not markdown_text:
+            raise ValueError(ANALYSIS_NEEDS_PARSE_ERROR)
+        print(f"🧹 Extracting paper sections for {arxiv_id}...")
+        with usage_ledger.usage_context(paper_id=arxiv_id):
+            sections: PaperSections = await extract_paper_sections(markdown_text)
+
+        sections_dict = sections.model_dump()
+        cache_service.save_sections(arxiv_id, sections_dict)
+        print(f"✅ Saved paper sections to cache for {arxiv_id}")
+        return sections_dict
+
+    return await flights.do(("sections", arxiv_id), extract)
+
+
+def load_analysis_input(arxiv_id: str) -> Tuple[Optional[str], Optional[PaperSections]]:
+    """
+    Text to analyze for a paper: cleaned sections when available, raw markdown otherwise.
+
+    Returns:
+        Tuple of (markdown or None if the paper is not parsed, PaperSections or None)
+    """
+    # Try to load structured sections first (preferred)
+    sections_dict = cache_service.load_sections(arxiv_id)
+    if sections_dict:
+        # Use cleaned sections for analysis
+        print(f"📚 Using structured sections for analysis of {arxiv_id}")
+        sections = PaperSections(**sections_dict)
+        clean_markdown = sections.to_clean_markdown()
+        print(f"✅ Generated clean markdown ({len(clean_markdown)} chars)")
+        return clean_markdown, sections
+
+    # Fall back to raw markdown if sections not available
+    print(f"⚠️ Sections not found, falling back to raw markdown for {arxiv_id}")
+    return cache_service.load_markdown(arxiv_id), None
+
+
+async def analysis_stage(
+    arxiv_id: str,
+    progress_callback: Optional[Callable[[Dict], None]] = None,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    Analyze a parsed paper and cache the result.
+
+    Runs through stream_paper_analysis so a plain request, an SSE client and
+    a background job can all share one in-flight analysis; streaming events
+    go to progress_callback.
+
+    Returns:
+        The analysis result (success, data, usage | error), plus from_cache
+    """
+    if not force:
+        cached_analysis = cache_service.load_analysis(arxiv_id)
+        if cached_analysis:
+            return {**cached_analysis, "from_cache": True}
+
+    key = ("analysis", arxiv_id)
+
+    async def analyze() -> Dict[str, Any]:
+        emit = flights.emitter(key)
+        clean_markdown, sections = load_analysis_input(arxiv_id)
+        if not clean_markdown:
+            return {"success": False, "data": None, "usage": None, "error": ANALYSIS_NEEDS_PARSE_ERROR, "from_cache": False}
+
+        print(f"🤖 Analyzing paper {arxiv_id}...")
+        result = {"success": False, "data": None, "usage": None, "error": "Analysis stream ended early"}
+        with usage_ledger.usage_context(paper_id=arxiv_id):
+            async for event in stream_paper_analysis(clean_markdown, sections=sections):
+                if event["event"] == "complete":
+                    result = event["result"]
+                    break
+                emit(event)
+
+        # Cache the result if successful
+        if result.get("success") and result.get("data"):
+            cache_service.save_analysis(arxiv_id, result)
+            print(f"✅ Saved analysis to cache for {arxiv_id}")
+        return {**result, "from_cache": False}
+
+    return await flights.do(key, analyze, on_event=progress_callback)
@@ -1,13 +1,39 @@
 import httpx
 import fitz  # PyMuPDF
-from typing import Optional
+from typing import Optional, Callable
+import asyncio
 import re
 import os
 import time
 import tempfile
-from pdf2image import convert_from_bytes
 import requests
 
+from . import scheduler
+
+# Hybrid parser routing: pages scoring at or above the threshold go to OCR
+OCR_SCORE_THRESHOLD = float(os.getenv("HYBRID_OCR_THRESHOLD", "0.5"))
+MIN_TEXT_LAYER_CHARS = 200      # Below this a page is probably scanned
+MATH_RATIO_FOR_OCR = 0.08       # Share of glyphs in math fonts that scores 1.0
+BAD_GLYPH_RATIO_FOR_OCR = 0.02  # Share of unmapped glyphs that scores 1.0
+TABLE_RULES_FOR_OCR = 3         # Horizontal rules that suggest a table
+TABLE_RULE_MAX_GAP = 250        # Max vertical gap (pt) between rules of one table
+MATH_FONT_MARKERS = ("cmmi", "cmsy", "cmex", "msbm", "msam", "math", "symbol", "stix", "esint")
+
+# Adaptive OCR rendering
+OCR_MAX_VISION_TOKENS = int(os.getenv("OCR_MAX_VISION_TOKENS", "3000"))
+OCR_VISION_PATCH_PX = 28        # GLM-OCR: 14px patches merged 2x2 into one token
+OCR_MIN_DPI = 90
+OCR_MAX_DPI = 200
+
+def _notify(progress_callback: Optional[Callable[[dict], None]], event: str, **data):
+    """Report a progress event; a failing callback never breaks parsing."""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback({"event": event, **data})
+    except Exception as e:
+        print(f"⚠️ Progress callback failed: {e}")
+
 def check_ocr_endpoint(server_url: str = "http://localhost:8080/v1/chat/completions", timeout: float = 2.0) -> bool:
     """
     Check if the local OCR endpoint is available.
@@ -36,17 +62,206 @@ def check_ocr_endpoint(server_url: str = "http://localhost:8080/v1/chat/completi
             return False
 
 
+def page_render_settings(page) -> dict:
+    """
+    Pick OCR render resolution and JPEG compression for a page.
+    
+    Dense pages and small fonts get more pixels, sparse pages fewer, and the
+    resolution is capped so the image fits the OCR model's vision token budget.
+    Pages with no text, images or drawings are marked blank and skipped.
+    
+    Args:
+        page: PyMuPDF page object
+    
+    Returns:
+        dict with dpi, jpeg_quality, grayscale, blank and the density signals
+    """
+    page_area = max(page.rect.width * page.rect.height, 1.0)
+    
+    text_chars = 0
+    font_sizes = []
+    for block in page.get_text("dict").get("blocks", []):
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                visible = len(span.get("text", "").strip())
+                if visible:
+                    text_chars += visible
+                    font_sizes.extend([span.get("size", 10.0)] * visible)
+    
+    has_images = bool(page.get_image_info())
+    drawings = len(page.get_drawings())
+    
+    if text_chars < 10 and not has_images and drawings < 5:
+        return {"dpi": 0, "jpeg_quality": 0, "grayscale": True, "blank": True,
+                "text_chars": text_chars, "has_images": has_images}
+    
+    # Characters per square inch: ~1500 is a dense two-column body page
+    density = text_chars / (page_area / 72 / 72)
+    font_sizes.sort()
+    median_font = font_sizes[len(font_sizes) // 2] if font_sizes else 10.0
+    
+    # Sub/superscripts in equations need the extra resolution too
+    small_font_ratio = sum(1 for size in font_sizes if size < 7) / len(font_sizes) if font_sizes else 0.0
+    
+    if (density > 30 or median_font < 8 or small_font_ratio > 0.05
+            or (has_images and text_chars < MIN_TEXT_LAYER_CHARS)):
+        dpi, quality = 150, 85
+    elif density > 10:
+        dpi, quality = 120, 80
+    else:
+        dpi, quality = 100, 70
+    if median_font < 7:
+        dpi = 180
+    
+    # Keep the rendered image inside the vision token budget
+    max_pixels = OCR_MAX_VISION_TOKENS * OCR_VISION_PATCH_PX * OCR_VISION_PATCH_PX
+    budget_dpi = int(72 * (max_pixels / page_area) ** 0.5)
+    dpi = max(OCR_MIN_DPI, min(dpi, budget_dpi, OCR_MAX_DPI))
+    
+    return {
+        "dpi": dpi,
+        "jpeg_quality": quality,
+        "grayscale": not has_images,
+        "blank": False,
+        "text_chars": text_chars,
+        "has_images": has_images,
+    }
+
+
+def render_page_for_ocr(page, settings: dict) -> tuple:
+    """
+    Render a page to JPEG bytes with the given render settings.
+    
+    Returns:
+        Tuple of (jpeg_bytes, estimated_vision_tokens)
+    """
+    colorspace = fitz.csGRAY if settings["grayscale"] else fitz.csRGB
+    pix = page.get_pixmap(dpi=settings["dpi"], colorspace=colorspace, alpha=False)
+    image_bytes = pix.tobytes("jpg", jpg_quality=settings["jpeg_quality"])
+    vision_tokens = (
+        -(-pix.width // OCR_VISION_PATCH_PX) * -(-pix.height // OCR_VISION_PATCH_PX)
+    )
+    return image_bytes, vision_tokens
+
+
+def ocr_page(page, server_url: str) -> tuple:
+    """
+    Render a single PyMuPDF page adaptively and OCR it.
+    
+    Returns:
+        Tuple of (markdown or None for blank pages, stats dict with dpi,
+        jpeg_quality, image_bytes, vision_tokens and duration)
+    """
+    settings = page_render_settings(page)
+    stats = {
+        "dpi": settings["dpi"],
+        "jpeg_quality": settings["jpeg_quality"],
+        "blank": settings["blank"],
+        "image_bytes": 0,
+        "vision_tokens": 0,
+    }
+    if settings["blank"]:
+        return None, stats
+    
+    start_time = time.time()
+    image_bytes, vision_tokens = render_page_for_ocr(page, settings)
+    stats["image_bytes"] = len(image_bytes)
+    stats["vision_tokens"] = vision_tokens
+    content = _ocr_page_image(image_bytes, page.number + 1, server_url)
+    stats["duration"] = round(time.time() - start_time, 3)
+    return content, stats
+
+
+def _ocr_page_image(image_bytes: bytes, page_num: int, server_url: str) -> str:
+    """
+    Send a single rendered page image to the local OCR endpoint.
+    
+    Args:
+        image_bytes: JPEG-encoded page image
+        page_num: 1-based page number (used for logging only)
+        server_url: URL of the vLLM OCR server
+    
+    Returns:
+        Markdown content returned by the OCR model for this page
+    """
+    # Create temp file for this page
+    with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
+        temp_filename = temp_file.name
+        abs_temp_path = os.path.abspath(temp_filename)
+    
+    try:
+        # Save image to temp file
+        with open(abs_temp_path, 'wb') as f:
+            f.write(image_bytes)
+
+        # PATH TRANSLATION (Windows -> WSL if needed)
+        # Check if running on Windows and convert path for WSL
+        if os.name == 'nt' and abs_temp_path[1:3] == ':\\':
+            # Convert "C:\Users..." to "/mnt/c/Users..."
+            drive_letter = abs_temp_path[0].lower()
+            wsl_path = f"/mnt/{drive_letter}{abs_temp_path[2:]}".replace("\\", "/")
+            file_url = f"file://{wsl_path}"
+        else:
+            # Unix-like system, use path as-is
+            file_url = f"file://{abs_temp_path}"
+
+        prompt_text = (
+            "Read this page carefully. Extract all content into a single Markdown format.\n"
+            "1. Transcribe text exactly as it appears.\n"
+            "2. Convert all mathematical formulas into LaTeX format (enclose in $$).\n"
+            "3. Detect tables and convert them into Markdown tables.\n"
+            "Do not summarize or skip any content."
+        )   
+
+        # Prepare OCR request
+        payload = {
+            "model": "zai-org/GLM-OCR",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "image_url", "image_url": {"url": file_url}},
+                        {"type": "text", "text": prompt_text}                         
+                    ]
+                }
+            ],
+            "temperature": 0.0,
+            "max_tokens": 4096
+        }
+
+        # The OCR server is shared by every parse; interactive parses get it first
+        with scheduler.ocr_limiter.slot_sync():
+            response = requests.post(server_url, json=payload, timeout=120.0)
+        response.raise_for_status()
+        
+        # Extract content
+        return response.json()['choices'][0]['message']['content']
+    
+    finally:
+        # Cleanup temp file
+        if os.path.exists(abs_temp_path):
+            try:
+                os.remove(abs_temp_path)
+            except:
+                pass
+
+
 def pdf_bytes_to_markdown_ocr(
     pdf_bytes: bytes, 
-    server_url: str = "http://localhost:8080/v1/chat/completions"
+    server_url: str = "http://localhost:8080/v1/chat/completions",
+    page_report: Optional[list] = None,
+    progress_callback: Optional[Callable[[dict], None]] = None
 ) -> str:
     """
     Convert PDF bytes to Markdown using local OCR endpoint.
-    Processes PDF page-by-page via vLLM server.
+    Processes PDF page-by-page via vLLM server, rendering each page with
+    adaptive resolution/compression and skipping blank pages.
     
     Args:
         pdf_bytes: PDF file as bytes
         server_url: URL of the vLLM OCR server
+        page_report: Optional list that receives one stats dict per page
+        progress_callback: Optional callable receiving a "page" event per page
     
     Returns:
         Markdown text extracted from the PDF
@@ -56,93 +271,231 @@ def pdf_bytes_to_markdown_ocr(
     """
     print(f"📖 Starting OCR processing with local endpoint...")
     
-    # Convert PDF bytes to images (DPI=150 to prevent token overflow)
     try:
-        pages = convert_from_bytes(pdf_bytes, dpi=150)
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
     except Exception as e:
-        raise RuntimeError(f"Failed to convert PDF to images. Error: {e}")
+        raise RuntimeError(f"Failed to open PDF for rendering. Error: {e}")
 
     full_markdown = []
-    total_pages = len(pages)
+    total_pages = len(doc)
     print(f"📄 Found {total_pages} pages. Starting OCR processing...\n")
 
     # Process each page
-    for i, page_image in enumerate(pages):
-        page_num = i + 1
-        
-        # Create temp file for this page
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-            temp_filename = temp_file.name
-            abs_temp_path = os.path.abspath(temp_filename)
-        
-        try:
-            # Save image to temp file
-            page_image.save(abs_temp_path, "JPEG")
-
-            # PATH TRANSLATION (Windows -> WSL if needed)
-            # Check if running on Windows and convert path for WSL
-            if os.name == 'nt' and abs_temp_path[1:3] == ':\\':
-                # Convert "C:\Users..." to "/mnt/c/Users..."
-                drive_letter = abs_temp_path[0].lower()
-                wsl_path = f"/mnt/{drive_letter}{abs_temp_path[2:]}".replace("\\", "/")
-                file_url = f"file://{wsl_path}"
-            else:
-                # Unix-like system, use path as-is
-                file_url = f"file://{abs_temp_path}"
-
-            prompt_text = (
-                "Read this page carefully. Extract all content into a single Markdown format.\n"
-                "1. Transcribe text exactly as it appears.\n"
-                "2. Convert all mathematical formulas into LaTeX format (enclose in $$).\n"
-                "3. Detect tables and convert them into Markdown tables.\n"
-                "Do not summarize or skip any content."
-            )   
-
-            # Prepare OCR request
-            payload = {
-                "model": "zai-org/GLM-OCR",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "image_url", "image_url": {"url": file_url}},
-                            {"type": "text", "text": prompt_text}                         
-                        ]
-                    }
-                ],
-                "temperature": 0.0,
-                "max_tokens": 4096
-            }
+    try:
+        for i in range(total_pages):
+            page_num = i + 1
+            stats = {"page": page_num, "method": "ocr"}
+            page_text = ""
+            
+            try:
+                print(f"   ⏳ Processing Page {page_num}/{total_pages}...", end="\r")
+                
+                content, render_stats = ocr_page(doc[i], server_url)
+                stats.update(render_stats)
+                if content is None:
+                    stats["method"] = "skipped"
+                    print(f"   ⏭️  Page {page_num}/{total_pages} is blank, skipped")
+                    continue
+                
+                # Add page delimiter
+                page_text = f"\n\n## Page {page_num}\n\n{content}"
+                full_markdown.append(page_text)
+                
+                print(f"   ✅ Page {page_num}/{total_pages} done in {render_stats['duration']:.2f}s "
+                      f"({render_stats['dpi']} dpi, {render_stats['image_bytes'] // 1024} KB, "
+                      f"~{render_stats['vision_tokens']} vision tokens)")
 
-            print(f"   ⏳ Processing Page {page_num}/{total_pages}...", end="\r")
+            except Exception as e:
+                print(f"   ❌ Error on Page {page_num}: {e}")
+                stats["ocr_error"] = str(e)
+                page_text = f"\n\n[ERROR PROCESSING PAGE {page_num}]\n\n"
+                full_markdown.append(page_text)
             
-            start_time = time.time()
-            response = requests.post(server_url, json=payload, timeout=120.0)
-            response.raise_for_status()
+            finally:
+                if page_report is not None:
+                    page_report.append(stats)
+                _notify(progress_callback, "page", page=page_num, total=total_pages,
+                        method=stats["method"], markdown=page_text)
+    finally:
+        doc.close()
+
+    print("\n🎉 OCR Conversion Complete!")
+    return "# Research Paper\n\n" + "".join(full_markdown)
+
+
+def summarize_ocr_stats(page_report: list) -> dict:
+    """Aggregate per-page OCR stats into totals for the parse result."""
+    sent = [r for r in page_report if r.get("method") == "ocr"]
+    return {
+        "pages_sent": len(sent),
+        "pages_skipped": sum(1 for r in page_report if r.get("method") == "skipped"),
+        "image_bytes": sum(r.get("image_bytes", 0) for r in sent),
+        "vision_tokens": sum(r.get("vision_tokens", 0) for r in sent),
+    }
+
+
+def score_page_for_ocr(page, tables: Optional[list] = None, rules: Optional[list] = None) -> dict:
+    """
+    Score how badly a page needs the OCR model instead of the PyMuPDF text layer.
+    
+    Combines cheap signals from the text layer: text density, the share of
+    glyphs set in math fonts, unmapped/private-use glyphs, image coverage and
+    ruled lines that usually belong to tables.
+    
+    Args:
+        page: PyMuPDF page object
+        tables: Tables already extracted from the text layer (see
+                extract_page_tables); rules inside them don't count
+        rules: Precomputed horizontal rules (see _horizontal_rules)
+    
+    Returns:
+        dict with the overall score (0.0 - 1.0), needs_ocr flag, the raw
+        signals and the reasons that pushed the score up
+    """
+    page_area = max(page.rect.width * page.rect.height, 1.0)
+    
+    text_chars = 0
+    math_chars = 0
+    bad_glyphs = 0
+    for block in page.get_text("dict").get("blocks", []):
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                span_text = span.get("text", "")
+                visible = len(span_text.strip())
+                text_chars += visible
+                font = span.get("font", "").lower()
+                if any(marker in font for marker in MATH_FONT_MARKERS):
+                    math_chars += visible
+                bad_glyphs += sum(
+                    1 for ch in span_text
+                    if ch == "\ufffd" or "\ue000" <= ch <= "\uf8ff"
+                )
+    
+    image_area = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        if not bbox.is_empty:
+            image_area += bbox.width * bbox.height
+    image_coverage = min(image_area / page_area, 1.0)
+    
+    if rules is None:
+        rules = _horizontal_rules(page)
+    tables = tables or []
+    # Only rules outside the natively recovered tables point at a table we'd lose
+    table_rules = sum(
+        1 for rule in rules
+        if not any(_rule_in_region(rule, bbox) for bbox, _ in tables)
+    )
+    
+    math_ratio = math_chars / text_chars if text_chars else 0.0
+    bad_glyph_ratio = bad_glyphs / text_chars if text_chars else 0.0
+    
+    reasons = []
+    score = 0.0
+    if text_chars < MIN_TEXT_LAYER_CHARS and image_coverage > 0.3:
+        score = 1.0
+        reasons.append("scanned")
+    if math_ratio > 0:
+        score = max(score, min(math_ratio / MATH_RATIO_FOR_OCR, 1.0))
+        if math_ratio >= MATH_RATIO_FOR_OCR * OCR_SCORE_THRESHOLD:
+            reasons.append("math")
+    if bad_glyph_ratio > 0:
+        score = max(score, min(bad_glyph_ratio / BAD_GLYPH_RATIO_FOR_OCR, 1.0))
+        if bad_glyph_ratio >= BAD_GLYPH_RATIO_FOR_OCR * OCR_SCORE_THRESHOLD:
+            reasons.append("unmapped_glyphs")
+    if image_coverage > 0.5 and text_chars < 1500:
+        score = max(score, image_coverage * 0.8)
+        reasons.append("image_heavy")
+    if table_rules >= TABLE_RULES_FOR_OCR:
+        score = max(score, 0.6)
+        reasons.append("table")
+    
+    return {
+        "score": round(score, 3),
+        "needs_ocr": score >= OCR_SCORE_THRESHOLD,
+        "reasons": reasons,
+        "text_chars": text_chars,
+        "math_ratio": round(math_ratio, 4),
+        "bad_glyph_ratio": round(bad_glyph_ratio, 4),
+        "image_coverage": round(image_coverage, 3),
+        "table_rules": table_rules,
+        "native_tables": len(tables),
+    }
+
+
+def pdf_bytes_to_markdown_hybrid(
+    pdf_bytes: bytes,
+    server_url: str = "http://localhost:8080/v1/chat/completions",
+    threshold: Optional[float] = None,
+    page_report: Optional[list] = None,
+    progress_callback: Optional[Callable[[dict], None]] = None
+) -> str:
+    """
+    Convert PDF bytes to Markdown using the PyMuPDF text layer for easy pages
+    and the local OCR endpoint only for pages that score above the threshold.
+    
+    Args:
+        pdf_bytes: PDF file as bytes
+        server_url: URL of the vLLM OCR server
+        threshold: OCR routing threshold (defaults to OCR_SCORE_THRESHOLD)
+        page_report: Optional list that receives one routing dict per page
+        progress_callback: Optional callable receiving a "page" event per page
+    
+    Returns:
+        Markdown text extracted from the PDF
+    """
+    if threshold is None:
+        threshold = OCR_SCORE_THRESHOLD
+    
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    total_pages = len(doc)
+    print(f"📄 Found {total_pages} pages. Scoring pages for hybrid parsing...\n")
+    
+    full_markdown = []
+    ocr_count = 0
+    try:
+        for page_index in range(total_pages):
+            page_num = page_index + 1
+            page = doc[page_index]
+            drawings = page.get_drawings()
+            rules = _horizontal_rules(page, drawings)
+            tables = extract_page_tables(page, rules, drawings)
+            routing = score_page_for_ocr(page, tables=tables, rules=rules)
+            routing["page"] = page_num
+            routing["needs_ocr"] = routing["score"] >= threshold
+            routing["method"] = "text"
+            
+            content = None
+            if routing["needs_ocr"]:
+                try:
+                    content, render_stats = ocr_page(page, server_url)
+                    routing.update(render_stats)
+                    if content is not None:
+                        routing["method"] = "ocr"
+                        ocr_count += 1
+                        print(f"   🔍 Page {page_num}/{total_pages} OCR'd in {render_stats['duration']:.2f}s "
+                              f"({', '.join(routing['reasons'])}; {render_stats['dpi']} dpi, "
+                              f"~{render_stats['vision_tokens']} vision tokens)")
+                except Exception as e:
+                    # Keep the text layer rather than losing the page entirely
+                    print(f"   ⚠️ OCR failed on Page {page_num}, using text layer: {e}")
+                    routing["ocr_error"] = str(e)
             
-            # Extract content
-            content = response.json()['choices'][0]['message']['content']
+            if content is None:
+                content = improve_markdown_formatting(_page_text_layer(page, tables)).strip()
             
-            # Add page delimiter
-            page_text = f"\n\n## Page {page_num}\n\n{content}"
-            full_markdown.append(page_text)
+            if page_report is not None:
+                page_report.append(routing)
             
-            duration = time.time() - start_time
-            print(f"   ✅ Page {page_num}/{total_pages} done in {duration:.2f}s")
-
-        except Exception as e:
-            print(f"   ❌ Error on Page {page_num}: {e}")
-            full_markdown.append(f"\n\n[ERROR PROCESSING PAGE {page_num}]\n\n")
-        
-        finally:
-            # Cleanup temp file
-            if os.path.exists(abs_temp_path):
-                try:
-                    os.remove(abs_temp_path)
-                except:
-                    pass
-
-    print("\n🎉 OCR Conversion Complete!")
+            page_text = f"\n\n## Page {page_num}\n\n{content}" if content.strip() else ""
+            if page_text:
+                full_markdown.append(page_text)
+            _notify(progress_callback, "page", page=page_num, total=total_pages,
+                    method=routing["method"], markdown=page_text)
+    finally:
+        doc.close()
+    
+    print(f"\n🎉 Hybrid conversion complete: {ocr_count}/{total_pages} pages sent to OCR")
     return "# Research Paper\n\n" + "".join(full_markdown)
 
 
@@ -161,96 +514,382 @@ async def download_pdf(arxiv_url: str) -> bytes:
         response.raise_for_status()
         return response.content
 
-def parse_pdf_to_markdown(pdf_bytes: bytes) -> str:
+def _horizontal_rules(page, drawings: Optional[list] = None) -> list:
+    """
+    Collect long horizontal rules on a page.
+    These are the typical skeleton of a (booktabs) table.
+    """
+    if drawings is None:
+        drawings = page.get_drawings()
+    rules = []
+    for drawing in drawings:
+        rect = drawing.get("rect")
+        if rect is not None and rect.height < 2 and rect.width > page.rect.width * 0.2:
+            rules.append(fitz.Rect(rect))
+    rules.sort(key=lambda r: r.y0)
+    return rules
+
+def _rule_in_region(rule, bbox, tolerance: float = 2.0) -> bool:
+    """Whether a horizontal rule lies within a table region (rules are often zero-height, so Rect.intersects won't do)."""
+    return (
+        rule.x0 < bbox.x1 and bbox.x0 < rule.x1
+        and bbox.y0 - tolerance <= rule.y0 and rule.y1 <= bbox.y1 + tolerance
+    )
+
+def _table_to_markdown(rows: list) -> Optional[str]:
+    """Render extracted table cells as a Markdown table, or None if it isn't one."""
+    cleaned = []
+    for row in rows:
+        cells = [
+            (cell or "").replace("\n", " ").replace("|", "\\|").strip()
+            for cell in row
+        ]
+        if any(cells):
+            cleaned.append(cells)
+    
+    # A real table has a header plus at least one data row and two columns
+    if len(cleaned) < 2 or max(len(r) for r in cleaned) < 2:
+        return None
+    
+    lines = [
+        "| " + " | ".join(cleaned[0]) + " |",
+        "| " + " | ".join("---" for _ in cleaned[0]) + " |",
+    ]
+    for row in cleaned[1:]:
+        lines.append("| " + " | ".join(row) + " |")
+    return "\n".join(lines)
+
+def extract_page_tables(page, rules: Optional[list] = None, drawings: Optional[list] = None) -> list:
+    """
+    Detect tables in the PDF text layer and convert them to Markdown.
+    
+    Fully ruled tables are found with PyMuPDF's line strategy. Booktabs-style
+    tables (horizontal rules only) are found by clipping the region between
+    groups of rules and detecting columns from the text alignment.
+    
+    Args:
+        page: PyMuPDF page object
+        rules: Precomputed horizontal rules (see _horizontal_rules)
+        drawings: Precomputed page.get_drawings() output
+    
+    Returns:
+        List of (bbox, markdown) tuples, top to bottom
+    """
+    if drawings is None:
+        drawings = page.get_drawings()
+    if rules is None:
+        rules = _horizontal_rules(page, drawings)
+    if not rules and not drawings:
+        return []
+    
+    tables = []
+    try:
+        for table in page.find_tables(strategy="lines"):
+            markdown = _table_to_markdown(table.extract())
+            if markdown:
+                tables.append((fitz.Rect(table.bbox), markdown))
+        
+        if not tables and len(rules) >= 2:
+            # Group rules that are vertically close and horizontally overlapping
+            groups = [[rules[0]]]
+            for rule in rules[1:]:
+                last = groups[-1][-1]
+                overlaps = rule.x0 < last.x1 and last.x0 < rule.x1
+                if overlaps and rule.y0 - last.y1 < TABLE_RULE_MAX_GAP:
+                    groups[-1].append(rule)
+                else:
+                    groups.append([rule])
+            
+            for group in groups:
+                if len(group) < 2:
+                    continue
+                clip = fitz.Rect(
+                    min(r.x0 for r in group), group[0].y0 - 1,
+                    max(r.x1 for r in group), group[-1].y1 + 1
+                )
+                for table in page.find_tables(clip=clip, strategy="text"):
+                    markdown = _table_to_markdown(table.extract())
+                    if markdown:
+                        tables.append((clip, markdown))
+    except Exception as e:
+        print(f"   ⚠️ Table detection failed on page {page.number + 1}: {e}")
+        return []
+    
+    tables.sort(key=lambda t: t[0].y0)
+    return tables
+
+def _page_text_layer(page, tables: Optional[list] = None) -> str:
+    """
+    Extract the text blocks of a single page, joined with blank lines.
+    Text inside detected tables is replaced by the table's Markdown.
+    """
+    if tables is None:
+        tables = extract_page_tables(page)
+    pending_tables = list(tables)
+    
+    # Extract text blocks with position info
+    blocks = page.get_text("blocks")
+    
+    page_text = []
+    for block in blocks:
+        # block format: (x0, y0, x1, y1, "text", block_no, block_type)
+        if len(block) >= 5:
+            block_rect = fitz.Rect(block[:4])
+            center = (block_rect.tl + block_rect.br) / 2
+            if any(center in bbox for bbox, _ in tables):
+                continue
+            
+            # Emit tables that start above this block in the same column
+            while pending_tables:
+                bbox, markdown = pending_tables[0]
+                if bbox.y0 <= block_rect.y0 and bbox.x0 < block_rect.x1 and block_rect.x0 < bbox.x1:
+                    page_text.append(markdown)
+                    pending_tables.pop(0)
+                else:
+                    break
+            
+            text = block[4].strip()
+            if text:
+                page_text.append(text)
+    
+    page_text.extend(markdown for _, markdown in pending_tables)
+    
+    # Join blocks with proper spacing
+    return '\n\n'.join(page_text)
+
+def parse_pdf_to_markdown(
+    pdf_bytes: bytes,
+    progress_callback: Optional[Callable[[dict], None]] = None
+) -> str:
     """
     Parse PDF bytes to markdown format using PyMuPDF.
     Extracts text and attempts to preserve structure.
+    Tables found in the text layer are emitted inline as Markdown tables.
+    
+    Args:
+        pdf_bytes: PDF file as bytes
+        progress_callback: Optional callable receiving a "page" event per page
     """
     try:
         # Open PDF from bytes
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         
-        markdown_content = []
-        markdown_content.append("# Research Paper\n")
+        # Format page by page as pages are extracted
+        formatter = MarkdownFormatter()
+        markdown_content = [formatter.feed("# Research Paper\n")]
         
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            
-            # Extract text blocks with position info
-            blocks = page.get_text("blocks")
+        total_pages = len(doc)
+        for page_num in range(total_pages):
+            page_text = _page_text_layer(doc[page_num])
             
-            page_text = []
-            for block in blocks:
-                # block format: (x0, y0, x1, y1, "text", block_no, block_type)
-                if len(block) >= 5:
-                    text = block[4].strip()
-                    if text:
-                        page_text.append(text)
-            
-            # Join blocks with proper spacing
+            page_markdown = ""
             if page_text:
-                markdown_content.append(f"\n## Page {page_num + 1}\n")
-                markdown_content.append('\n\n'.join(page_text))
+                page_markdown = formatter.feed(f"\n\n## Page {page_num + 1}\n" + '\n' + page_text)
+                markdown_content.append(page_markdown)
+            _notify(progress_callback, "page", page=page_num + 1, total=total_pages,
+                    method="text", markdown=page_markdown)
         
         doc.close()
         
-        full_text = '\n'.join(markdown_content)
-        
-        # Post-processing to improve markdown formatting
-        full_text = improve_markdown_formatting(full_text)
-        
-        return full_text
+        markdown_content.append(formatter.finish())
+        return ''.join(markdown_content)
     
     except Exception as e:
         raise Exception(f"Error parsing PDF: {str(e)}")
 
-def improve_markdown_formatting(text: str) -> str:
+# Numbered ("1. Introduction", "1 Introduction") or Roman ("IV. Results") section headers
+_NUMBERED_HEADER_RE = re.compile(r'(?:\d+|[IVX]+)\.?\s+[A-Z]')
+
+
+class MarkdownFormatter:
     """
-    Improve the markdown formatting of extracted text.
+    Single-pass, streaming version of improve_markdown_formatting.
+    
+    Text can be fed in arbitrary chunks (e.g. one page at a time as pages
+    arrive); the concatenation of everything returned by feed() and finish()
+    is identical to formatting the whole text at once. Runs of blank lines
+    are collapsed on the fly instead of with extra full-text regex passes.
     """
-    # Remove excessive whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
     
-    # Try to identify section headers (all caps or numbered sections)
-    lines = text.split('\n')
-    formatted_lines = []
+    def __init__(self):
+        self._partial = ''
+        self._seen_content = False
+        self._blank_run = 0
     
-    for line in lines:
-        stripped = line.strip()
+    def feed(self, text: str) -> str:
+        """Format all complete lines in text and return the formatted output."""
+        if not text:
+            return ''
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        return self._format_lines(lines)
+    
+    def finish(self) -> str:
+        """Flush the last (possibly empty) line and the trailing blank lines."""
+        out = self._format_lines([self._partial])
+        self._partial = ''
+        if self._seen_content:
+            return out + '\n' * min(self._blank_run, 2)
+        # Nothing but blank lines: they were joined, not terminated
+        return out + '\n' * min(max(self._blank_run - 1, 0), 2)
+    
+    def _format_lines(self, lines: list) -> str:
+        out = []
+        append = out.append
+        seen_content = self._seen_content
+        blank_run = self._blank_run
+        header_match = _NUMBERED_HEADER_RE.match
         
-        # Skip empty lines
-        if not stripped:
-            formatted_lines.append('')
-            continue
+        for line in lines:
+            stripped = line.strip()
+            
+            # Empty lines only extend the current blank run
+            if not stripped:
+                blank_run += 1
+                continue
+            
+            header = False
+            if stripped[0] != '|':
+                # Pattern 1: All caps (but not just one word)
+                if stripped.isupper() and len(stripped) < 100 and len(stripped.split()) > 1:
+                    stripped = stripped.title()
+                    header = True
+                # Pattern 2/3: Numbered or Roman numeral sections
+                elif header_match(stripped):
+                    header = True
+            
+            if header:
+                # Headers are surrounded by blank lines
+                blank_run += 1
+            
+            if seen_content:
+                append('\n\n' if blank_run else '\n')
+            elif blank_run:
+                append('\n' * min(blank_run, 2))
+            seen_content = True
+            
+            if header:
+                append('### ')
+                append(stripped)
+                blank_run = 1
+            else:
+                append(stripped)
+                blank_run = 0
         
-        # Check if line is likely a section header
-        # Pattern 1: All caps (but not just one word)
-        if stripped.isupper() and len(stripped.split()) > 1 and len(stripped) < 100:
-            formatted_lines.append(f"\n### {stripped.title()}\n")
-        # Pattern 2: Numbered sections like "1. Introduction" or "1 Introduction"
-        elif re.match(r'^\d+\.?\s+[A-Z]', stripped):
-            formatted_lines.append(f"\n### {stripped}\n")
-        # Pattern 3: Roman numerals
-        elif re.match(r'^[IVX]+\.?\s+[A-Z]', stripped):
-            formatted_lines.append(f"\n### {stripped}\n")
-        else:
-            formatted_lines.append(stripped)
+        self._seen_content = seen_content
+        self._blank_run = blank_run
+        return ''.join(out)
+
+
+def improve_markdown_formatting(text: str) -> str:
+    """
+    Improve the markdown formatting of extracted text.
+    Turns all-caps and numbered lines into ### headers, strips lines, keeps
+    Markdown table rows untouched and collapses runs of blank lines.
+    """
+    formatter = MarkdownFormatter()
+    return formatter.feed(text) + formatter.finish()
+
+def parse_pdf_bytes(
+    pdf_bytes: bytes,
+    ocr_server_url: str = "http://localhost:8080/v1/chat/completions",
+    mode: str = "hybrid",
+    progress_callback: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """
+    Parse downloaded PDF bytes to markdown (blocking, run it in a thread).
+    Uses the local OCR endpoint if available, falls back to PyMuPDF if not.
     
-    text = '\n'.join(formatted_lines)
+    Args:
+        pdf_bytes: PDF file as bytes
+        ocr_server_url: URL of the local OCR server (optional)
+        mode: "hybrid" (text layer first, OCR only for hard pages),
+              "ocr" (every page through OCR) or "pymupdf" (text layer only)
+        progress_callback: Optional callable receiving "page" events
     
-    # Clean up excessive newlines again
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    Returns:
+        dict with markdown content and metadata
+    """
+    # Check if OCR endpoint is available
+    ocr_available = mode != "pymupdf" and check_ocr_endpoint(ocr_server_url)
     
-    return text
+    if ocr_available:
+        page_report = []
+        try:
+            # One OCR request per page: keep lower-priority parses from taking
+            # the OCR server between this parse's pages
+            with scheduler.ocr_limiter.reserve():
+                if mode == "ocr":
+                    print("🔍 OCR endpoint detected, using local OCR model...")
+                    markdown = pdf_bytes_to_markdown_ocr(
+                        pdf_bytes, ocr_server_url, page_report=page_report,
+                        progress_callback=progress_callback
+                    )
+                    print("✅ OCR parsing successful")
+                else:
+                    print("🔍 OCR endpoint detected, using hybrid parser...")
+                    markdown = pdf_bytes_to_markdown_hybrid(
+                        pdf_bytes, ocr_server_url, page_report=page_report,
+                        progress_callback=progress_callback
+                    )
+                    print("✅ Hybrid parsing successful")
+            
+            return {
+                "success": True,
+                "markdown": markdown,
+                "size_bytes": len(pdf_bytes),
+                "error": None,
+                "method": mode,
+                "ocr_pages": [r["page"] for r in page_report if r["method"] == "ocr"],
+                "ocr_stats": summarize_ocr_stats(page_report),
+                "page_routing": page_report
+            }
+        except Exception as ocr_error:
+            print(f"⚠️ OCR parsing failed: {ocr_error}")
+            print("📄 Falling back to PyMuPDF parser...")
+            _notify(progress_callback, "restart", reason=str(ocr_error))
+            markdown = parse_pdf_to_markdown(pdf_bytes, progress_callback)
+            
+            return {
+                "success": True,
+                "markdown": markdown,
+                "size_bytes": len(pdf_bytes),
+                "error": None,
+                "method": "pymupdf_fallback",
+                "ocr_error": str(ocr_error)
+            }
+    else:
+        if mode == "pymupdf":
+            print("📄 Using PyMuPDF parser...")
+        else:
+            print("📄 OCR endpoint not available, using PyMuPDF parser...")
+        markdown = parse_pdf_to_markdown(pdf_bytes, progress_callback)
+        
+        return {
+            "success": True,
+            "markdown": markdown,
+            "size_bytes": len(pdf_bytes),
+            "error": None,
+            "method": "pymupdf"
+        }
 
-async def download_and_parse_paper(arxiv_url: str, ocr_server_url: str = "http://localhost:8080/v1/chat/completions") -> dict:
+async def download_and_parse_paper(
+    arxiv_url: str,
+    ocr_server_url: str = "http://localhost:8080/v1/chat/completions",
+    mode: str = "hybrid",
+    progress_callback: Optional[Callable[[dict], None]] = None
+) -> dict:
     """
     Download and parse a paper from ArXiv.
-    Attempts to use local OCR endpoint if available, falls back to PyMuPDF if not.
+    Parsing runs in a worker thread so the event loop stays responsive.
     
     Args:
         arxiv_url: ArXiv URL of the paper
         ocr_server_url: URL of the local OCR server (optional)
+        mode: "hybrid" (text layer first, OCR only for hard pages),
+              "ocr" (every page through OCR) or "pymupdf" (text layer only)
+        progress_callback: Optional callable receiving "downloaded" and
+                           "page" events. It may be called from a worker thread.
     
     Returns:
         dict with markdown content and metadata
@@ -260,47 +899,11 @@ async def download_and_parse_paper(arxiv_url: str, ocr_server_url: str = "http:/
         print(f"📥 Downloading PDF from {arxiv_url}")
         pdf_bytes = await download_pdf(arxiv_url)
         print(f"✅ Downloaded {len(pdf_bytes)} bytes")
+        _notify(progress_callback, "downloaded", size_bytes=len(pdf_bytes))
         
-        # Check if OCR endpoint is available
-        ocr_available = check_ocr_endpoint(ocr_server_url)
-        
-        if ocr_available:
-            print("🔍 OCR endpoint detected, using local OCR model...")
-            try:
-                markdown = pdf_bytes_to_markdown_ocr(pdf_bytes, ocr_server_url)
-                print("✅ OCR parsing successful")
-                
-                return {
-                    "success": True,
-                    "markdown": markdown,
-                    "size_bytes": len(pdf_bytes),
-                    "error": None,
-                    "method": "ocr"
-                }
-            except Exception as ocr_error:
-                print(f"⚠️ OCR parsing failed: {ocr_error}")
-                print("📄 Falling back to PyMuPDF parser...")
-                markdown = parse_pdf_to_markdown(pdf_bytes)
-                
-                return {
-                    "success": True,
-                    "markdown": markdown,
-                    "size_bytes": len(pdf_bytes),
-                    "error": None,
-                    "method": "pymupdf_fallback",
-                    "ocr_error": str(ocr_error)
-                }
-        else:
-            print("📄 OCR endpoint not available, using PyMuPDF parser...")
-            markdown = parse_pdf_to_markdown(pdf_bytes)
-            
-            return {
-                "success": True,
-                "markdown": markdown,
-                "size_bytes": len(pdf_bytes),
-                "error": None,
-                "method": "pymupdf"
-            }
+        return await asyncio.to_thread(
+            parse_pdf_bytes, pdf_bytes, ocr_server_url, mode, progress_callback
+        )
     
     except Exception as e:
         return {
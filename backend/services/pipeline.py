@@ -0,0 +1,348 @@
+"""
+Declarative per-paper pipeline.
+
+Stages, the cache file each one produces and what it depends on:
+
+    metadata  -> metadata.json   (Semantic Scholar, independent of the rest)
+    download  -> paper.pdf
+    parse     -> markdown.md     requires download
+    sections  -> sections.json   requires parse
+    analysis  -> analysis.json   requires parse, runs after sections (falls
+                                 back to the raw markdown if sections failed)
+
+A run names its target stages and the runner works out the rest: a stage
+runs when its cache file is missing, older than the file of a stage it
+depends on, or when one of those stages re-runs; fresh stages are skipped.
+Independent stages run concurrently (the metadata fetch alongside the PDF
+download), and every stage has a worker limit shared by all papers in the
+process, so a list of papers moves through the stages like an assembly line.
+Workers per stage are configurable:
+    PIPELINE_WORKERS_METADATA=4 PIPELINE_WORKERS_DOWNLOAD=4 PIPELINE_WORKERS_PARSE=1
+    PIPELINE_WORKERS_SECTIONS=2 PIPELINE_WORKERS_ANALYSIS=2
+
+Transient failures (timeouts, connection errors, rate limits, 5xx responses)
+are retried with exponential backoff, PIPELINE_RETRY_ATTEMPTS times in total
+per stage; the stage's worker slot is released while it waits.
+
+Stage slots are priority limiters (see scheduler.py): when a stage is
+saturated, runs in the interactive class get the next free worker ahead of
+prefetch and batch runs, and batch runs only fill part of the workers. The
+CLI runs as batch.
+
+Usage (from backend/):
+    python -m services.pipeline 2401.00001 2401.00002 --targets metadata analysis
+    python -m services.pipeline 2401.00001 --targets parse --plan
+"""
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Optional, Dict, Any, List, Callable, Iterable, Union
+
+import httpx
+import openai
+
+from . import cache_service, paper_stages, scheduler
+
+PIPELINE: Dict[str, Dict[str, Any]] = {
+    "metadata": {"cache": "metadata", "requires": (), "after": ()},
+    "download": {"cache": "pdf", "requires": (), "after": ()},
+    "parse": {"cache": "markdown", "requires": ("download",), "after": ()},
+    "sections": {"cache": "sections", "requires": ("parse",), "after": ()},
+    "analysis": {"cache": "analysis", "requires": ("parse",), "after": ("sections",)},
+}
+
+STAGE_WORKERS = {
+    "metadata": int(os.getenv("PIPELINE_WORKERS_METADATA", "4")),
+    "download": int(os.getenv("PIPELINE_WORKERS_DOWNLOAD", "4")),
+    "parse": int(os.getenv("PIPELINE_WORKERS_PARSE", "1")),
+    "sections": int(os.getenv("PIPELINE_WORKERS_SECTIONS", "2")),
+    "analysis": int(os.getenv("PIPELINE_WORKERS_ANALYSIS", "2")),
+}
+
+DEFAULT_TARGETS = ("metadata", "analysis")
+
+# Attempts per stage run, and the delay before the first retry (doubles after each attempt)
+RETRY_ATTEMPTS = int(os.getenv("PIPELINE_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_SECONDS = float(os.getenv("PIPELINE_RETRY_BASE_SECONDS", "2"))
+
+TRANSIENT_EXCEPTIONS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+# Stages that report failure as an error string (parser, S2 and analysis results)
+TRANSIENT_ERROR_PATTERN = re.compile(
+    r'time[d ]?out|rate limit|too many requests|connection|temporarily|\b(?:429|500|502|503|504)\b',
+    re.IGNORECASE
+)
+
+# Stage statuses that let dependent stages go ahead
+OK_STATUSES = {"done", "cached"}
+
+_limiters = {stage: scheduler.limiter(f"pipeline:{stage}", workers) for stage, workers in STAGE_WORKERS.items()}
+
+
+def _dependencies(stage: str) -> tuple:
+    return PIPELINE[stage]["requires"] + PIPELINE[stage]["after"]
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed stage is worth retrying."""
+    if isinstance(error, TRANSIENT_EXCEPTIONS):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return bool(TRANSIENT_ERROR_PATTERN.search(str(error)))
+
+
+def retry_delay(attempt: int) -> float:
+    """Backoff before retrying after the given attempt, with jitter."""
+    return RETRY_BASE_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+
+def validate_targets(targets: Iterable[str]) -> List[str]:
+    """Target stages as a list, raising ValueError for unknown names."""
+    targets = list(targets)
+    unknown = [target for target in targets if target not in PIPELINE]
+    if unknown or not targets:
+        raise ValueError(f"Targets must be among {', '.join(PIPELINE)} (got {', '.join(targets) or 'none'})")
+    return targets
+
+
+def plan(
+    arxiv_id: str,
+    targets: Iterable[str] = DEFAULT_TARGETS,
+    force: Union[bool, Iterable[str]] = False
+) -> Dict[str, bool]:
+    """
+    Decide which stages a run has to execute. force=True treats every
+    needed stage as stale, a list of stage names only those.
+
+    A missing upstream file only matters when something downstream has to
+    run: a paper with fresh markdown is not re-downloaded just because its
+    PDF was never cached.
+
+    Returns:
+        dict of stage -> True if it runs, False if its cached output is used,
+        for the targets and every stage they need, in pipeline order
+    """
+    targets = validate_targets(targets)
+    forced = set(PIPELINE) if force is True else set(force or ())
+    mtimes = {stage: cache_service.cache_mtime(arxiv_id, spec["cache"]) for stage, spec in PIPELINE.items()}
+    stale: Dict[str, bool] = {}
+
+    def is_stale(stage: str) -> bool:
+        if stage not in stale:
+            mtime = mtimes[stage]
+            stale[stage] = stage in forced or mtime is None or any(
+                mtimes[dep] is not None and (mtimes[dep] > mtime or is_stale(dep))
+                for dep in _dependencies(stage)
+            )
+        return stale[stage]
+
+    decisions: Dict[str, bool] = {}
+
+    def include(stage: str):
+        if stage in decisions:
+            return
+        decisions[stage] = is_stale(stage)
+        if decisions[stage]:
+            for dep in _dependencies(stage):
+                include(dep)
+
+    for target in targets:
+        include(target)
+    return {stage: decisions[stage] for stage in PIPELINE if stage in decisions}
+
+
+async def _run_stage(stage: str, arxiv_id: str, mode: str, arxiv_url: Optional[str]) -> Dict[str, Any]:
+    """
+    Execute one stage (the plan already decided it is stale).
+
+    Returns:
+        Short summary for the run report (never the full markdown or analysis)
+
+    Raises:
+        Exception if the stage failed
+    """
+    if stage == "metadata":
+        result = await paper_stages.metadata_stage(arxiv_id, force=True)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error") or "Metadata fetch failed")
+        return {"title": result.get("title")}
+    if stage == "download":
+        result = await paper_stages.download_stage(arxiv_id, arxiv_url, force=True)
+        return {"size_bytes": result["size_bytes"]}
+    if stage == "parse":
+        result = await paper_stages.parse_stage(arxiv_id, mode, force=True)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error") or "Parsing failed")
+        return {"method": result.get("method"), "chars": len(result["markdown"])}
+    if stage == "sections":
+        sections = await paper_stages.sections_stage(arxiv_id, force=True)
+        return {"title": sections.get("title")}
+    if stage == "analysis":
+        result = await paper_stages.analysis_stage(arxiv_id, force=True)
+        if not result.get("success"):
+            raise RuntimeError(result.get("error") or "Analysis failed")
+        return {"usage": result.get("usage")}
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+async def run_paper(
+    arxiv_id: str,
+    targets: Iterable[str] = DEFAULT_TARGETS,
+    force: Union[bool, Iterable[str]] = False,
+    mode: str = "hybrid",
+    arxiv_url: Optional[str] = None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Bring a paper's target stages up to date.
+
+    Args:
+        arxiv_id: The ArXiv ID
+        targets: Stages whose output is wanted
+        force: Re-run every needed stage even if its output is fresh, or
+               only the named stages
+        mode: Parser mode for the parse stage
+        arxiv_url: URL to download the PDF from (default: the arXiv abs page)
+        on_event: Receives a "plan" event, then a "stage" event whenever a
+                  stage changes status (waiting, running, retrying, done,
+                  failed, skipped)
+
+    Returns:
+        dict with arxiv_id, success (every target done or cached), stages
+        (status, attempts, seconds, queued_seconds and a short summary or
+        error per stage) and seconds
+    """
+    started = time.perf_counter()
+    targets = validate_targets(targets)
+    decisions = plan(arxiv_id, targets, force)
+    notify = on_event or (lambda event: None)
+    stages = {stage: {"status": "pending" if runs else "cached"} for stage, runs in decisions.items()}
+    notify({"event": "plan", "arxiv_id": arxiv_id, "stages": {stage: dict(info) for stage, info in stages.items()}})
+
+    def update(stage: str, **changes):
+        stages[stage].update(changes)
+        notify({"event": "stage", "arxiv_id": arxiv_id, "stage": stage, **stages[stage]})
+
+    async def attempt_stage(stage: str) -> Dict[str, Any]:
+        """One try at a stage inside its worker limit; the slot is freed before any retry wait."""
+        queued = time.perf_counter()
+        async with _limiters[stage].slot():
+            stage_started = time.perf_counter()
+            try:
+                update(stage, status="running", queued_seconds=round(stage_started - queued, 3))
+                return await _run_stage(stage, arxiv_id, mode, arxiv_url)
+            finally:
+                stages[stage]["seconds"] = round(time.perf_counter() - stage_started, 3)
+
+    async def execute(stage: str):
+        for dep in _dependencies(stage):
+            if dep in tasks:
+                await tasks[dep]
+        blocked = [dep for dep in PIPELINE[stage]["requires"] if stages[dep]["status"] not in OK_STATUSES]
+        if blocked:
+            update(stage, status="skipped", error=f"{blocked[0]} did not complete")
+            return
+
+        for attempt in range(1, max(RETRY_ATTEMPTS, 1) + 1):
+            update(stage, status="waiting", attempts=attempt)
+            try:
+                summary = await attempt_stage(stage)
+            except Exception as e:
+                if attempt < RETRY_ATTEMPTS and is_transient(e):
+                    delay = retry_delay(attempt)
+                    print(f"🔁 {arxiv_id}: {stage} failed ({e}), retrying in {delay:.1f}s")
+                    update(stage, status="retrying", error=str(e), retry_in_seconds=round(delay, 1))
+                    await asyncio.sleep(delay)
+                    continue
+                print(f"❌ {arxiv_id}: {stage} failed: {e}")
+                stages[stage].pop("retry_in_seconds", None)
+                update(stage, status="failed", error=str(e))
+                return
+            stages[stage].pop("error", None)
+            stages[stage].pop("retry_in_seconds", None)
+            update(stage, status="done", **summary)
+            return
+
+    # Every stage starts at once and waits for its own dependencies
+    tasks: Dict[str, asyncio.Task] = {}
+    for stage, runs in decisions.items():
+        if runs:
+            tasks[stage] = asyncio.ensure_future(execute(stage))
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+    return {
+        "arxiv_id": arxiv_id,
+        "success": all(stages[target]["status"] in OK_STATUSES for target in targets),
+        "stages": stages,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def run_papers(
+    arxiv_ids: List[str],
+    targets: Iterable[str] = DEFAULT_TARGETS,
+    force: bool = False,
+    mode: str = "hybrid",
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Run the pipeline for a list of papers; the per-stage worker limits keep
+    e.g. OCR and LLM calls bounded while other stages keep working.
+
+    Returns:
+        One run_paper result per paper, in input order
+    """
+    targets = validate_targets(targets)
+    return await asyncio.gather(*(
+        run_paper(arxiv_id, targets, force=force, mode=mode, on_event=on_event)
+        for arxiv_id in dict.fromkeys(arxiv_ids)
+    ))
+
+
+def stage_stats() -> Dict[str, Dict[str, int]]:
+    """Workers, running and waiting stage runs per stage."""
+    stats = {}
+    for stage in PIPELINE:
+        limiter = _limiters[stage].stats()
+        stats[stage] = {"workers": limiter["capacity"], "running": limiter["in_use"], "waiting": limiter["waiting"]}
+    return stats
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Process papers through the pipeline")
+    parser.add_argument("arxiv_ids", nargs="+")
+    parser.add_argument("--targets", nargs="+", choices=list(PIPELINE), default=list(DEFAULT_TARGETS))
+    parser.add_argument("--force", action="store_true", help="Re-run stages even if their output is fresh")
+    parser.add_argument("--mode", default="hybrid", choices=["hybrid", "ocr", "pymupdf"], help="Parser mode")
+    parser.add_argument("--plan", action="store_true", help="Only show which stages would run")
+    args = parser.parse_args()
+
+    if args.plan:
+        result = {arxiv_id: plan(arxiv_id, args.targets, args.force) for arxiv_id in args.arxiv_ids}
+    else:
+        with scheduler.priority("batch"):
+            result = asyncio.run(run_papers(args.arxiv_ids, args.targets, args.force, args.mode))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import os
+import re
+import threading
+import numpy as np
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Any
+from .models import ApplicationIdea
+from . import cache_service
+
+# Candidates kept after ranking (0 = no cap)
+PREFILTER_TOP_K = int(os.getenv("RELEVANCE_PREFILTER_TOP_K", "15"))
+# Minimum BM25 score, relative to the best candidate in the pool (0.0 - 1.0)
+PREFILTER_MIN_SCORE = float(os.getenv("RELEVANCE_PREFILTER_MIN_SCORE", "0.1"))
+
+# Standard BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset("""
+a an and are as at be by can for from has have in into is it its of on or our that the their
+these this those to using use used via we which with within without based new paper approach
+method methods propose proposed show results study task tasks model models
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with a light plural strip."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) < 2 or token in _STOPWORDS:
+            continue
+        if len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def application_query(application_idea: ApplicationIdea) -> str:
+    """Text the candidates are ranked against."""
+    return f"{application_idea.domain} {application_idea.specific_utility}"
+
+
+def _document_text(paper: Dict[str, Any]) -> str:
+    # Title counts twice: it is short and usually the most specific text
+    title = paper.get("title") or ""
+    return f"{title} {title} {paper.get('abstract') or ''}"
+
+
+def tokenized_corpus(metadata: Dict[str, Dict[str, Any]]) -> Dict[str, Counter]:
+    """Term counts of each paper's title and abstract, keyed by arXiv ID."""
+    return {arxiv_id: Counter(tokenize(_document_text(paper))) for arxiv_id, paper in metadata.items()}
+
+
+# Tokenized metadata of the whole cache, rebuilt after metadata is saved or cleared
+_corpus_lock = threading.Lock()
+_corpus_cache: Dict[str, Any] = {"key": None, "corpus": {}}
+
+
+def _cached_corpus() -> Dict[str, Counter]:
+    key = (str(cache_service.CACHE_DIR), cache_service.metadata_generation())
+    with _corpus_lock:
+        if _corpus_cache["key"] != key:
+            _corpus_cache["corpus"] = tokenized_corpus(cache_service.load_all_metadata())
+            _corpus_cache["key"] = key
+        return _corpus_cache["corpus"]
+
+
+def bm25_scores(query: str, documents: List[str], corpus: Optional[List[Counter]] = None) -> np.ndarray:
+    """
+    Score documents against a query with BM25.
+
+    Args:
+        query: Free-text query
+        documents: Texts to score
+        corpus: Term counts of extra documents used only for document
+            frequencies, so IDF is stable when the candidate pool is small
+
+    Returns:
+        Array of scores aligned with documents
+    """
+    query_terms = sorted(set(tokenize(query)))
+    if not documents or not query_terms:
+        return np.zeros(len(documents))
+
+    def term_counts(token_counts: List[Counter]) -> Tuple[np.ndarray, np.ndarray]:
+        counts = np.array([[tokens.get(term, 0) for term in query_terms] for tokens in token_counts], dtype=float)
+        lengths = np.array([sum(tokens.values()) for tokens in token_counts], dtype=float)
+        return counts.reshape(len(token_counts), len(query_terms)), lengths
+
+    tf, doc_lengths = term_counts([Counter(tokenize(text)) for text in documents])
+    if corpus:
+        corpus_tf, corpus_lengths = term_counts(corpus)
+        all_tf = np.vstack([tf, corpus_tf])
+        all_lengths = np.concatenate([doc_lengths, corpus_lengths])
+    else:
+        all_tf, all_lengths = tf, doc_lengths
+
+    n_docs = all_tf.shape[0]
+    doc_freq = (all_tf > 0).sum(axis=0)
+    idf = np.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+    avg_length = max(all_lengths.mean(), 1.0)
+
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_lengths / avg_length)
+    weights = tf * (BM25_K1 + 1.0) / (tf + norm[:, None])
+    return weights @ idf
+
+
+def _select(scores: np.ndarray, top_k: int, min_score: float) -> np.ndarray:
+    """
+    Indices to keep: at or above min_score relative to the best, at most top_k, best first.
+    When nothing scores (no shared terms, or a query of stopwords only) the
+    ranking says nothing, so the first top_k candidates pass in input order.
+    """
+    best = scores.max() if len(scores) else 0.0
+    if best <= 0:
+        keep = list(range(len(scores)))
+        return np.array(keep[:top_k] if top_k > 0 else keep, dtype=int)
+    relative = scores / best
+    order = np.argsort(-scores, kind="stable")
+    keep = [index for index in order if relative[index] >= min_score]
+    if top_k > 0:
+        keep = keep[:top_k]
+    return np.array(keep, dtype=int)
+
+
+def prefilter_candidates(
+    application_idea: ApplicationIdea,
+    candidates: List[Dict[str, Any]],
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+    corpus: Optional[Dict[str, Counter]] = None
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Rank candidates lexically against the application and keep the promising ones.
+
+    Candidates are kept when their BM25 score is at least min_score times the
+    best score in the pool, up to top_k of them. Set min_score to 0 and top_k
+    to 0 to pass everything through.
+
+    Args:
+        application_idea: The target application
+        candidates: Dicts with paper_id, title and abstract
+        top_k: Maximum candidates to keep (defaults to PREFILTER_TOP_K)
+        min_score: Relative score threshold (defaults to PREFILTER_MIN_SCORE)
+        corpus: arXiv ID -> term counts used for document frequencies (see
+            tokenized_corpus; defaults to all cached metadata, tokenized once
+            per metadata change); candidates themselves are excluded
+
+    Returns:
+        Tuple of (kept, dropped), each in the original candidate order and
+        annotated with "prefilter_score"
+    """
+    if not candidates:
+        return [], []
+
+    top_k = PREFILTER_TOP_K if top_k is None else top_k
+    min_score = PREFILTER_MIN_SCORE if min_score is None else min_score
+    if corpus is None:
+        corpus = _cached_corpus()
+    candidate_ids = {candidate.get("paper_id") for candidate in candidates}
+
+    scores = bm25_scores(
+        application_query(application_idea),
+        [_document_text(candidate) for candidate in candidates],
+        [tokens for arxiv_id, tokens in corpus.items() if arxiv_id not in candidate_ids]
+    )
+    keep = set(_select(scores, top_k, min_score).tolist())
+
+    kept, dropped = [], []
+    for index, candidate in enumerate(candidates):
+        scored = {**candidate, "prefilter_score": round(float(scores[index]), 4)}
+        (kept if index in keep else dropped).append(scored)
+
+    print(f"🔎 Pre-filter kept {len(kept)}/{len(candidates)} candidates")
+    return kept, dropped
+
+
+def measure_prefilter_recall(
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Replay cached relevance decisions through the pre-filter.
+
+    Every application in the relevance cache is re-ranked against the papers
+    the LLM judged for it. Recall is the share of LLM-relevant papers the
+    pre-filter would still have sent on; reduction is the share of LLM calls
+    it would have saved.
+
+    Returns:
+        dict with recall, reduction, counts and the settings used
+    """
+    top_k = PREFILTER_TOP_K if top_k is None else top_k
+    min_score = PREFILTER_MIN_SCORE if min_score is None else min_score
+
+    metadata = cache_service.load_all_metadata()
+    corpus = tokenized_corpus(metadata)
+
+    # Group past decisions by application, one decision per paper
+    by_application: Dict[str, Dict[str, Any]] = {}
+    for entry in cache_service.load_all_relevance_decisions().values():
+        application = entry.get("application")
+        arxiv_id = entry.get("arxiv_id")
+        if not application or arxiv_id not in metadata:
+            continue
+        group = by_application.setdefault(
+            cache_service.application_hash(application),
+            {"application": application, "decisions": {}}
+        )
+        group["decisions"][arxiv_id] = bool(entry.get("decision"))
+
+    relevant = kept_relevant = judged = kept_total = 0
+    for group in by_application.values():
+        application_idea = ApplicationIdea.model_validate(group["application"])
+        candidates = [
+            {"paper_id": arxiv_id, "title": metadata[arxiv_id].get("title"), "abstract": metadata[arxiv_id].get("abstract")}
+            for arxiv_id in group["decisions"]
+        ]
+        kept, _ = prefilter_candidates(application_idea, candidates, top_k, min_score, corpus)
+        kept_ids = {candidate["paper_id"] for candidate in kept}
+
+        judged += len(candidates)
+        kept_total += len(kept)
+        for arxiv_id, decision in group["decisions"].items():
+            if decision:
+                relevant += 1
+                kept_relevant += arxiv_id in kept_ids
+
+    return {
+        "applications": len(by_application),
+        "judged": judged,
+        "relevant": relevant,
+        "kept": kept_total,
+        "kept_relevant": kept_relevant,
+        "recall": round(kept_relevant / relevant, 4) if relevant else None,
+        "reduction": round(1 - kept_total / judged, 4) if judged else None,
+        "top_k": top_k,
+        "min_score": min_score,
+    }
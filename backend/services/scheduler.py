@@ -0,0 +1,256 @@
+"""
+Priority scheduling for shared resources (the OCR server, the OpenAI quota,
+pipeline stage slots).
+
+Work runs in one of three priority classes:
+    interactive  a user is waiting on the result (API requests, the default)
+    prefetch     likely to be needed soon (background jobs)
+    batch        bulk work (imports, library-wide runs, CLI runs)
+
+A PriorityLimiter hands out a fixed number of slots. When a slot frees up
+the oldest waiter of the highest class gets it, so interactive work jumps
+ahead of queued batch work. Batch work may only hold BATCH_SHARE of the
+slots (at least one), leaving the rest as headroom for interactive and
+prefetch work that arrives while a batch is running. Work that already holds
+a slot is never interrupted.
+
+Work that takes a slot many times in a row (a parse sends one OCR request
+per page) wraps the whole run in `limiter.reserve()`: while it is active,
+lower classes are not granted slots, so they cannot slip in between its
+steps. This is what keeps a single-slot resource such as the OCR server
+from alternating pages between an interactive parse and a batch one.
+
+The class travels with the call through a context variable: wrap work in
+`with priority("batch"):` and every limiter it reaches (including OCR pages
+parsed in a worker thread via asyncio.to_thread) queues it as batch.
+
+Each limiter records queue latency per class; see stats().
+    OCR_CONCURRENCY=1 OPENAI_CONCURRENCY=8 SCHEDULER_BATCH_SHARE=0.75
+"""
+import os
+import math
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Optional, Dict, Any, List, Deque
+
+PRIORITY_CLASSES = ("interactive", "prefetch", "batch")
+
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "1"))
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "8"))
+# Fraction of a limiter's slots batch work may hold at once (at least one)
+BATCH_SHARE = float(os.getenv("SCHEDULER_BATCH_SHARE", "0.75"))
+# Recent waits kept per class for percentiles
+LATENCY_WINDOW = 500
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("priority", default="interactive")
+
+
+@contextmanager
+def priority(priority_class: str):
+    """Run the block (and everything it awaits or starts) in a priority class."""
+    if priority_class not in PRIORITY_CLASSES:
+        raise ValueError(f"Priority must be one of {', '.join(PRIORITY_CLASSES)}")
+    token = _priority.set(priority_class)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class _Waiter:
+    """A queued acquire, woken either through an asyncio future or a threading event."""
+
+    def __init__(self, priority_class: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority_class = priority_class
+        self.enqueued = time.perf_counter()
+        self.granted = False
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+
+    def wake(self):
+        self.granted = True
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+        else:
+            self.event.set()
+
+
+class PriorityLimiter:
+    """
+    Concurrency limit with priority classes, usable from coroutines
+    (`async with limiter.slot():`) and from threads (`with limiter.slot_sync():`).
+
+    Args:
+        name: Shown in stats
+        capacity: Slots held at once
+        batch_share: Fraction of the slots batch work may hold
+    """
+
+    def __init__(self, name: str, capacity: int, batch_share: float = BATCH_SHARE):
+        self.name = name
+        self.capacity = max(capacity, 1)
+        self.limits = {
+            "interactive": self.capacity,
+            "prefetch": self.capacity,
+            "batch": max(1, math.floor(self.capacity * batch_share)),
+        }
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[_Waiter]] = {cls: deque() for cls in PRIORITY_CLASSES}
+        self._in_use = {cls: 0 for cls in PRIORITY_CLASSES}
+        # Runs inside reserve() per class; lower classes wait while any are active
+        self._reserved = {cls: 0 for cls in PRIORITY_CLASSES}
+        self._waits: Dict[str, Deque[float]] = {cls: deque(maxlen=LATENCY_WINDOW) for cls in PRIORITY_CLASSES}
+        self._granted = {cls: 0 for cls in PRIORITY_CLASSES}
+        self._total_wait = {cls: 0.0 for cls in PRIORITY_CLASSES}
+        self._max_wait = {cls: 0.0 for cls in PRIORITY_CLASSES}
+
+    def _admissible(self, priority_class: str) -> bool:
+        higher = PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority_class)]
+        if any(self._reserved[cls] for cls in higher):
+            return False
+        return sum(self._in_use.values()) < self.capacity and self._in_use[priority_class] < self.limits[priority_class]
+
+    def _grant(self, waiter: _Waiter):
+        """Take a slot for the waiter and record its queue latency (lock held)."""
+        priority_class = waiter.priority_class
+        waited = time.perf_counter() - waiter.enqueued
+        self._in_use[priority_class] += 1
+        self._granted[priority_class] += 1
+        self._waits[priority_class].append(waited)
+        self._total_wait[priority_class] += waited
+        self._max_wait[priority_class] = max(self._max_wait[priority_class], waited)
+        waiter.wake()
+
+    def _dispatch(self):
+        """Hand free slots to the highest-priority admissible waiters (lock held)."""
+        progress = True
+        while progress:
+            progress = False
+            for priority_class in PRIORITY_CLASSES:
+                queue = self._queues[priority_class]
+                if queue and self._admissible(priority_class):
+                    self._grant(queue.popleft())
+                    progress = True
+                    break
+
+    def _enqueue(self, waiter: _Waiter):
+        with self._lock:
+            self._queues[waiter.priority_class].append(waiter)
+            self._dispatch()
+
+    def _release(self, priority_class: str):
+        with self._lock:
+            self._in_use[priority_class] -= 1
+            self._dispatch()
+
+    def _abandon(self, waiter: _Waiter):
+        """Withdraw a waiter whose caller gave up; give the slot back if it was already granted."""
+        with self._lock:
+            if not waiter.granted:
+                self._queues[waiter.priority_class].remove(waiter)
+                return
+        self._release(waiter.priority_class)
+
+    @asynccontextmanager
+    async def slot(self, priority_class: Optional[str] = None):
+        """Hold one slot for the block, queueing by priority class (default: the current one)."""
+        waiter = _Waiter(priority_class or current_priority(), asyncio.get_running_loop())
+        self._enqueue(waiter)
+        try:
+            await waiter.future
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        try:
+            yield
+        finally:
+            self._release(waiter.priority_class)
+
+    @contextmanager
+    def slot_sync(self, priority_class: Optional[str] = None):
+        """Blocking version of slot() for code running in worker threads."""
+        waiter = _Waiter(priority_class or current_priority())
+        self._enqueue(waiter)
+        waiter.event.wait()
+        try:
+            yield
+        finally:
+            self._release(waiter.priority_class)
+
+    @contextmanager
+    def reserve(self, priority_class: Optional[str] = None):
+        """
+        Keep lower classes from taking slots while the block runs, so a run of
+        acquires (one per page, say) is not interleaved with lower-priority
+        work. Slots lower classes already hold are finished, not interrupted.
+        Usable from threads and coroutines; it never blocks.
+        """
+        priority_class = priority_class or current_priority()
+        with self._lock:
+            self._reserved[priority_class] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._reserved[priority_class] -= 1
+                self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Slots in use, waiting work and queue latency (seconds) per class."""
+        with self._lock:
+            classes = {}
+            for priority_class in PRIORITY_CLASSES:
+                waits = sorted(self._waits[priority_class])
+                granted = self._granted[priority_class]
+                classes[priority_class] = {
+                    "limit": self.limits[priority_class],
+                    "in_use": self._in_use[priority_class],
+                    "reserved": self._reserved[priority_class],
+                    "waiting": len(self._queues[priority_class]),
+                    "granted": granted,
+                    "avg_wait_seconds": round(self._total_wait[priority_class] / granted, 3) if granted else 0.0,
+                    "p50_wait_seconds": round(_percentile(waits, 0.5), 3),
+                    "p95_wait_seconds": round(_percentile(waits, 0.95), 3),
+                    "max_wait_seconds": round(self._max_wait[priority_class], 3),
+                }
+            return {
+                "capacity": self.capacity,
+                "in_use": sum(self._in_use.values()),
+                "waiting": sum(len(queue) for queue in self._queues.values()),
+                "classes": classes,
+            }
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+_limiters: Dict[str, PriorityLimiter] = {}
+
+
+def limiter(name: str, capacity: int) -> PriorityLimiter:
+    """The process-wide limiter for a resource, created on first use."""
+    if name not in _limiters:
+        _limiters[name] = PriorityLimiter(name, capacity)
+    return _limiters[name]
+
+
+# Shared resources: requests to the local OCR server and to the OpenAI API
+ocr_limiter = limiter("ocr", OCR_CONCURRENCY)
+openai_limiter = limiter("openai", OPENAI_CONCURRENCY)
+
+
+def stats() -> Dict[str, Any]:
+    """Per-limiter, per-class slot usage and queue latency."""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
@@ -0,0 +1,297 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from .models import PaperSections, PaperSectionSpans
+
+# Below this confidence extract_paper_sections falls back to the LLM
+MIN_LOCAL_CONFIDENCE = float(os.getenv("SECTION_SEGMENTER_MIN_CONFIDENCE", "0.8"))
+
+# Minimum characters for a section to count as "found" when scoring confidence
+MIN_SECTION_CHARS = {
+    "abstract": 200,
+    "introduction": 500,
+    "methodology": 500,
+    "experiments": 500,
+    "conclusion": 200,
+}
+
+# Heading keywords, checked in order. "stop" ends the paper body,
+# "skip" drops the section but keeps scanning.
+SECTION_KEYWORDS = [
+    ("stop", ("references", "bibliography", "appendix", "appendices", "supplementary")),
+    ("skip", ("acknowledg", "author contributions", "ethics statement", "reproducibility statement")),
+    ("abstract", ("abstract",)),
+    ("conclusion", ("conclusion", "concluding")),
+    ("experiments", ("experiment", "result", "evaluation", "ablation", "benchmark", "empirical",
+                     "setup", "implementation detail", "dataset")),
+    ("introduction", ("introduction", "related work", "background", "preliminar", "motivation",
+                      "prior work", "literature")),
+    ("methodology", ("method", "approach", "model", "architecture", "framework", "algorithm",
+                     "proposed", "formulation", "design", "overview", "technique", "training")),
+    ("conclusion", ("discussion", "limitation", "future work", "summary", "broader impact", "outlook")),
+]
+
+# Plain (non-markdown) lines that are headings when they stand alone
+STANDALONE_HEADINGS = {
+    "abstract", "introduction", "related work", "background", "method", "methods",
+    "methodology", "approach", "experiments", "results", "evaluation", "discussion",
+    "conclusion", "conclusions", "limitations", "references", "bibliography",
+    "acknowledgments", "acknowledgements", "appendix",
+}
+
+_HEADING_RE = re.compile(r'^#{1,6}\s+(.+?)\s*#*\s*$')
+_PAGE_MARKER_RE = re.compile(r'^#{1,6}\s+Page\s+\d+\s*$', re.IGNORECASE)
+_BOLD_HEADING_RE = re.compile(r'^\*\*([^*]{2,80})\*\*$')
+_NUMBER_PREFIX_RE = re.compile(r'^(?:(\d+(?:\.\d+)*)|([IVX]+)|([A-H]))[.:)]?\s+(?=\S)')
+_INLINE_ABSTRACT_RE = re.compile(r'^\**abstract\**\s*[:.—–-]\s*(.+)$', re.IGNORECASE)
+_CONTRIBUTIONS_RE = re.compile(
+    r'(our (main |key |primary )?contributions|we make the following contributions|'
+    r'contributions of this (paper|work)|in summary|to summarize|we summarize)',
+    re.IGNORECASE
+)
+_LIST_ITEM_RE = re.compile(r'^\s*(?:[•\-*–]|\(?[ivx]+\)|\(?\d+[.)]|\(?[a-z]\))\s+')
+_CODE_URL_RE = re.compile(r'https?://(?:www\.)?(?:github\.com|gitlab\.com)/[^\s)\]}>,"\'`]+', re.IGNORECASE)
+
+
+def _parse_heading(line: str) -> Optional[Tuple[str, int, bool]]:
+    """
+    Recognize a heading line.
+
+    Returns:
+        (heading text without numbering, numbering depth, is_letter_numbered)
+        or None if the line is not a heading. Depth is 0 for unnumbered headings.
+    """
+    stripped = line.strip()
+    if not stripped or len(stripped) > 120:
+        return None
+
+    match = _HEADING_RE.match(stripped) or _BOLD_HEADING_RE.match(stripped)
+    if match:
+        text = match.group(1).strip().strip('*').strip()
+    else:
+        # Plain lines only count when they are a well-known section name
+        candidate = _NUMBER_PREFIX_RE.sub('', stripped).rstrip('.:').strip().lower()
+        if candidate not in STANDALONE_HEADINGS:
+            return None
+        text = stripped
+
+    depth = 0
+    letter = False
+    number = _NUMBER_PREFIX_RE.match(text)
+    if number:
+        if number.group(1):
+            depth = number.group(1).count('.') + 1
+        else:
+            depth = 1
+            letter = number.group(3) is not None
+        text = text[number.end():].strip()
+    return text, depth, letter
+
+
+def _classify_heading(text: str) -> Optional[str]:
+    """Map a heading to a section bucket by keyword, or None if unknown."""
+    lowered = text.lower()
+    for bucket, keywords in SECTION_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return bucket
+    return None
+
+
+def _extract_title(lines: List[str]) -> Optional[str]:
+    """
+    Find the paper title: the first heading that isn't a section name, or
+    else the first text block. Section headings before it are skipped, since
+    text layers often lose the title and start at "1 Introduction".
+    """
+    block: List[str] = []
+    for line in lines:
+        stripped = line.strip()
+        if _PAGE_MARKER_RE.match(stripped) or stripped == "# Research Paper":
+            continue
+        if not stripped:
+            if block:
+                break
+            continue
+        if stripped.lower().startswith("arxiv:"):
+            continue
+        heading = _parse_heading(stripped)
+        if heading:
+            if block:
+                break
+            if _classify_heading(heading[0]) is None:
+                return heading[0]
+            continue
+        block.append(stripped)
+
+    title = " ".join(block)
+    if title and len(title) <= 250:
+        return title
+    # A body paragraph: its first line is the best we have
+    if block and len(block[0]) <= 250:
+        return block[0]
+    return None
+
+
+def _extract_contributions(introduction: str) -> str:
+    """Pull the 'our contributions are...' paragraph and its list out of the introduction."""
+    paragraphs = [p for p in re.split(r'\n\s*\n', introduction) if p.strip()]
+    for index, paragraph in enumerate(paragraphs):
+        if not _CONTRIBUTIONS_RE.search(paragraph):
+            continue
+        collected = [paragraph.strip()]
+        for follower in paragraphs[index + 1:]:
+            if _LIST_ITEM_RE.match(follower):
+                collected.append(follower.strip())
+            else:
+                break
+        return "\n\n".join(collected)
+    return ""
+
+
+def segment_markdown(markdown: str) -> Tuple[PaperSections, float]:
+    """
+    Build PaperSections locally from the heading structure of parsed markdown.
+
+    Uses the ### headers emitted by improve_markdown_formatting, markdown
+    headings from the OCR model, numbered sections and well-known standalone
+    section names. Everything from References/Appendix onwards is dropped.
+
+    Args:
+        markdown: Raw paper markdown (PyMuPDF, OCR or hybrid output)
+
+    Returns:
+        Tuple of (PaperSections, confidence between 0.0 and 1.0)
+    """
+    lines = markdown.split('\n')
+    buckets: Dict[str, List[str]] = {
+        "abstract": [], "introduction": [], "methodology": [],
+        "experiments": [], "conclusion": [],
+    }
+    seen = set()
+    current: Optional[str] = None
+
+    for line in lines:
+        stripped = line.strip()
+        if _PAGE_MARKER_RE.match(stripped) or stripped == "# Research Paper":
+            continue
+
+        inline_abstract = _INLINE_ABSTRACT_RE.match(stripped) if "abstract" not in seen else None
+        if inline_abstract:
+            current = "abstract"
+            seen.add(current)
+            buckets[current].append(inline_abstract.group(1))
+            continue
+
+        heading = _parse_heading(line)
+        if heading:
+            text, depth, letter = heading
+            bucket = _classify_heading(text)
+            if letter and seen & {"experiments", "conclusion"}:
+                bucket = "stop"
+
+            if bucket == "stop":
+                break
+            if bucket == "skip":
+                current = None
+                continue
+            if depth > 1:
+                # Subsections stay with their parent section
+                bucket = None
+            elif bucket is None and depth == 1:
+                # Unknown top-level section: method before experiments, else stay put
+                if current in (None, "abstract", "introduction"):
+                    bucket = "methodology"
+
+            if bucket is not None:
+                current = bucket
+                seen.add(bucket)
+                if bucket == "abstract":
+                    continue
+            if current is not None:
+                buckets[current].append(f"### {text}" if depth <= 1 else stripped)
+            continue
+
+        if current is not None:
+            buckets[current].append(stripped)
+
+    texts = {
+        name: re.sub(r'\n{3,}', '\n\n', '\n'.join(content)).strip()
+        for name, content in buckets.items()
+    }
+
+    title = _extract_title(lines)
+    code_url = _CODE_URL_RE.search(markdown)
+    github_url = code_url.group(0).rstrip('.') if code_url else None
+
+    sections = PaperSections(
+        title=title or "Unknown Title",
+        github_url=github_url,
+        abstract_text=texts["abstract"],
+        introduction_text=texts["introduction"],
+        contributions_text=_extract_contributions(texts["introduction"]),
+        methodology_text=texts["methodology"],
+        experiments_text=texts["experiments"],
+        conclusion_text=texts["conclusion"],
+    )
+
+    found = sum(
+        1 for name, min_chars in MIN_SECTION_CHARS.items()
+        if len(texts[name]) >= min_chars
+    )
+    confidence = found / len(MIN_SECTION_CHARS)
+    if title is None:
+        confidence -= 0.1
+
+    return sections, max(confidence, 0.0)
+
+
+def number_lines(markdown: str) -> str:
+    """
+    Prefix every non-empty line with its 1-based line number ("L12: ...").
+    Used as LLM input so the model can answer with line ranges.
+    """
+    return '\n'.join(
+        f"L{index}: {line}"
+        for index, line in enumerate(markdown.split('\n'), start=1)
+        if line.strip()
+    )
+
+
+def sections_from_spans(markdown: str, spans: PaperSectionSpans) -> PaperSections:
+    """
+    Slice the original markdown into PaperSections using LLM-provided line ranges.
+
+    Args:
+        markdown: The markdown the line numbers refer to
+        spans: Section boundaries returned by the model
+
+    Returns:
+        PaperSections with verbatim text taken from the markdown
+    """
+    lines = markdown.split('\n')
+    parts: Dict[str, List[str]] = {}
+    for span in sorted(spans.spans, key=lambda s: s.start_line):
+        start = max(span.start_line, 1)
+        end = min(span.end_line, len(lines))
+        if end < start:
+            continue
+        chunk = '\n'.join(
+            line for line in lines[start - 1:end]
+            if not _PAGE_MARKER_RE.match(line.strip())
+        ).strip()
+        if chunk:
+            parts.setdefault(span.section, []).append(chunk)
+
+    def text(section: str) -> str:
+        return re.sub(r'\n{3,}', '\n\n', '\n\n'.join(parts.get(section, [])))
+
+    return PaperSections(
+        title=spans.title,
+        github_url=spans.github_url,
+        abstract_text=text("abstract"),
+        introduction_text=text("introduction"),
+        contributions_text=text("contributions"),
+        methodology_text=text("methodology"),
+        experiments_text=text("experiments"),
+        conclusion_text=text("conclusion"),
+    )
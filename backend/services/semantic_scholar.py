@@ -162,3 +162,39 @@ async def get_paper_metadata(arxiv_id: str, include_related: bool = True) -> Dic
             "citations": [],
             "recommendations": []
         }
+
+# Paper IDs per POST /paper/batch request (API limit)
+BATCH_LOOKUP_SIZE = 500
+BATCH_LOOKUP_FIELDS = ["paperId", "title", "authors", "year", "externalIds"]
+
+async def get_papers_batch(paper_ids: List[str]) -> Dict[str, Any]:
+    """
+    Look up many papers with one Semantic Scholar batch request per 500 IDs.
+    
+    Args:
+        paper_ids: IDs in any form the S2 API accepts ("ARXIV:1706.03762",
+                   "DOI:10.18653/v1/N19-1423", or a 40-character S2 paper ID)
+    
+    Returns:
+        dict with success, papers (basic info dicts as returned by
+        _format_related_paper) and not_found (the requested IDs S2 did not know)
+    """
+    from semanticscholar.SemanticScholarException import BadQueryParametersException
+
+    papers: List[Dict[str, Any]] = []
+    not_found: List[str] = []
+    try:
+        for start in range(0, len(paper_ids), BATCH_LOOKUP_SIZE):
+            chunk = paper_ids[start:start + BATCH_LOOKUP_SIZE]
+            try:
+                found, missing = await asyncio.to_thread(
+                    sch.get_papers, chunk, fields=BATCH_LOOKUP_FIELDS, return_not_found=True
+                )
+            except BadQueryParametersException:
+                # Raised when none of the IDs in the chunk exist
+                found, missing = [], chunk
+            papers.extend(p for p in (_format_related_paper(paper) for paper in found) if p)
+            not_found.extend(missing)
+        return {"success": True, "papers": papers, "not_found": not_found}
+    except Exception as e:
+        return {"success": False, "papers": papers, "not_found": not_found, "error": str(e)}
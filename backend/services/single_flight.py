@@ -0,0 +1,133 @@
+"""
+Request coalescing for expensive operations.
+
+Concurrent callers asking for the same work (same operation, paper and
+options) await one shared task instead of each downloading, OCR-ing or
+calling the LLM again and racing on the same cache files.
+"""
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Run at most one task per key; later callers join the in-flight one.
+
+    The shared task is shielded from any single caller's cancellation (a
+    disconnecting client doesn't abort work another client is waiting for).
+    It is cancelled only once every caller has gone, unless detached=True.
+
+    Progress events can be fanned out to every caller: the factory reports
+    through emitter(key), and each caller passes its own on_event callback.
+    Callers that join late only see events emitted after they joined.
+    Listeners always run on the event loop, even when the work emits from a
+    worker thread (a parse running under asyncio.to_thread).
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._listeners: Dict[Hashable, List[Callable[[Dict[str, Any]], None]]] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._tasks
+
+    def keys(self) -> List[Hashable]:
+        return list(self._tasks)
+
+    def emitter(self, key: Hashable) -> Callable[[Dict[str, Any]], None]:
+        """
+        Callback that forwards an event (a copy per listener) to everyone waiting on key.
+        Call it on the event loop; the callback itself may be used from any thread.
+        """
+        loop = asyncio.get_running_loop()
+
+        def fan_out(event: Dict[str, Any]):
+            for listener in list(self._listeners.get(key, ())):
+                listener(dict(event))
+
+        def emit(event: Dict[str, Any]):
+            if _on_loop(loop):
+                fan_out(event)
+            else:
+                # Listeners and the listener lists belong to the loop
+                loop.call_soon_threadsafe(fan_out, dict(event))
+        return emit
+
+    @contextmanager
+    def _listening(self, key: Hashable, on_event: Optional[Callable[[Dict[str, Any]], None]]):
+        if on_event is None:
+            yield
+            return
+        self._listeners.setdefault(key, []).append(on_event)
+        try:
+            yield
+        finally:
+            listeners = self._listeners.get(key, [])
+            if on_event in listeners:
+                listeners.remove(on_event)
+            if not listeners:
+                self._listeners.pop(key, None)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the exception retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def do(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[T]],
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        detached: bool = False
+    ) -> T:
+        """
+        Await the result of factory(), sharing it with concurrent callers of the same key.
+
+        Args:
+            key: Identifies the work, e.g. ("parse", arxiv_id, mode)
+            factory: Coroutine function that does the work; only called if
+                     nothing is in flight for key
+            on_event: Receives events the work emits through emitter(key)
+            detached: Keep running even if every caller is cancelled
+
+        Returns:
+            The shared result (the same object for every caller; copy before mutating)
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            print(f"🔗 Joining in-flight {key}")
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            with self._listening(key, on_event):
+                return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key) == 1 and not task.done() and not detached:
+                print(f"🛑 Last caller left, cancelling {key}")
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+
+def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+# Shared by the API and background workers so they coalesce with each other
+flights = SingleFlight()
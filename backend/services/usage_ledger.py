@@ -0,0 +1,283 @@
+"""
+Persistent ledger of every OpenAI call.
+
+Each call appends one JSON line to data/cache/usage.jsonl with the model,
+token counts (input, cached input, output), latency, estimated cost and the
+caller, plus the paper and application it was made for. The paper and
+application come from usage_context(), which endpoints set around their work
+so service functions don't need extra arguments.
+
+Prices are USD per 1M tokens. Override or extend the defaults with
+OPENAI_PRICING_JSON, either inline JSON or a path to a JSON file:
+    {"gpt-5.2": {"input": 1.75, "cached_input": 0.175, "output": 14.0}}
+"""
+import os
+import json
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+
+from . import cache_service
+from .append_log import AppendLog
+
+USAGE_FILE = cache_service.CACHE_DIR / "usage.jsonl"
+
+# Batch API requests are billed at half the interactive price
+BATCH_PRICE_FACTOR = 0.5
+
+DEFAULT_PRICING: Dict[str, Dict[str, float]] = {
+    "gpt-5.2": {"input": 1.75, "cached_input": 0.175, "output": 14.0},
+    "gpt-5": {"input": 1.25, "cached_input": 0.125, "output": 10.0},
+    "gpt-5-mini": {"input": 0.25, "cached_input": 0.025, "output": 2.0},
+    "gpt-5-nano": {"input": 0.05, "cached_input": 0.005, "output": 0.4},
+}
+
+GROUP_BY_FIELDS = ("day", "model", "paper", "application", "caller")
+
+_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("usage_context", default={})
+# Written in the background so model calls on the event loop don't wait on the disk
+_ledger = AppendLog("usage ledger")
+_pricing: Optional[Dict[str, Dict[str, float]]] = None
+
+
+def _load_pricing() -> Dict[str, Dict[str, float]]:
+    """Default prices merged with OPENAI_PRICING_JSON, if set."""
+    global _pricing
+    if _pricing is None:
+        pricing = dict(DEFAULT_PRICING)
+        override = os.getenv("OPENAI_PRICING_JSON")
+        if override:
+            try:
+                if os.path.isfile(override):
+                    with open(override, 'r', encoding='utf-8') as f:
+                        override = f.read()
+                pricing.update(json.loads(override))
+            except Exception as e:
+                print(f"⚠️ Ignoring OPENAI_PRICING_JSON: {e}")
+        _pricing = pricing
+    return _pricing
+
+
+def model_price(model: Optional[str]) -> Optional[Dict[str, float]]:
+    """
+    Price entry for a model; dated snapshots (gpt-5-mini-2025-08-07) fall
+    back to the longest matching prefix.
+    """
+    if not model:
+        return None
+    pricing = _load_pricing()
+    if model in pricing:
+        return pricing[model]
+    prefixes = [name for name in pricing if model.startswith(name + "-")]
+    return pricing[max(prefixes, key=len)] if prefixes else None
+
+
+def estimate_cost(
+    model: Optional[str],
+    input_tokens: int,
+    cached_input_tokens: int,
+    output_tokens: int,
+    batch: bool = False
+) -> Optional[float]:
+    """Estimated USD cost of one call, or None if the model has no price."""
+    price = model_price(model)
+    if price is None:
+        return None
+    uncached = max(input_tokens - cached_input_tokens, 0)
+    cost = (
+        uncached * price["input"]
+        + cached_input_tokens * price.get("cached_input", price["input"])
+        + output_tokens * price["output"]
+    ) / 1_000_000
+    if batch:
+        cost *= BATCH_PRICE_FACTOR
+    return round(cost, 6)
+
+
+@contextmanager
+def usage_context(paper_id: Optional[str] = None, application: Optional[Dict[str, Any]] = None):
+    """
+    Attribute OpenAI calls made inside the block to a paper and/or application.
+    Nested blocks inherit the outer values they don't override.
+    """
+    context = dict(_context.get())
+    if paper_id:
+        context["paper_id"] = paper_id
+    if application:
+        context["application_id"] = cache_service.application_hash(application)
+        context["application"] = application.get("domain") or context["application_id"]
+    token = _context.set(context)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> Dict[str, Any]:
+    """The paper/application attribution set by the enclosing usage_context()."""
+    return dict(_context.get())
+
+
+def _token_counts(usage: Any) -> Dict[str, int]:
+    """Token counts from an SDK usage object or a raw usage dict."""
+    if usage is None:
+        return {"input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0}
+    if isinstance(usage, dict):
+        details = usage.get("input_tokens_details") or {}
+        return {
+            "input_tokens": usage.get("input_tokens") or 0,
+            "cached_input_tokens": details.get("cached_tokens") or 0,
+            "output_tokens": usage.get("output_tokens") or 0,
+        }
+    details = getattr(usage, "input_tokens_details", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "cached_input_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+    }
+
+
+def record_call(
+    caller: str,
+    model: Optional[str],
+    usage: Any = None,
+    latency_seconds: Optional[float] = None,
+    error: Optional[str] = None,
+    batch: bool = False,
+    **context: Any
+) -> Dict[str, Any]:
+    """
+    Append one call to the ledger (queued; written by a background thread).
+
+    Args:
+        caller: What made the call (e.g. "summarize_paper")
+        model: Model that served the call
+        usage: SDK usage object or raw usage dict (None for failed calls)
+        latency_seconds: Wall-clock duration of the call
+        error: Error message if the call failed
+        batch: True for Batch API results (discounted price)
+        context: Explicit paper_id / application_id / application, overriding usage_context()
+
+    Returns:
+        The ledger entry
+    """
+    counts = _token_counts(usage)
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "caller": caller,
+        "model": model,
+        **counts,
+        "latency_seconds": round(latency_seconds, 3) if latency_seconds is not None else None,
+        "cost_usd": estimate_cost(model, batch=batch, **counts),
+        "batch": batch,
+        "success": error is None,
+        "error": error,
+        "paper_id": None,
+        "application_id": None,
+        "application": None,
+        **_context.get(),
+        **{key: value for key, value in context.items() if value is not None},
+    }
+    try:
+        _ledger.append(USAGE_FILE, json.dumps(entry, ensure_ascii=False))
+    except Exception as e:
+        print(f"Error writing usage ledger: {e}")
+    return entry
+
+
+def load_usage(since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Ledger entries, optionally limited to an ISO date/time range (inclusive since, exclusive until).
+    """
+    _ledger.flush()
+    if not USAGE_FILE.exists():
+        return []
+    entries = []
+    with open(USAGE_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line is skipped, not fatal
+                continue
+            timestamp = entry.get("timestamp", "")
+            if since and timestamp < since:
+                continue
+            if until and timestamp >= until:
+                continue
+            entries.append(entry)
+    return entries
+
+
+def _group_key(entry: Dict[str, Any], group_by: str) -> Optional[str]:
+    if group_by == "day":
+        return entry.get("timestamp", "")[:10]
+    if group_by == "paper":
+        return entry.get("paper_id")
+    if group_by == "application":
+        return entry.get("application_id")
+    return entry.get(group_by)
+
+
+def aggregate_usage(
+    group_by: str = "day",
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Sum ledger entries per day, model, paper, application or caller.
+
+    Returns:
+        dict with "totals" and "groups" (largest cost first); each has calls,
+        errors, token counts, cost_usd, unpriced_calls and latency figures
+    """
+    if group_by not in GROUP_BY_FIELDS:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY_FIELDS)}")
+
+    def empty() -> Dict[str, Any]:
+        return {
+            "calls": 0, "errors": 0, "input_tokens": 0, "cached_input_tokens": 0,
+            "output_tokens": 0, "cost_usd": 0.0, "unpriced_calls": 0,
+            "latency_seconds": 0.0, "max_latency_seconds": 0.0,
+        }
+
+    def add(bucket: Dict[str, Any], entry: Dict[str, Any]):
+        bucket["calls"] += 1
+        bucket["errors"] += 0 if entry.get("success", True) else 1
+        for field in ("input_tokens", "cached_input_tokens", "output_tokens"):
+            bucket[field] += entry.get(field) or 0
+        if entry.get("cost_usd") is None:
+            bucket["unpriced_calls"] += 1
+        else:
+            bucket["cost_usd"] += entry["cost_usd"]
+        latency = entry.get("latency_seconds") or 0.0
+        bucket["latency_seconds"] += latency
+        bucket["max_latency_seconds"] = max(bucket["max_latency_seconds"], latency)
+
+    def finish(bucket: Dict[str, Any]) -> Dict[str, Any]:
+        bucket["cost_usd"] = round(bucket["cost_usd"], 4)
+        bucket["latency_seconds"] = round(bucket["latency_seconds"], 3)
+        bucket["avg_latency_seconds"] = round(bucket["latency_seconds"] / bucket["calls"], 3) if bucket["calls"] else 0.0
+        return bucket
+
+    totals = empty()
+    groups: Dict[Optional[str], Dict[str, Any]] = {}
+    for entry in load_usage(since, until):
+        add(totals, entry)
+        key = _group_key(entry, group_by)
+        if key not in groups:
+            groups[key] = {"key": key, **empty()}
+            if group_by == "application":
+                groups[key]["label"] = entry.get("application")
+        add(groups[key], entry)
+
+    return {
+        "group_by": group_by,
+        "since": since,
+        "until": until,
+        "totals": finish(totals),
+        "groups": sorted((finish(group) for group in groups.values()), key=lambda g: -g["cost_usd"]),
+    }
@@ -0,0 +1,54 @@
+"""
+End-to-end check of the offline batch mode against the local fake Batch API
+(benchmarks/fake_batch_server.py): submit -> poll -> ingest, no OpenAI account needed
+"""
+import json
+import asyncio
+
+import pytest
+
+from openai import AsyncOpenAI
+
+from services import cache_service, batch_analysis, usage_ledger
+from benchmarks.fake_batch_server import FakeBatchServer
+
+SECTIONS = {
+    "title": "T", "github_url": None, "abstract_text": "a", "introduction_text": "i",
+    "contributions_text": "", "methodology_text": "m", "experiments_text": "e", "conclusion_text": "c"
+}
+
+
+def test_submit_poll_ingest(temp_cache):
+    cache_service.PAPERS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_service.PAPERS_FILE, 'w', encoding='utf-8') as f:
+        json.dump([{"arxiv_id": "2401.00001"}, {"arxiv_id": "2401.00002"}, {"arxiv_id": "2401.00003"}], f)
+    # 00001: markdown the local segmenter can't section -> sections request
+    cache_service.save_markdown("2401.00001", "some text\nmore text")
+    # 00002: sections cached -> analysis request; 00003: not parsed -> skipped
+    cache_service.save_markdown("2401.00002", "x\ny")
+    cache_service.save_sections("2401.00002", SECTIONS)
+
+    async def run(client: AsyncOpenAI):
+        submitted = await batch_analysis.submit_batches(client=client)
+        assert submitted["unparsed"] == 1
+        assert sorted(submitted["batches"][0]["requests"]) == ["analysis:2401.00002", "sections:2401.00001"]
+
+        # Requests already in flight are not submitted twice
+        again = await batch_analysis.submit_batches(client=client)
+        assert again["batches"] == [] and again["in_flight"] == 2
+
+        batches = await batch_analysis.wait_for_batches(interval=0.1, client=client)
+        assert all(record["ingested"] for record in batches)
+        assert batches[0]["results"] == {"analysis": 1, "sections": 1, "failed": 0}
+
+    with FakeBatchServer(completion_delay=0.2) as fake:
+        asyncio.run(run(AsyncOpenAI(api_key="fake", base_url=fake.base_url)))
+
+    assert cache_service.load_sections("2401.00001")
+    analysis = cache_service.load_analysis("2401.00002")
+    assert analysis["success"] and analysis["usage"]["batch_id"].startswith("batch_")
+    assert any(entry["batch"] for entry in usage_ledger.load_usage())
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,129 @@
+"""
+Checks for the background job runner (no network or API needed)
+"""
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from services import jobs, pipeline, deep_analysis, job_store
+
+
+def _rate_limit():
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    return openai.RateLimitError("Rate limit reached", response=httpx.Response(429, request=request), body=None)
+
+
+async def _run_jobs(queue, submit):
+    await queue.start()
+    try:
+        job = submit()
+        await queue.join()
+        return queue.get(job["id"])
+    finally:
+        await queue.stop()
+
+
+def test_unfinished_job_resumes_after_restart(temp_cache, monkeypatch):
+    """A job interrupted by shutdown is picked up from the store and skips the stages it finished"""
+    forced = []
+
+    async def interrupted_run(arxiv_id, targets, force, mode, arxiv_url, on_event):
+        on_event({"event": "plan", "arxiv_id": arxiv_id, "stages": {"download": {"status": "pending"}, "parse": {"status": "pending"}}})
+        on_event({"event": "stage", "arxiv_id": arxiv_id, "stage": "download", "status": "running"})
+        on_event({"event": "stage", "arxiv_id": arxiv_id, "stage": "download", "status": "done"})
+        on_event({"event": "stage", "arxiv_id": arxiv_id, "stage": "parse", "status": "running"})
+        await asyncio.sleep(60)
+
+    async def resumed_run(arxiv_id, targets, force, mode, arxiv_url, on_event):
+        forced.append(force)
+        return {"arxiv_id": arxiv_id, "success": True, "stages": {}, "seconds": 0.0}
+
+    async def shut_down_mid_job():
+        queue = jobs.JobQueue()
+        await queue.start()
+        job = queue.submit("2401.00001", until="parse", force=True, with_metadata=False)
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        return job["id"]
+
+    monkeypatch.setattr(pipeline, "run_paper", interrupted_run)
+    job_id = asyncio.run(shut_down_mid_job())
+    stored = job_store.load_job(job_id)
+    assert stored["status"] == "running" and stored["stage"] == "parse"
+
+    monkeypatch.setattr(pipeline, "run_paper", resumed_run)
+    queue = jobs.JobQueue()
+
+    async def restart():
+        await queue.start()
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(restart())
+    job = job_store.load_job(job_id)
+    assert job["status"] == "completed" and job["attempts"] == 2
+    # Forced stages that finished before the restart are not forced again
+    assert forced == [["parse"]]
+
+
+def test_job_interrupted_too_often_is_given_up(temp_cache, monkeypatch):
+    job = {
+        "id": "stuck", "arxiv_id": "2401.00001", "until": "parse", "targets": ["parse"], "mode": "hybrid",
+        "force": False, "arxiv_url": None, "priority": "prefetch", "status": "running", "stage": "parse",
+        "stages": {}, "attempts": jobs.JOB_MAX_ATTEMPTS, "error": None,
+        "created_at": "2026-01-01T00:00:00+00:00", "started_at": None, "finished_at": None,
+    }
+    job_store.save_job(job)
+    queue = jobs.JobQueue()
+
+    async def restart():
+        await queue.start()
+        await queue.stop()
+
+    asyncio.run(restart())
+    stored = job_store.load_job("stuck")
+    assert stored["status"] == "failed" and "giving up" in stored["error"]
+
+
+def test_deep_analysis_retries_transient_errors_from_its_progress(temp_cache, monkeypatch):
+    monkeypatch.setattr(pipeline, "RETRY_BASE_SECONDS", 0.0)
+    seen_progress = []
+
+    async def analyze_deeply(arxiv_id, progress, on_progress):
+        seen_progress.append(dict(progress))
+        if len(seen_progress) == 1:
+            on_progress({"0": {"domain": "d", "rows": [], "relevant": 1}})
+            raise _rate_limit()
+        return {"success": True, "csv_file": None, "relevant": 1, "applications": 2, "error": None}
+
+    monkeypatch.setattr(deep_analysis, "analyze_deeply", analyze_deeply)
+    queue = jobs.JobQueue()
+    job = asyncio.run(_run_jobs(queue, lambda: queue.submit_deep_analysis("2401.00001")))
+
+    assert job["status"] == "completed" and job["error"] is None
+    assert job["attempts"] == 1 and "retry_in_seconds" not in job
+    # The retry resumed from the application finished before the rate limit
+    assert seen_progress == [{}, {"0": {"domain": "d", "rows": [], "relevant": 1}}]
+
+
+def test_deep_analysis_fails_fast_on_permanent_errors(temp_cache, monkeypatch):
+    calls = []
+
+    async def analyze_deeply(arxiv_id, progress, on_progress):
+        calls.append(arxiv_id)
+        return {"success": False, "csv_file": None, "relevant": 0, "applications": 0,
+                "error": "Analysis and metadata of 2401.00001 must be cached first"}
+
+    monkeypatch.setattr(deep_analysis, "analyze_deeply", analyze_deeply)
+    queue = jobs.JobQueue()
+    job = asyncio.run(_run_jobs(queue, lambda: queue.submit_deep_analysis("2401.00001")))
+
+    assert job["status"] == "failed" and "must be cached first" in job["error"]
+    assert len(calls) == 1
+    assert job_store.load_job(job["id"])["status"] == "failed"
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
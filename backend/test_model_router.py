@@ -0,0 +1,72 @@
+"""
+Checks for the model cascade (no API needed)
+"""
+import json
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from services import model_router
+
+
+def _response(model, parsed):
+    return SimpleNamespace(model=model, output_parsed=parsed)
+
+
+def _rate_limit():
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    return openai.RateLimitError("Rate limit reached", response=httpx.Response(429, request=request), body=None)
+
+
+def _run(models, outcomes, check=None):
+    """Run a cascade where each model returns or raises its entry in outcomes."""
+    called = []
+
+    async def call(model):
+        called.append(model)
+        outcome = outcomes[model]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return _response(model, outcome)
+
+    result = asyncio.run(model_router.run_cascade("test", models, call, check=check))
+    return result, called
+
+
+def test_escalates_on_missing_output_and_quality_issues(temp_cache):
+    (best, responses, routing), called = _run(
+        ["small", "medium", "large"],
+        {"small": None, "medium": "", "large": "ok"},
+        check=lambda parsed: [] if parsed else ["empty"],
+    )
+    assert called == ["small", "medium", "large"]
+    assert best.model == "large" and len(responses) == 2
+    assert routing["escalations"] == 2 and routing["accepted"]
+
+    model_router._routing_log.flush()
+    entry = json.loads(model_router.ROUTING_LOG_FILE.read_text().splitlines()[-1])
+    assert entry["chosen"] == "large"
+
+
+def test_rate_limit_is_raised_instead_of_escalating(temp_cache):
+    with pytest.raises(openai.RateLimitError):
+        _run(["small", "large"], {"small": _rate_limit(), "large": "ok"})
+    stats = model_router.routing_stats()
+    assert stats["test"]["calls"] == 1
+
+
+def test_flagged_output_is_kept_when_the_next_model_is_rate_limited(temp_cache):
+    (best, _, routing), called = _run(
+        ["small", "large"],
+        {"small": "", "large": _rate_limit()},
+        check=lambda parsed: [] if parsed else ["empty"],
+    )
+    assert called == ["small", "large"]
+    assert best.model == "small" and not routing["accepted"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,94 @@
+"""
+Checks for the per-paper pipeline: planning by cache freshness and
+retrying transient stage failures (no network or API needed)
+"""
+import os
+import time
+import asyncio
+
+import pytest
+
+from services import cache_service, pipeline
+
+ARXIV_ID = "2401.00001"
+
+
+def _cache(*cache_types):
+    """Write the given cache files, each a second newer than the one before."""
+    writers = {
+        "pdf": lambda: cache_service.save_pdf(ARXIV_ID, b"%PDF-1.4"),
+        "markdown": lambda: cache_service.save_markdown(ARXIV_ID, "# Paper"),
+        "sections": lambda: cache_service.save_sections(ARXIV_ID, {"title": "Paper"}),
+        "analysis": lambda: cache_service.save_analysis(ARXIV_ID, {"success": True, "data": {}}),
+    }
+    start = time.time() - 100
+    for offset, cache_type in enumerate(cache_types):
+        writers[cache_type]()
+        _touch(cache_type, start + offset)
+
+
+def _touch(cache_type, mtime):
+    path = cache_service.CACHE_DIR / ARXIV_ID / cache_service.CACHE_FILES[cache_type]
+    os.utime(path, (mtime, mtime))
+
+
+def test_plan_uses_fresh_outputs(temp_cache):
+    _cache("pdf", "markdown", "sections", "analysis")
+    assert pipeline.plan(ARXIV_ID, ["analysis"]) == {"analysis": False}
+
+
+def test_plan_reruns_stages_older_than_their_inputs(temp_cache):
+    _cache("pdf", "markdown", "sections", "analysis")
+    # Re-parsed after the sections and analysis were made
+    _touch("markdown", time.time())
+    assert pipeline.plan(ARXIV_ID, ["analysis"]) == {"parse": False, "sections": True, "analysis": True}
+
+
+def test_plan_does_not_fetch_missing_inputs_of_fresh_stages(temp_cache):
+    # Markdown without a cached PDF, nothing downstream yet
+    _cache("markdown")
+    assert pipeline.plan(ARXIV_ID, ["sections"]) == {"parse": False, "sections": True}
+    assert pipeline.plan(ARXIV_ID, ["sections"], force=["parse"]) == {
+        "download": True, "parse": True, "sections": True,
+    }
+
+
+def test_transient_stage_failure_is_retried(temp_cache, monkeypatch):
+    monkeypatch.setattr(pipeline, "RETRY_BASE_SECONDS", 0.0)
+    calls = []
+
+    async def run_stage(stage, arxiv_id, mode, arxiv_url):
+        calls.append(stage)
+        if calls.count(stage) == 1:
+            raise ConnectionError("connection reset by peer")
+        return {}
+
+    monkeypatch.setattr(pipeline, "_run_stage", run_stage)
+    events = []
+    result = asyncio.run(pipeline.run_paper(ARXIV_ID, ["download"], on_event=events.append))
+
+    assert result["success"]
+    assert result["stages"]["download"]["status"] == "done"
+    assert result["stages"]["download"]["attempts"] == 2
+    assert "error" not in result["stages"]["download"]
+    assert "retrying" in [event.get("status") for event in events]
+
+
+def test_permanent_failure_fails_once_and_skips_dependents(temp_cache, monkeypatch):
+    calls = []
+
+    async def run_stage(stage, arxiv_id, mode, arxiv_url):
+        calls.append(stage)
+        raise ValueError("PDF is encrypted")
+
+    monkeypatch.setattr(pipeline, "_run_stage", run_stage)
+    result = asyncio.run(pipeline.run_paper(ARXIV_ID, ["parse"]))
+
+    assert not result["success"]
+    assert calls == ["download"]
+    assert result["stages"]["download"]["status"] == "failed"
+    assert result["stages"]["parse"]["status"] == "skipped"
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
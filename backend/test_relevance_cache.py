@@ -0,0 +1,45 @@
+"""
+Checks for the relevance decision cache (no API needed)
+"""
+import pytest
+from services import cache_service
+
+
+@pytest.fixture
+def relevance_file(temp_cache):
+    return cache_service.RELEVANCE_FILE
+
+
+def _entry(decision, prompt_version="v1"):
+    return {"decision": decision, "reason": "r", "arxiv_id": "2401.00001", "prompt_version": prompt_version}
+
+
+def test_saves_append_and_later_entries_win(relevance_file):
+    assert cache_service.save_relevance_decisions({"a": _entry(True), "b": _entry(False)})
+    assert cache_service.save_relevance_decisions({"a": _entry(False)})
+    assert len(relevance_file.read_text().splitlines()) == 3
+    found = cache_service.load_relevance_decisions(["a", "b", "c"])
+    assert set(found) == {"a", "b"}
+    assert found["a"]["decision"] is False and "cached_at" in found["a"]
+
+
+def test_truncated_write_does_not_break_the_cache(relevance_file):
+    cache_service.save_relevance_decisions({"a": _entry(True)})
+    # A crash mid-write leaves half a line behind
+    with open(relevance_file, "a", encoding="utf-8") as f:
+        f.write('{"key": "b", "decis')
+    assert set(cache_service.load_all_relevance_decisions()) == {"a"}
+    assert cache_service.save_relevance_decisions({"c": _entry(True)})
+    assert set(cache_service.load_all_relevance_decisions()) == {"a", "c"}
+
+
+def test_clear_keeps_current_prompt_version(relevance_file):
+    cache_service.save_relevance_decisions({"old": _entry(True, "v1"), "new": _entry(True, "v2")})
+    assert cache_service.clear_relevance_cache(keep_prompt_version="v2") == 1
+    assert set(cache_service.load_all_relevance_decisions()) == {"new"}
+    assert cache_service.clear_relevance_cache() == 1
+    assert relevance_file.read_text() == ""
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
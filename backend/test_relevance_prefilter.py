@@ -0,0 +1,43 @@
+"""
+Regression checks for the lexical relevance pre-filter (no API calls)
+"""
+from services.models import ApplicationIdea
+from services.relevance_prefilter import prefilter_candidates
+
+
+def _candidates(titles):
+    return [
+        {"paper_id": f"2401.{index:05d}", "title": title, "abstract": f"{title} abstract"}
+        for index, title in enumerate(titles)
+    ]
+
+
+def _application(domain, utility):
+    return ApplicationIdea(domain=domain, specific_utility=utility)
+
+
+def test_no_shared_terms_passes_candidates_through():
+    """A query that matches nothing in the pool must not drop every candidate"""
+    candidates = _candidates([f"Vision transformer variant {index}" for index in range(5)])
+    kept, dropped = prefilter_candidates(_application("LLM", "chatbots"), candidates, top_k=3, corpus={})
+    assert [c["paper_id"] for c in kept] == [c["paper_id"] for c in candidates[:3]]
+    assert len(dropped) == 2
+
+
+def test_stopword_query_passes_candidates_through():
+    candidates = _candidates(["Graph neural networks", "Speech recognition"])
+    kept, _ = prefilter_candidates(_application("the", "of a"), candidates, top_k=0, corpus={})
+    assert len(kept) == 2
+
+
+def test_matching_candidates_ranked_first():
+    candidates = _candidates(["Speech recognition", "Large language model agents", "Protein folding"])
+    kept, _ = prefilter_candidates(_application("language", "agents"), candidates, top_k=1, corpus={})
+    assert [c["title"] for c in kept] == ["Large language model agents"]
+
+
+if __name__ == "__main__":
+    test_no_shared_terms_passes_candidates_through()
+    test_stopword_query_passes_candidates_through()
+    test_matching_candidates_ranked_first()
+    print("✅ Pre-filter checks passed")
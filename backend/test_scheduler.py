@@ -0,0 +1,119 @@
+"""
+Checks for the priority limiter (no OCR server or API needed)
+"""
+import time
+import asyncio
+import threading
+from services.scheduler import PriorityLimiter, priority
+
+
+def test_waiters_granted_by_class_then_arrival():
+    """With one slot busy, queued work runs interactive, prefetch, batch, oldest first"""
+    limiter = PriorityLimiter("order", 1)
+    order = []
+
+    async def work(priority_class, tag):
+        async with limiter.slot(priority_class):
+            order.append(tag)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        first = asyncio.create_task(work("batch", "b0"))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(work(priority_class, tag))
+            for priority_class, tag in [("batch", "b1"), ("prefetch", "p1"), ("interactive", "i1"), ("interactive", "i2")]
+        ]
+        await asyncio.gather(first, *queued)
+
+    asyncio.run(main())
+    assert order == ["b0", "i1", "i2", "p1", "b1"], order
+
+
+def test_batch_leaves_headroom():
+    """Batch holds at most its share; interactive work starts without waiting"""
+    limiter = PriorityLimiter("share", 4, batch_share=0.5)
+    started = []
+
+    async def work(tag, seconds):
+        async with limiter.slot():
+            started.append(tag)
+            await asyncio.sleep(seconds)
+
+    async def main():
+        with priority("batch"):
+            batch = [asyncio.create_task(work(f"b{index}", 0.05)) for index in range(6)]
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["classes"]["batch"]["in_use"] == 2
+        interactive = asyncio.create_task(work("i0", 0))
+        await asyncio.sleep(0.01)
+        assert "i0" in started
+        await asyncio.gather(*batch, interactive)
+
+    asyncio.run(main())
+    stats = limiter.stats()
+    assert stats["classes"]["batch"]["granted"] == 6
+    assert stats["classes"]["interactive"]["max_wait_seconds"] < 0.01
+    assert stats["in_use"] == 0 and stats["waiting"] == 0
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    limiter = PriorityLimiter("cancel", 1)
+
+    async def main():
+        async def hold():
+            async with limiter.slot():
+                await asyncio.sleep(0.02)
+
+        async def wait():
+            async with limiter.slot():
+                pass
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(wait())
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        await asyncio.gather(holder, waiter, return_exceptions=True)
+
+    asyncio.run(main())
+    stats = limiter.stats()
+    assert stats["in_use"] == 0 and stats["waiting"] == 0, stats
+
+
+def test_reserved_run_is_not_interleaved():
+    """Pages of an interactive parse are not interleaved with a batch parse on a single slot"""
+    limiter = PriorityLimiter("ocr", 1)
+    pages = []
+
+    def parse(priority_class, tag, reserve):
+        def run():
+            for _ in range(4):
+                with limiter.slot_sync(priority_class):
+                    pages.append(tag)
+                    time.sleep(0.005)
+        if reserve:
+            with limiter.reserve(priority_class):
+                run()
+        else:
+            run()
+
+    batch = threading.Thread(target=parse, args=("batch", "b", True))
+    batch.start()
+    time.sleep(0.007)
+    interactive = threading.Thread(target=parse, args=("interactive", "i", True))
+    interactive.start()
+    batch.join()
+    interactive.join()
+    sequence = "".join(pages)
+    # At most the batch page already running finishes before the interactive parse
+    assert "iiii" in sequence and sequence.startswith("b"), sequence
+    assert limiter.stats()["classes"]["interactive"]["reserved"] == 0
+
+
+if __name__ == "__main__":
+    test_waiters_granted_by_class_then_arrival()
+    test_batch_leaves_headroom()
+    test_cancelled_waiter_gives_up_its_place()
+    test_reserved_run_is_not_interleaved()
+    print("✅ Scheduler checks passed")
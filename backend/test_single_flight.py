@@ -0,0 +1,96 @@
+"""
+Checks for request coalescing (no network or API needed)
+"""
+import asyncio
+import threading
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    """Callers of the same key get one factory call and the same result"""
+    flights = SingleFlight()
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": len(calls)}
+
+    async def main():
+        results = await asyncio.gather(*[flights.do("key", factory) for _ in range(5)])
+        assert not flights.in_flight("key")
+        return results
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_events_reach_every_caller_on_the_loop():
+    """Events emitted from a worker thread are fanned out to each caller on the loop thread"""
+    flights = SingleFlight()
+    received = {"a": [], "b": []}
+    threads = set()
+
+    def listener(name):
+        def on_event(event):
+            threads.add(threading.get_ident())
+            received[name].append(event["page"])
+        return on_event
+
+    async def main():
+        loop_thread = threading.get_ident()
+
+        async def factory():
+            emit = flights.emitter("parse")
+            # Let the second caller join before anything is emitted
+            await asyncio.sleep(0.01)
+            await asyncio.to_thread(lambda: [emit({"page": page}) for page in range(3)])
+            emit({"page": 3})
+            return "done"
+
+        results = await asyncio.gather(
+            flights.do("parse", factory, on_event=listener("a")),
+            flights.do("parse", factory, on_event=listener("b")),
+        )
+        assert results == ["done", "done"]
+        return loop_thread
+
+    loop_thread = asyncio.run(main())
+    assert received["a"] == received["b"] == [0, 1, 2, 3], received
+    assert threads == {loop_thread}
+    assert not flights._listeners
+
+
+def test_last_caller_leaving_cancels_the_work():
+    """The shared task is cancelled only once every caller is gone"""
+    flights = SingleFlight()
+    cancelled = []
+
+    async def factory():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        first = asyncio.create_task(flights.do("slow", factory))
+        second = asyncio.create_task(flights.do("slow", factory))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled and flights.in_flight("slow")
+        second.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [1]
+
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_run()
+    test_events_reach_every_caller_on_the_loop()
+    test_last_caller_leaving_cancels_the_work()
+    print("✅ Single-flight checks passed")
@@ -9,10 +9,12 @@ import { ApplicationDetail } from './components/ApplicationDetail';
 import { 
   fetchPapers, 
   parsePaper, 
+  streamParsePaper,
   analyzePaper, 
   addPaper, 
   getPaperMetadata, 
   getCachedAnalysis, 
+  streamAnalyzePaper,
   getCacheStatus, 
   addRelatedPaper,
   addApplication,
@@ -151,7 +153,12 @@ function App() {
     try {
       setParsing(true);
       setError(null);
-      const response = await parsePaper(selectedPaper.id, selectedPaper.arxiv_url || undefined, forceReload);
+      const response = await streamParsePaper(
+        selectedPaper.id,
+        selectedPaper.arxiv_url || undefined,
+        forceReload,
+        (partialMarkdown) => setMarkdown(partialMarkdown)
+      );
 
       if (response.success && response.markdown) {
         setMarkdown(response.markdown);
@@ -177,7 +184,11 @@ function App() {
     try {
       setAnalyzing(true);
       setError(null);
-      const response = await getCachedAnalysis(selectedPaper.arxiv_id, forceReload);
+      const response = await streamAnalyzePaper(
+        selectedPaper.arxiv_id,
+        forceReload,
+        (partialAnalysis) => setSummary(partialAnalysis)
+      );
 
       if (response.success && response.data) {
         setSummary(response.data);
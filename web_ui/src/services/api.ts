@@ -97,6 +97,75 @@ export const parsePaper = async (
   return response.data;
 };
 
+export interface ParseProgress {
+  stage: 'downloaded' | 'page' | 'parsed' | 'sections_ready';
+  page?: number;
+  total?: number;
+}
+
+/**
+ * Parse a paper via the server-sent events endpoint.
+ * Calls onMarkdown with the markdown produced so far as pages arrive,
+ * and resolves with the same shape as parsePaper once parsing is done.
+ */
+export const streamParsePaper = (
+  paperId: string,
+  arxivUrl?: string,
+  forceReload?: boolean,
+  onMarkdown?: (markdown: string) => void,
+  onProgress?: (progress: ParseProgress) => void
+): Promise<ParseResponse> => {
+  const params = new URLSearchParams();
+  if (arxivUrl) params.set('arxiv_url', arxivUrl);
+  if (forceReload) params.set('force_reload', 'true');
+
+  return new Promise((resolve) => {
+    const source = new EventSource(`${API_BASE_URL}/papers/${paperId}/parse/stream?${params.toString()}`);
+    let markdown = '# Research Paper\n\n';
+    let result: ParseResponse = { success: false, markdown: null, size_bytes: null, error: null };
+
+    const finish = (response: ParseResponse) => {
+      source.close();
+      resolve(response);
+    };
+
+    source.addEventListener('cached', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      result = { success: true, markdown: data.markdown, size_bytes: data.size_bytes, error: null, from_cache: true };
+      onMarkdown?.(data.markdown);
+    });
+    source.addEventListener('downloaded', () => onProgress?.({ stage: 'downloaded' }));
+    source.addEventListener('restart', () => {
+      markdown = '# Research Paper\n\n';
+    });
+    source.addEventListener('page', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      if (data.markdown) {
+        markdown += data.markdown;
+        onMarkdown?.(markdown);
+      }
+      onProgress?.({ stage: 'page', page: data.page, total: data.total });
+    });
+    source.addEventListener('parsed', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      result = { success: true, markdown: data.markdown, size_bytes: data.size_bytes, error: null, from_cache: false };
+      onMarkdown?.(data.markdown);
+      onProgress?.({ stage: 'parsed' });
+    });
+    source.addEventListener('sections_ready', () => onProgress?.({ stage: 'sections_ready' }));
+    source.addEventListener('error', (e) => {
+      const raw = (e as MessageEvent).data;
+      if (raw) {
+        result = { ...result, success: false, error: JSON.parse(raw).error };
+      } else {
+        // Connection-level error (no payload)
+        finish({ ...result, error: result.success ? null : 'Connection to parse stream lost' });
+      }
+    });
+    source.addEventListener('done', () => finish(result));
+  });
+};
+
 export const analyzePaper = async (markdown: string): Promise<AnalyzeResponse> => {
   const response = await apiClient.post<AnalyzeResponse>('/papers/analyze', { markdown });
   return response.data;
@@ -179,6 +248,83 @@ export const getCachedAnalysis = async (
   return response.data;
 };
 
+const emptyAnalysis = (): Analysis => ({
+  paper_title: '',
+  novelty: { status_quo: '', proposed_delta: '', novelty_summary: '', real_world_analogy: '' },
+  summary: { main_contribution: '', methodology: '', applications: [], limitations: '' },
+  github_repo: '',
+  benchmarks: [],
+});
+
+/**
+ * Analyze a paper via the server-sent events endpoint.
+ * Calls onPartial with a complete-shaped Analysis (missing fields left empty)
+ * as fields and benchmarks arrive, and resolves like getCachedAnalysis.
+ */
+export const streamAnalyzePaper = (
+  arxivId: string,
+  forceReload?: boolean,
+  onPartial?: (analysis: Analysis) => void
+): Promise<AnalyzeResponse> => {
+  const params = new URLSearchParams();
+  if (forceReload) params.set('force_reload', 'true');
+
+  return new Promise((resolve) => {
+    const source = new EventSource(`${API_BASE_URL}/papers/${arxivId}/analyze/stream?${params.toString()}`);
+    let analysis = emptyAnalysis();
+    let result: AnalyzeResponse = { success: false };
+
+    const finish = (response: AnalyzeResponse) => {
+      source.close();
+      resolve(response);
+    };
+
+    const setField = (field: string, data: any) => {
+      const base = (emptyAnalysis() as any)[field];
+      const value = base && typeof base === 'object' && !Array.isArray(base) ? { ...base, ...data } : data;
+      analysis = { ...analysis, [field]: value };
+      onPartial?.(analysis);
+    };
+
+    source.addEventListener('cached', (e) => {
+      result = { ...JSON.parse((e as MessageEvent).data), from_cache: true };
+      if (result.data) onPartial?.(result.data);
+    });
+    source.addEventListener('partial', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      // Benchmarks arrive one by one as validated "benchmark" events instead
+      if (data.field !== 'benchmarks') setField(data.field, data.data);
+    });
+    source.addEventListener('field', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      setField(data.field, data.data);
+    });
+    source.addEventListener('escalated', () => {
+      // The streamed output was rejected; fields arrive again from a larger model
+      analysis = emptyAnalysis();
+      onPartial?.(analysis);
+    });
+    source.addEventListener('benchmark', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      analysis = { ...analysis, benchmarks: [...analysis.benchmarks, data.data] };
+      onPartial?.(analysis);
+    });
+    source.addEventListener('error', (e) => {
+      const raw = (e as MessageEvent).data;
+      if (raw) {
+        result = { ...result, success: false, error: JSON.parse(raw).error };
+      } else {
+        // Connection-level error (no payload)
+        finish({ ...result, error: result.success ? undefined : 'Connection to analysis stream lost' });
+      }
+    });
+    source.addEventListener('done', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      finish(data.from_cache ? result : { ...data, error: data.error ?? result.error });
+    });
+  });
+};
+
 export const getCacheStatus = async (arxivId: string): Promise<CacheStatus> => {
   const response = await apiClient.get<CacheStatus>(`/papers/${arxivId}/cache-status`);
   return response.data;